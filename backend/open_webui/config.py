@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import os
@@ -222,6 +223,15 @@ class PersistentConfig(Generic[T]):
 
 
 class AppConfig:
+    """
+    Registry of PersistentConfig values exposed as attributes.
+
+    Reads are always served from the in-memory values. When Redis is configured,
+    writes are mirrored to `{prefix}:config:{key}` and announced on the
+    `{prefix}:config:updates` channel, and `listen_for_updates` applies the
+    values written by other instances to the local copy.
+    """
+
     _state: dict[str, PersistentConfig]
     _redis: Union[redis.Redis, redis.cluster.RedisCluster] = None
     _redis_key_prefix: str
@@ -246,6 +256,28 @@ class AppConfig:
                 ),
             )
 
+    @property
+    def _redis_channel(self) -> str:
+        return f"{self._redis_key_prefix}:config:updates"
+
+    def _get_redis_key(self, key: str) -> str:
+        return f"{self._redis_key_prefix}:config:{key}"
+
+    def _apply_redis_value(self, key: str, redis_value: Optional[str]):
+        if key not in self._state or redis_value is None:
+            return
+
+        try:
+            decoded_value = json.loads(redis_value)
+
+            # Update the in-memory value if different
+            if self._state[key].value != decoded_value:
+                self._state[key].value = decoded_value
+                log.info(f"Updated {key} from Redis: {decoded_value}")
+
+        except json.JSONDecodeError:
+            log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+
     def __setattr__(self, key, value):
         if isinstance(value, PersistentConfig):
             self._state[key] = value
@@ -254,32 +286,60 @@ class AppConfig:
             self._state[key].save()
 
             if self._redis:
-                redis_key = f"{self._redis_key_prefix}:config:{key}"
-                self._redis.set(redis_key, json.dumps(self._state[key].value))
+                self._redis.set(
+                    self._get_redis_key(key), json.dumps(self._state[key].value)
+                )
+                self._redis.publish(self._redis_channel, json.dumps({"key": key}))
 
     def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available, check for an updated value
-        if self._redis:
-            redis_key = f"{self._redis_key_prefix}:config:{key}"
-            redis_value = self._redis.get(redis_key)
-
-            if redis_value is not None:
-                try:
-                    decoded_value = json.loads(redis_value)
-
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
-
-                except json.JSONDecodeError:
-                    log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
-
         return self._state[key].value
 
+    async def sync_from_redis(self, redis):
+        """Load the values of all registered keys from Redis in one round trip."""
+        keys = list(self._state.keys())
+        if not keys:
+            return
+
+        pipe = redis.pipeline()
+        for key in keys:
+            pipe.get(self._get_redis_key(key))
+        redis_values = await pipe.execute()
+
+        for key, redis_value in zip(keys, redis_values):
+            self._apply_redis_value(key, redis_value)
+
+    async def listen_for_updates(self, redis):
+        """
+        Keep the in-memory values in line with writes made by other instances.
+        Updates published while not subscribed are missed, so all keys are
+        re-read from Redis every time the subscription is (re)established.
+        """
+        while True:
+            try:
+                pubsub = redis.pubsub()
+                await pubsub.subscribe(self._redis_channel)
+                await self.sync_from_redis(redis)
+
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        key = json.loads(message["data"]).get("key")
+                        if key in self._state:
+                            self._apply_redis_value(
+                                key, await redis.get(self._get_redis_key(key))
+                            )
+                    except Exception as e:
+                        log.exception(f"Error handling config update: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Config update listener disconnected: {e}")
+                await asyncio.sleep(1)
+
 
 ####################################
 # WEBUI_AUTH (Required for security)
@@ -848,6 +908,30 @@ AZURE_STORAGE_ENDPOINT = os.environ.get("AZURE_STORAGE_ENDPOINT", None)
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get("AZURE_STORAGE_CONTAINER_NAME", None)
 AZURE_STORAGE_KEY = os.environ.get("AZURE_STORAGE_KEY", None)
 
+# Uploads are copied, hashed and sent to object storage in parts of this size
+try:
+    STORAGE_UPLOAD_CHUNK_SIZE = int(
+        os.environ.get("STORAGE_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024))
+    )
+except ValueError:
+    STORAGE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Size in bytes of the local disk cache of files downloaded from S3, GCS or Azure
+try:
+    STORAGE_CACHE_MAX_SIZE = int(
+        os.environ.get("STORAGE_CACHE_MAX_SIZE", str(1024 * 1024 * 1024))
+    )
+except ValueError:
+    STORAGE_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+
+# Seconds after which a cached file is checked against the remote object again
+try:
+    STORAGE_CACHE_VALIDATION_TTL = float(
+        os.environ.get("STORAGE_CACHE_VALIDATION_TTL", "60")
+    )
+except ValueError:
+    STORAGE_CACHE_VALIDATION_TTL = 60.0
+
 ####################################
 # File Upload DIR
 ####################################
@@ -932,6 +1016,13 @@ OLLAMA_API_CONFIGS = PersistentConfig(
     {},
 )
 
+# One of "least_requests", "ewma", "weighted" or "random"
+OLLAMA_LOAD_BALANCING_STRATEGY = PersistentConfig(
+    "OLLAMA_LOAD_BALANCING_STRATEGY",
+    "ollama.load_balancing_strategy",
+    os.environ.get("OLLAMA_LOAD_BALANCING_STRATEGY", "least_requests"),
+)
+
 ####################################
 # OPENAI_API
 ####################################
@@ -2325,6 +2416,26 @@ RAG_HYBRID_BM25_WEIGHT = PersistentConfig(
     float(os.environ.get("RAG_HYBRID_BM25_WEIGHT", "0.5")),
 )
 
+# Persisted per-collection BM25 indexes used by hybrid search, and the number of
+# them kept loaded in memory
+RAG_BM25_INDEX_DIR = os.environ.get("RAG_BM25_INDEX_DIR", f"{CACHE_DIR}/bm25")
+
+try:
+    RAG_BM25_INDEX_CACHE_SIZE = int(os.environ.get("RAG_BM25_INDEX_CACHE_SIZE", "8"))
+except ValueError:
+    RAG_BM25_INDEX_CACHE_SIZE = 8
+
+# Seconds after which an index is checked against its vector DB collection
+# again, and rebuilt if they differ. This catches writes made by instances that
+# do not share RAG_BM25_INDEX_DIR; when it is shared, a negative value turns the
+# check off
+try:
+    RAG_BM25_INDEX_VALIDATION_TTL = float(
+        os.environ.get("RAG_BM25_INDEX_VALIDATION_TTL", "300")
+    )
+except ValueError:
+    RAG_BM25_INDEX_VALIDATION_TTL = 300.0
+
 ENABLE_RAG_HYBRID_SEARCH = PersistentConfig(
     "ENABLE_RAG_HYBRID_SEARCH",
     "rag.enable_hybrid_search",
@@ -354,6 +354,31 @@ if DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL is not None:
     except Exception:
         DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL = 0.0
 
+# Seconds between the bulk writes of users' last activity
+USER_LAST_ACTIVE_FLUSH_INTERVAL = os.environ.get(
+    "USER_LAST_ACTIVE_FLUSH_INTERVAL", "10"
+)
+
+try:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = float(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+except Exception:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = 10.0
+
+# Seconds authenticated users are cached per process, 0 disables the cache
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "10")
+
+try:
+    USER_CACHE_TTL = float(USER_CACHE_TTL)
+except Exception:
+    USER_CACHE_TTL = 10.0
+
+USER_CACHE_MAX_SIZE = os.environ.get("USER_CACHE_MAX_SIZE", "10000")
+
+try:
+    USER_CACHE_MAX_SIZE = int(USER_CACHE_MAX_SIZE)
+except Exception:
+    USER_CACHE_MAX_SIZE = 10000
+
 RESET_CONFIG_ON_START = (
     os.environ.get("RESET_CONFIG_ON_START", "False").lower() == "true"
 )
@@ -362,8 +387,107 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Streamed message writes are buffered in memory and flushed to the database at most
+# once per interval (in seconds) or once the buffered update count reaches the max size.
+# An interval of 0 writes every update through immediately.
+CHAT_MESSAGE_WRITE_BUFFER_INTERVAL = os.environ.get(
+    "CHAT_MESSAGE_WRITE_BUFFER_INTERVAL", "1"
+)
+
+try:
+    CHAT_MESSAGE_WRITE_BUFFER_INTERVAL = float(CHAT_MESSAGE_WRITE_BUFFER_INTERVAL)
+except Exception:
+    CHAT_MESSAGE_WRITE_BUFFER_INTERVAL = 1.0
+
+CHAT_MESSAGE_WRITE_BUFFER_MAX_SIZE = os.environ.get(
+    "CHAT_MESSAGE_WRITE_BUFFER_MAX_SIZE", "100"
+)
+
+try:
+    CHAT_MESSAGE_WRITE_BUFFER_MAX_SIZE = int(CHAT_MESSAGE_WRITE_BUFFER_MAX_SIZE)
+except Exception:
+    CHAT_MESSAGE_WRITE_BUFFER_MAX_SIZE = 100
+
+# Chats are exported and imported as NDJSON in batches of this many chats
+CHAT_NDJSON_BATCH_SIZE = os.environ.get("CHAT_NDJSON_BATCH_SIZE", "100")
+
+try:
+    CHAT_NDJSON_BATCH_SIZE = int(CHAT_NDJSON_BATCH_SIZE)
+except Exception:
+    CHAT_NDJSON_BATCH_SIZE = 100
+
+# Maximum size in bytes of an NDJSON chat import once decompressed, and of each
+# of its lines
+CHAT_IMPORT_MAX_SIZE = os.environ.get("CHAT_IMPORT_MAX_SIZE", str(1024**3))
+
+try:
+    CHAT_IMPORT_MAX_SIZE = int(CHAT_IMPORT_MAX_SIZE)
+except Exception:
+    CHAT_IMPORT_MAX_SIZE = 1024**3
+
+CHAT_IMPORT_MAX_LINE_SIZE = os.environ.get(
+    "CHAT_IMPORT_MAX_LINE_SIZE", str(32 * 1024**2)
+)
+
+try:
+    CHAT_IMPORT_MAX_LINE_SIZE = int(CHAT_IMPORT_MAX_LINE_SIZE)
+except Exception:
+    CHAT_IMPORT_MAX_LINE_SIZE = 32 * 1024**2
+
 ENABLE_QUERIES_CACHE = os.environ.get("ENABLE_QUERIES_CACHE", "False").lower() == "true"
 
+# Seconds the file processing status stream waits for a status event before it
+# falls back to reading the status from the database
+FILE_PROCESSING_STATUS_POLL_INTERVAL = os.environ.get(
+    "FILE_PROCESSING_STATUS_POLL_INTERVAL", "10"
+)
+
+try:
+    FILE_PROCESSING_STATUS_POLL_INTERVAL = float(FILE_PROCESSING_STATUS_POLL_INTERVAL)
+except Exception:
+    FILE_PROCESSING_STATUS_POLL_INTERVAL = 10.0
+
+# Uploaded files are processed by a queue of ingestion jobs stored in the
+# database, so that processing is bounded and survives restarts
+ENABLE_INGESTION_QUEUE = (
+    os.environ.get("ENABLE_INGESTION_QUEUE", "True").lower() == "true"
+)
+
+INGESTION_QUEUE_WORKERS = os.environ.get("INGESTION_QUEUE_WORKERS", "2")
+
+try:
+    INGESTION_QUEUE_WORKERS = int(INGESTION_QUEUE_WORKERS)
+except Exception:
+    INGESTION_QUEUE_WORKERS = 2
+
+INGESTION_QUEUE_POLL_INTERVAL = os.environ.get("INGESTION_QUEUE_POLL_INTERVAL", "5")
+
+try:
+    INGESTION_QUEUE_POLL_INTERVAL = float(INGESTION_QUEUE_POLL_INTERVAL)
+except Exception:
+    INGESTION_QUEUE_POLL_INTERVAL = 5.0
+
+INGESTION_JOB_MAX_ATTEMPTS = os.environ.get("INGESTION_JOB_MAX_ATTEMPTS", "3")
+
+try:
+    INGESTION_JOB_MAX_ATTEMPTS = int(INGESTION_JOB_MAX_ATTEMPTS)
+except Exception:
+    INGESTION_JOB_MAX_ATTEMPTS = 3
+
+INGESTION_JOB_RETRY_DELAY = os.environ.get("INGESTION_JOB_RETRY_DELAY", "10")
+
+try:
+    INGESTION_JOB_RETRY_DELAY = int(INGESTION_JOB_RETRY_DELAY)
+except Exception:
+    INGESTION_JOB_RETRY_DELAY = 10
+
+INGESTION_JOB_LEASE_TIMEOUT = os.environ.get("INGESTION_JOB_LEASE_TIMEOUT", "300")
+
+try:
+    INGESTION_JOB_LEASE_TIMEOUT = int(INGESTION_JOB_LEASE_TIMEOUT)
+except Exception:
+    INGESTION_JOB_LEASE_TIMEOUT = 300
+
 ####################################
 # REDIS
 ####################################
@@ -532,6 +656,19 @@ else:
     except Exception:
         CHAT_RESPONSE_STREAM_DELTA_CHUNK_SIZE = 1
 
+# Every this many streamed content deltas the full content is sent instead, so
+# that a client that missed an event catches up
+CHAT_RESPONSE_STREAM_FULL_CONTENT_INTERVAL = os.environ.get(
+    "CHAT_RESPONSE_STREAM_FULL_CONTENT_INTERVAL", "50"
+)
+
+try:
+    CHAT_RESPONSE_STREAM_FULL_CONTENT_INTERVAL = max(
+        int(CHAT_RESPONSE_STREAM_FULL_CONTENT_INTERVAL), 1
+    )
+except ValueError:
+    CHAT_RESPONSE_STREAM_FULL_CONTENT_INTERVAL = 50
+
 
 CHAT_RESPONSE_MAX_TOOL_CALL_RETRIES = os.environ.get(
     "CHAT_RESPONSE_MAX_TOOL_CALL_RETRIES", "10"
@@ -572,6 +709,42 @@ except ValueError:
 WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+# Seconds for which each instance reuses user pool entries read from Redis
+websocket_user_pool_cache_ttl = os.environ.get("WEBSOCKET_USER_POOL_CACHE_TTL", "1")
+
+try:
+    WEBSOCKET_USER_POOL_CACHE_TTL = float(websocket_user_pool_cache_ttl)
+except ValueError:
+    WEBSOCKET_USER_POOL_CACHE_TTL = 1.0
+
+# Milliseconds over which chat events of a message are coalesced into one emit
+websocket_event_batch_interval = os.environ.get(
+    "WEBSOCKET_EVENT_BATCH_INTERVAL_MS", "10"
+)
+
+try:
+    WEBSOCKET_EVENT_BATCH_INTERVAL = int(websocket_event_batch_interval) / 1000
+except ValueError:
+    WEBSOCKET_EVENT_BATCH_INTERVAL = 0.01
+
+# Number of Yjs updates kept per collaborative document before they are merged
+# into its snapshot, 0 disables compaction
+ydoc_compaction_threshold = os.environ.get("YDOC_COMPACTION_THRESHOLD", "500")
+
+try:
+    YDOC_COMPACTION_THRESHOLD = int(ydoc_compaction_threshold)
+except ValueError:
+    YDOC_COMPACTION_THRESHOLD = 500
+
+# Seconds between the removals of collaborative document sessions that were not
+# cleaned up on disconnect, 0 disables them
+ydoc_cleanup_interval = os.environ.get("YDOC_CLEANUP_INTERVAL", "300")
+
+try:
+    YDOC_CLEANUP_INTERVAL = int(ydoc_cleanup_interval)
+except ValueError:
+    YDOC_CLEANUP_INTERVAL = 300
+
 
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
@@ -621,6 +794,69 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL", "True").lower() == "true"
 )
 
+# Maximum number of connections per upstream, 0 for no limit
+AIOHTTP_CLIENT_POOL_LIMIT = os.environ.get("AIOHTTP_CLIENT_POOL_LIMIT", "0")
+
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT = max(int(AIOHTTP_CLIENT_POOL_LIMIT), 0)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_LIMIT = 0
+
+AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT", "30"
+)
+
+try:
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = float(AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = 30.0
+
+AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL", "300"
+)
+
+try:
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL = int(AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL = 300
+
+
+####################################
+# AUDIO
+####################################
+
+# Longest segment, in seconds, that long recordings are split into for transcription
+AUDIO_STT_SEGMENT_DURATION = os.environ.get("AUDIO_STT_SEGMENT_DURATION", "600")
+
+try:
+    AUDIO_STT_SEGMENT_DURATION = int(AUDIO_STT_SEGMENT_DURATION)
+except ValueError:
+    AUDIO_STT_SEGMENT_DURATION = 600
+
+# Number of segments transcribed at the same time
+AUDIO_STT_SEGMENT_CONCURRENCY = os.environ.get("AUDIO_STT_SEGMENT_CONCURRENCY", "4")
+
+try:
+    AUDIO_STT_SEGMENT_CONCURRENCY = max(int(AUDIO_STT_SEGMENT_CONCURRENCY), 1)
+except ValueError:
+    AUDIO_STT_SEGMENT_CONCURRENCY = 4
+
+# Bytes of synthesized speech kept in the cache, 0 for no limit
+AUDIO_TTS_CACHE_MAX_SIZE = os.environ.get(
+    "AUDIO_TTS_CACHE_MAX_SIZE", str(1024 * 1024 * 1024)
+)
+
+try:
+    AUDIO_TTS_CACHE_MAX_SIZE = int(AUDIO_TTS_CACHE_MAX_SIZE)
+except ValueError:
+    AUDIO_TTS_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+
+# Keep the speech cache index in Redis, for replicas that share the cache
+# directory on a shared volume. Otherwise each replica indexes its own clips.
+AUDIO_TTS_CACHE_SHARED = (
+    os.environ.get("AUDIO_TTS_CACHE_SHARED", "False").lower() == "true"
+)
+
 
 ####################################
 # SENTENCE TRANSFORMERS
@@ -57,6 +57,7 @@ from open_webui.utils.logger import start_logger
 from open_webui.socket.main import (
     app as socket_app,
     periodic_usage_pool_cleanup,
+    periodic_ydoc_cleanup,
     get_event_emitter,
     get_models_in_use,
     get_active_user_ids,
@@ -95,6 +96,7 @@ from open_webui.routers.retrieval import (
     get_ef,
     get_rf,
 )
+from open_webui.routers.files import process_file_job
 
 from open_webui.internal.db import Session, engine
 
@@ -108,6 +110,7 @@ from open_webui.config import (
     ENABLE_OLLAMA_API,
     OLLAMA_BASE_URLS,
     OLLAMA_API_CONFIGS,
+    OLLAMA_LOAD_BALANCING_STRATEGY,
     # OpenAI
     ENABLE_OPENAI_API,
     ONEDRIVE_CLIENT_ID,
@@ -433,6 +436,7 @@ from open_webui.env import (
     RESET_CONFIG_ON_START,
     ENABLE_VERSION_UPDATE_CHECK,
     ENABLE_OTEL,
+    ENABLE_INGESTION_QUEUE,
     EXTERNAL_PWA_MANIFEST_URL,
     AIOHTTP_CLIENT_SESSION_SSL,
 )
@@ -450,7 +454,13 @@ from open_webui.utils.chat import (
 )
 from open_webui.utils.embeddings import generate_embeddings
 from open_webui.utils.middleware import process_chat_payload, process_chat_response
-from open_webui.utils.access_control import has_access
+from open_webui.utils.message_buffer import MESSAGE_WRITE_BUFFER
+from open_webui.utils.http_pool import HTTP_SESSION_POOL
+from open_webui.utils.file_status import FILE_STATUS_NOTIFIER
+from open_webui.utils.ingestion import INGESTION_QUEUE
+from open_webui.utils.last_active import LAST_ACTIVE_BUFFER
+from open_webui.utils.speech_cache import SPEECH_CACHE
+from open_webui.utils.access_control import has_access, get_user_group_ids
 
 from open_webui.utils.auth import (
     get_license_data,
@@ -544,16 +554,30 @@ async def lifespan(app: FastAPI):
         async_mode=True,
     )
 
+    FILE_STATUS_NOTIFIER.start(app.state.redis)
+    SPEECH_CACHE.start(app.state.redis)
+    if ENABLE_INGESTION_QUEUE:
+        INGESTION_QUEUE.start(app, process_file_job)
+
     if app.state.redis is not None:
         app.state.redis_task_command_listener = asyncio.create_task(
             redis_task_command_listener(app)
         )
+        app.state.file_status_listener = asyncio.create_task(
+            FILE_STATUS_NOTIFIER.listen()
+        )
+        await app.state.config.sync_from_redis(app.state.redis)
+        app.state.config_update_listener = asyncio.create_task(
+            app.state.config.listen_for_updates(app.state.redis)
+        )
 
     if THREAD_POOL_SIZE and THREAD_POOL_SIZE > 0:
         limiter = anyio.to_thread.current_default_thread_limiter()
         limiter.total_tokens = THREAD_POOL_SIZE
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    asyncio.create_task(periodic_ydoc_cleanup())
+    LAST_ACTIVE_BUFFER.start()
 
     if app.state.config.ENABLE_BASE_MODELS_CACHE:
         await get_all_models(
@@ -578,9 +602,23 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    MESSAGE_WRITE_BUFFER.flush_all()
+    LAST_ACTIVE_BUFFER.stop()
+
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    if hasattr(app.state, "config_update_listener"):
+        app.state.config_update_listener.cancel()
+
+    if hasattr(app.state, "file_status_listener"):
+        app.state.file_status_listener.cancel()
+
+    await INGESTION_QUEUE.stop()
+    SPEECH_CACHE.stop()
+
+    await HTTP_SESSION_POOL.close()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -627,6 +665,7 @@ if ENABLE_OTEL:
 app.state.config.ENABLE_OLLAMA_API = ENABLE_OLLAMA_API
 app.state.config.OLLAMA_BASE_URLS = OLLAMA_BASE_URLS
 app.state.config.OLLAMA_API_CONFIGS = OLLAMA_API_CONFIGS
+app.state.config.OLLAMA_LOAD_BALANCING_STRATEGY = OLLAMA_LOAD_BALANCING_STRATEGY
 
 app.state.OLLAMA_MODELS = {}
 
@@ -1279,6 +1318,8 @@ async def get_models(
     request: Request, refresh: bool = False, user=Depends(get_verified_user)
 ):
     def get_filtered_models(models, user):
+        user_group_ids = get_user_group_ids(user.id)
+
         filtered_models = []
         for model in models:
             if model.get("arena"):
@@ -1288,6 +1329,7 @@ async def get_models(
                     access_control=model.get("info", {})
                     .get("meta", {})
                     .get("access_control", {}),
+                    user_group_ids=user_group_ids,
                 ):
                     filtered_models.append(model)
                 continue
@@ -1298,7 +1340,10 @@ async def get_models(
                     (user.role == "admin" and BYPASS_ADMIN_ACCESS_CONTROL)
                     or user.id == model_info.user_id
                     or has_access(
-                        user.id, type="read", access_control=model_info.access_control
+                        user.id,
+                        type="read",
+                        access_control=model_info.access_control,
+                        user_group_ids=user_group_ids,
                     )
                 ):
                     filtered_models.append(model)
@@ -1847,12 +1892,24 @@ async def get_current_usage(user=Depends(get_verified_user)):
     This is an experimental endpoint and subject to change.
     """
     try:
-        return {"model_ids": get_models_in_use(), "user_ids": get_active_user_ids()}
+        return {
+            "model_ids": await get_models_in_use(),
+            "user_ids": await get_active_user_ids(),
+        }
     except Exception as e:
         log.error(f"Error getting usage statistics: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@app.get("/api/usage/connections")
+async def get_connection_pool_usage(user=Depends(get_admin_user)):
+    """
+    Get connection pool statistics of the upstream HTTP sessions, per origin.
+    This is an experimental endpoint and subject to change.
+    """
+    return HTTP_SESSION_POOL.get_stats()
+
+
 ############################
 # OAuth Login & Callback
 ############################
@@ -0,0 +1,145 @@
+"""Add chat_message table
+
+Revision ID: 43a4bb6b87c2
+Revises: 3af16a1c9fb6
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision: str = "43a4bb6b87c2"
+down_revision: Union[str, None] = "3af16a1c9fb6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+NORMALIZED_MESSAGE_FIELDS = {
+    "parentId": "parent_id",
+    "role": "role",
+    "content": "content",
+    "statusHistory": "status_history",
+    "sources": "sources",
+    "files": "files",
+}
+
+
+def message_to_columns(message: dict) -> dict:
+    # Mirrors open_webui.models.chat_messages.message_to_columns
+    values = {column: None for column in NORMALIZED_MESSAGE_FIELDS.values()}
+    data = {}
+
+    for key, value in message.items():
+        column = NORMALIZED_MESSAGE_FIELDS.get(key)
+        if column is None or value is None:
+            data[key] = value
+        elif column in ("parent_id", "role", "content") and not isinstance(value, str):
+            data[key] = value
+        elif column in ("status_history", "sources", "files") and not isinstance(
+            value, list
+        ):
+            data[key] = value
+        else:
+            values[column] = value
+
+    if isinstance(values["content"], str):
+        values["content"] = values["content"].replace("\x00", "")
+
+    values["data"] = data
+    return values
+
+
+def upgrade() -> None:
+    op.create_table(
+        "chat_message",
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("parent_id", sa.Text(), nullable=True),
+        sa.Column("role", sa.Text(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("status_history", sa.JSON(), nullable=True),
+        sa.Column("sources", sa.JSON(), nullable=True),
+        sa.Column("files", sa.JSON(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id"),
+    )
+
+    chat = table(
+        "chat",
+        column("id", sa.String()),
+        column("user_id", sa.String()),
+        column("chat", sa.JSON()),
+        column("updated_at", sa.BigInteger()),
+    )
+    chat_message = table(
+        "chat_message",
+        column("chat_id", sa.Text()),
+        column("id", sa.Text()),
+        column("parent_id", sa.Text()),
+        column("role", sa.Text()),
+        column("content", sa.Text()),
+        column("status_history", sa.JSON()),
+        column("sources", sa.JSON()),
+        column("files", sa.JSON()),
+        column("data", sa.JSON()),
+        column("created_at", sa.BigInteger()),
+        column("updated_at", sa.BigInteger()),
+    )
+
+    # Backfill one row per history message, paging through chats by id so that
+    # large installations never hold more than a batch of chat blobs in memory.
+    # Shared chats are snapshots and keep reading from the blob.
+    conn = op.get_bind()
+    last_id = ""
+    while True:
+        rows = conn.execute(
+            sa.select(chat.c.id, chat.c.chat, chat.c.updated_at)
+            .where(chat.c.id > last_id)
+            .where(sa.not_(chat.c.user_id.like("shared-%")))
+            .order_by(chat.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        values = []
+        for row in rows:
+            history = (row.chat or {}).get("history") or {}
+            messages = history.get("messages") or {}
+            if not isinstance(messages, dict):
+                continue
+
+            ts = row.updated_at or int(time.time())
+            for message_id, message in messages.items():
+                if not isinstance(message, dict):
+                    continue
+
+                created_at = message.get("timestamp")
+                values.append(
+                    {
+                        "chat_id": row.id,
+                        "id": message_id,
+                        **message_to_columns(message),
+                        "created_at": (
+                            created_at if isinstance(created_at, int) else ts
+                        ),
+                        "updated_at": ts,
+                    }
+                )
+
+        if values:
+            conn.execute(chat_message.insert(), values)
+
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_table("chat_message")
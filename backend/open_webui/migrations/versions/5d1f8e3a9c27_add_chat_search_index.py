@@ -0,0 +1,181 @@
+"""Add chat search index
+
+Revision ID: 5d1f8e3a9c27
+Revises: 3c7e9a1f2b5d
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "5d1f8e3a9c27"
+down_revision: Union[str, None] = "3c7e9a1f2b5d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+log = logging.getLogger(__name__)
+
+# SQLite: one FTS5 row per chat title and per message. chat_fts_map assigns
+# each (chat_id, message_id) a stable rowid, with '' as the message id of the
+# title row, so that triggers update single rows by rowid.
+SQLITE_UPGRADE = [
+    """
+    CREATE TABLE chat_fts_map (
+        rowid INTEGER PRIMARY KEY,
+        chat_id TEXT NOT NULL,
+        message_id TEXT NOT NULL,
+        UNIQUE (chat_id, message_id)
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE chat_fts USING fts5(
+        user_id, title, content, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    # Titles weigh ten times as much as message contents, user ids nothing
+    "INSERT INTO chat_fts (chat_fts, rank) VALUES ('rank', 'bm25(0.0, 10.0, 1.0)')",
+    "INSERT INTO chat_fts_map (chat_id, message_id) SELECT id, '' FROM chat",
+    "INSERT INTO chat_fts_map (chat_id, message_id) SELECT chat_id, id FROM chat_message",
+    """
+    INSERT INTO chat_fts (rowid, user_id, title, content)
+    SELECT m.rowid, c.user_id, COALESCE(c.title, ''), ''
+    FROM chat_fts_map m JOIN chat c ON c.id = m.chat_id
+    WHERE m.message_id = ''
+    """,
+    """
+    INSERT INTO chat_fts (rowid, user_id, title, content)
+    SELECT m.rowid, c.user_id, '', COALESCE(cm.content, '')
+    FROM chat_fts_map m
+    JOIN chat_message cm ON cm.chat_id = m.chat_id AND cm.id = m.message_id
+    JOIN chat c ON c.id = m.chat_id
+    """,
+    """
+    CREATE TRIGGER chat_fts_chat_insert AFTER INSERT ON chat BEGIN
+        INSERT OR IGNORE INTO chat_fts_map (chat_id, message_id) VALUES (NEW.id, '');
+        INSERT INTO chat_fts (rowid, user_id, title, content) VALUES (
+            (SELECT rowid FROM chat_fts_map WHERE chat_id = NEW.id AND message_id = ''),
+            NEW.user_id, COALESCE(NEW.title, ''), ''
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER chat_fts_chat_title_update AFTER UPDATE OF title ON chat BEGIN
+        UPDATE chat_fts SET title = COALESCE(NEW.title, '')
+        WHERE rowid = (
+            SELECT rowid FROM chat_fts_map WHERE chat_id = NEW.id AND message_id = ''
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER chat_fts_chat_user_update AFTER UPDATE OF user_id ON chat
+    WHEN NEW.user_id IS NOT OLD.user_id BEGIN
+        UPDATE chat_fts SET user_id = NEW.user_id
+        WHERE rowid IN (SELECT rowid FROM chat_fts_map WHERE chat_id = NEW.id);
+    END
+    """,
+    """
+    CREATE TRIGGER chat_fts_chat_delete AFTER DELETE ON chat BEGIN
+        DELETE FROM chat_fts
+        WHERE rowid IN (SELECT rowid FROM chat_fts_map WHERE chat_id = OLD.id);
+        DELETE FROM chat_fts_map WHERE chat_id = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER chat_fts_message_insert AFTER INSERT ON chat_message BEGIN
+        INSERT OR IGNORE INTO chat_fts_map (chat_id, message_id)
+        VALUES (NEW.chat_id, NEW.id);
+        INSERT INTO chat_fts (rowid, user_id, title, content)
+        SELECT (
+            SELECT rowid FROM chat_fts_map
+            WHERE chat_id = NEW.chat_id AND message_id = NEW.id
+        ), user_id, '', COALESCE(NEW.content, '')
+        FROM chat WHERE id = NEW.chat_id;
+    END
+    """,
+    """
+    CREATE TRIGGER chat_fts_message_update AFTER UPDATE OF content ON chat_message BEGIN
+        UPDATE chat_fts SET content = COALESCE(NEW.content, '')
+        WHERE rowid = (
+            SELECT rowid FROM chat_fts_map
+            WHERE chat_id = NEW.chat_id AND message_id = NEW.id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER chat_fts_message_delete AFTER DELETE ON chat_message BEGIN
+        DELETE FROM chat_fts
+        WHERE rowid = (
+            SELECT rowid FROM chat_fts_map
+            WHERE chat_id = OLD.chat_id AND message_id = OLD.id
+        );
+        DELETE FROM chat_fts_map WHERE chat_id = OLD.chat_id AND message_id = OLD.id;
+    END
+    """,
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS chat_fts_message_delete",
+    "DROP TRIGGER IF EXISTS chat_fts_message_update",
+    "DROP TRIGGER IF EXISTS chat_fts_message_insert",
+    "DROP TRIGGER IF EXISTS chat_fts_chat_delete",
+    "DROP TRIGGER IF EXISTS chat_fts_chat_user_update",
+    "DROP TRIGGER IF EXISTS chat_fts_chat_title_update",
+    "DROP TRIGGER IF EXISTS chat_fts_chat_insert",
+    "DROP TABLE IF EXISTS chat_fts",
+    "DROP TABLE IF EXISTS chat_fts_map",
+]
+
+# PostgreSQL: GIN indexes on the same expressions the search queries use
+POSTGRES_UPGRADE = [
+    """
+    CREATE INDEX chat_title_fts_idx ON chat
+    USING gin (to_tsvector('simple', COALESCE(title, '')))
+    """,
+    """
+    CREATE INDEX chat_message_content_fts_idx ON chat_message
+    USING gin (to_tsvector('simple', COALESCE(content, '')))
+    """,
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS chat_message_content_fts_idx",
+    "DROP INDEX IF EXISTS chat_title_fts_idx",
+]
+
+
+def upgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == "sqlite":
+        conn = op.get_bind()
+        try:
+            conn.exec_driver_sql(
+                "CREATE VIRTUAL TABLE chat_fts_probe USING fts5(content)"
+            )
+            conn.exec_driver_sql("DROP TABLE chat_fts_probe")
+        except Exception as e:
+            # Chat search falls back to scanning the chats
+            log.warning(
+                f"SQLite FTS5 is not available, skipping chat search index: {e}"
+            )
+            return
+
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect_name == "postgresql":
+        for statement in POSTGRES_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect_name == "postgresql":
+        for statement in POSTGRES_DOWNGRADE:
+            op.execute(statement)
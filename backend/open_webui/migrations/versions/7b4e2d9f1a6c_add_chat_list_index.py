@@ -0,0 +1,27 @@
+"""Add chat list index
+
+Revision ID: 7b4e2d9f1a6c
+Revises: 5d1f8e3a9c27
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "7b4e2d9f1a6c"
+down_revision: Union[str, None] = "5d1f8e3a9c27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # WHERE user_id = ... ORDER BY updated_at DESC, id DESC, seeking past a cursor
+    op.create_index(
+        "user_id_updated_at_id_idx", "chat", ["user_id", "updated_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("user_id_updated_at_id_idx", table_name="chat")
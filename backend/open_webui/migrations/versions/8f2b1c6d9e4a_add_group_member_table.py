@@ -0,0 +1,62 @@
+"""Add group_member table
+
+Revision ID: 8f2b1c6d9e4a
+Revises: 43a4bb6b87c2
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision: str = "8f2b1c6d9e4a"
+down_revision: Union[str, None] = "43a4bb6b87c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "group_member",
+        sa.Column("group_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("group_id", "user_id"),
+    )
+    op.create_index("group_member_user_id_idx", "group_member", ["user_id"])
+
+    group = table(
+        "group",
+        column("id", sa.Text()),
+        column("user_ids", sa.JSON()),
+    )
+    group_member = table(
+        "group_member",
+        column("group_id", sa.Text()),
+        column("user_id", sa.Text()),
+        column("created_at", sa.BigInteger()),
+    )
+
+    # Backfill the memberships from the JSON `user_ids` column
+    conn = op.get_bind()
+    now = int(time.time())
+    values = []
+    for row in conn.execute(sa.select(group.c.id, group.c.user_ids)).fetchall():
+        user_ids = row.user_ids if isinstance(row.user_ids, list) else []
+        for user_id in dict.fromkeys(user_ids):
+            if isinstance(user_id, str):
+                values.append(
+                    {"group_id": row.id, "user_id": user_id, "created_at": now}
+                )
+
+    if values:
+        conn.execute(group_member.insert(), values)
+
+
+def downgrade() -> None:
+    op.drop_index("group_member_user_id_idx", table_name="group_member")
+    op.drop_table("group_member")
@@ -0,0 +1,25 @@
+"""Add current_message_id to chat
+
+Revision ID: e1c5a8b3f4d2
+Revises: 7b4e2d9f1a6c
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "e1c5a8b3f4d2"
+down_revision: Union[str, None] = "7b4e2d9f1a6c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("chat", sa.Column("current_message_id", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("chat", "current_message_id")
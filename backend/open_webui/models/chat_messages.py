@@ -0,0 +1,245 @@
+import logging
+import time
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Text, JSON, PrimaryKeyConstraint
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# ChatMessage DB Schema
+####################
+
+# Message keys that are stored in dedicated columns, mapped to their column names.
+# Everything else in the message dict (model, timestamp, childrenIds, usage, ...)
+# is kept in the `data` JSON column.
+NORMALIZED_MESSAGE_FIELDS = {
+    "parentId": "parent_id",
+    "role": "role",
+    "content": "content",
+    "statusHistory": "status_history",
+    "sources": "sources",
+    "files": "files",
+}
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    chat_id = Column(Text, nullable=False)
+    id = Column(Text, nullable=False)
+
+    parent_id = Column(Text, nullable=True)
+    role = Column(Text, nullable=True)
+    content = Column(Text, nullable=True)
+
+    status_history = Column(JSON, nullable=True)
+    sources = Column(JSON, nullable=True)
+    files = Column(JSON, nullable=True)
+    data = Column(JSON, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+    __table_args__ = (PrimaryKeyConstraint("chat_id", "id"),)
+
+
+class ChatMessageModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    chat_id: str
+    id: str
+
+    parent_id: Optional[str] = None
+    role: Optional[str] = None
+    content: Optional[str] = None
+
+    status_history: Optional[list] = None
+    sources: Optional[list] = None
+    files: Optional[list] = None
+    data: Optional[dict] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+def message_to_columns(message: dict) -> dict:
+    """
+    Split a history message dict into column values. A normalized key is only
+    moved into its column when it holds a value of the column type, otherwise it
+    stays in `data` so that `columns_to_message` round-trips the dict unchanged.
+    """
+    values = {column: None for column in NORMALIZED_MESSAGE_FIELDS.values()}
+    data = {}
+
+    for key, value in message.items():
+        column = NORMALIZED_MESSAGE_FIELDS.get(key)
+        if column is None or value is None:
+            data[key] = value
+        elif column in ("parent_id", "role", "content") and not isinstance(value, str):
+            data[key] = value
+        elif column in ("status_history", "sources", "files") and not isinstance(
+            value, list
+        ):
+            data[key] = value
+        else:
+            values[column] = value
+
+    if isinstance(values["content"], str):
+        values["content"] = values["content"].replace("\x00", "")
+
+    values["data"] = data
+    return values
+
+
+def columns_to_message(row) -> dict:
+    message = {**(row.data or {})}
+    for key, column in NORMALIZED_MESSAGE_FIELDS.items():
+        value = getattr(row, column)
+        if value is not None:
+            message[key] = value
+    return message
+
+
+class ChatMessageTable:
+    def get_message_by_chat_id_and_id(self, chat_id: str, id: str) -> Optional[dict]:
+        with get_db() as db:
+            row = db.get(ChatMessage, (chat_id, id))
+            return columns_to_message(row) if row else None
+
+    def get_messages_by_chat_id(self, chat_id: str) -> dict:
+        with get_db() as db:
+            rows = (
+                db.query(ChatMessage)
+                .filter_by(chat_id=chat_id)
+                .order_by(ChatMessage.created_at.asc())
+                .all()
+            )
+            return {row.id: columns_to_message(row) for row in rows}
+
+    def get_messages_by_chat_ids(self, chat_ids: list[str]) -> dict[str, dict]:
+        if not chat_ids:
+            return {}
+
+        with get_db() as db:
+            rows = (
+                db.query(ChatMessage)
+                .filter(ChatMessage.chat_id.in_(chat_ids))
+                .order_by(ChatMessage.created_at.asc())
+                .all()
+            )
+
+            messages_by_chat_id = {}
+            for row in rows:
+                messages_by_chat_id.setdefault(row.chat_id, {})[row.id] = (
+                    columns_to_message(row)
+                )
+            return messages_by_chat_id
+
+    def has_messages_by_chat_id(self, chat_id: str) -> bool:
+        with get_db() as db:
+            return (
+                db.query(ChatMessage.id).filter_by(chat_id=chat_id).first() is not None
+            )
+
+    def upsert_message(
+        self, chat_id: str, id: str, message: dict, base: Optional[dict] = None
+    ) -> ChatMessageModel:
+        """
+        Merge `message` into the stored message (or into `base` when the message
+        has no row yet) and write back only this row.
+        """
+        with get_db() as db:
+            now = int(time.time())
+            row = db.get(ChatMessage, (chat_id, id))
+
+            if row:
+                values = message_to_columns({**columns_to_message(row), **message})
+                for column, value in values.items():
+                    setattr(row, column, value)
+                row.updated_at = now
+            else:
+                values = message_to_columns({**(base or {}), **message})
+                row = ChatMessage(
+                    chat_id=chat_id,
+                    id=id,
+                    **values,
+                    created_at=now,
+                    updated_at=now,
+                )
+                db.add(row)
+
+            db.commit()
+            db.refresh(row)
+            return ChatMessageModel.model_validate(row)
+
+    def add_message_status(
+        self, chat_id: str, id: str, status: dict
+    ) -> Optional[ChatMessageModel]:
+        with get_db() as db:
+            row = db.get(ChatMessage, (chat_id, id))
+            if row is None:
+                return None
+
+            row.status_history = [*(row.status_history or []), status]
+            row.updated_at = int(time.time())
+            db.commit()
+            db.refresh(row)
+            return ChatMessageModel.model_validate(row)
+
+    def sync_messages(self, db: Session, chat_id: str, messages: dict) -> None:
+        """
+        Bring the rows of a chat in line with a full `history.messages` map,
+        writing only the messages that were added, changed or removed. The
+        changes are left uncommitted in `db`, for the caller to commit together
+        with the chat itself.
+        """
+        now = int(time.time())
+        rows = {
+            row.id: row
+            for row in db.query(ChatMessage).filter_by(chat_id=chat_id).all()
+        }
+
+        for id, message in messages.items():
+            if not isinstance(message, dict):
+                continue
+
+            row = rows.pop(id, None)
+            if row is None:
+                db.add(
+                    ChatMessage(
+                        chat_id=chat_id,
+                        id=id,
+                        **message_to_columns(message),
+                        created_at=now,
+                        updated_at=now,
+                    )
+                )
+            elif columns_to_message(row) != message:
+                for column, value in message_to_columns(message).items():
+                    setattr(row, column, value)
+                row.updated_at = now
+
+        if rows:
+            db.query(ChatMessage).filter(
+                ChatMessage.chat_id == chat_id,
+                ChatMessage.id.in_(list(rows.keys())),
+            ).delete(synchronize_session=False)
+
+    def delete_messages_by_chat_id(self, chat_id: str) -> bool:
+        try:
+            with get_db() as db:
+                db.query(ChatMessage).filter_by(chat_id=chat_id).delete()
+                db.commit()
+                return True
+        except Exception:
+            return False
+
+
+ChatMessages = ChatMessageTable()
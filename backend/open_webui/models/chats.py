@@ -1,16 +1,23 @@
 import logging
 import json
+import re
 import time
 import uuid
-from typing import Optional
+from typing import Iterator, Optional
 
 from open_webui.internal.db import Base, get_db
+from open_webui.models.chat_messages import (
+    ChatMessage,
+    ChatMessageModel,
+    ChatMessages,
+    message_to_columns,
+)
 from open_webui.models.tags import TagModel, Tag, Tags
 from open_webui.models.folders import Folders
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import CHAT_NDJSON_BATCH_SIZE, SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON, Index
+from sqlalchemy import BigInteger, Boolean, Column, Float, String, Text, JSON, Index
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 from sqlalchemy.sql.expression import bindparam
@@ -41,6 +48,10 @@ class Chat(Base):
     meta = Column(JSON, server_default="{}")
     folder_id = Column(Text, nullable=True)
 
+    # Id of the last message upserted on its own, which is newer than the
+    # `history.currentId` of the blob until the next full save
+    current_message_id = Column(Text, nullable=True)
+
     __table_args__ = (
         # Performance indexes for common queries
         # WHERE folder_id = ...
@@ -53,6 +64,8 @@ class Chat(Base):
         Index("updated_at_user_id_idx", "updated_at", "user_id"),
         # WHERE folder_id = ... AND user_id = ...
         Index("folder_id_user_id_idx", "folder_id", "user_id"),
+        # WHERE user_id = ... ORDER BY updated_at DESC, id DESC, seeking past a cursor
+        Index("user_id_updated_at_id_idx", "user_id", "updated_at", "id"),
     )
 
 
@@ -74,6 +87,8 @@ class ChatModel(BaseModel):
     meta: dict = {}
     folder_id: Optional[str] = None
 
+    current_message_id: Optional[str] = None
+
 
 ####################
 # Forms
@@ -116,13 +131,191 @@ class ChatResponse(BaseModel):
 
 
 class ChatTitleIdResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     title: str
     updated_at: int
     created_at: int
 
 
+class ChatSearchResultModel(ChatModel):
+    # Best matching message excerpt, with matches wrapped in <mark> tags
+    snippet: Optional[str] = None
+
+
+class ChatSearchResponse(ChatTitleIdResponse):
+    snippet: Optional[str] = None
+
+
+# Ranked chat ids matching a full-text query, best first. Titles weigh more than
+# message contents; see the add_chat_search_index migration for the indexes.
+SQLITE_SEARCH_SQL = """
+    SELECT chat_fts_map.chat_id AS chat_id, -MIN(chat_fts.rank) AS score
+    FROM chat_fts JOIN chat_fts_map ON chat_fts_map.rowid = chat_fts.rowid
+    WHERE chat_fts MATCH :query
+    GROUP BY chat_fts_map.chat_id
+"""
+
+SQLITE_SNIPPET_SQL = """
+    SELECT chat_fts_map.chat_id AS chat_id,
+        snippet(chat_fts, 2, '<mark>', '</mark>', '…', 16) AS snippet
+    FROM chat_fts JOIN chat_fts_map ON chat_fts_map.rowid = chat_fts.rowid
+    WHERE chat_fts MATCH :query
+        AND chat_fts_map.message_id != ''
+        AND chat_fts_map.chat_id IN :chat_ids
+    ORDER BY chat_fts.rank
+"""
+
+POSTGRES_SEARCH_SQL = """
+    SELECT chat_id, MAX(score) AS score FROM (
+        SELECT chat_message.chat_id AS chat_id,
+            ts_rank(to_tsvector('simple', COALESCE(chat_message.content, '')), q) AS score
+        FROM chat_message JOIN chat ON chat.id = chat_message.chat_id,
+            to_tsquery('simple', :query) AS q
+        WHERE chat.user_id = :user_id
+            AND to_tsvector('simple', COALESCE(chat_message.content, '')) @@ q
+        UNION ALL
+        SELECT chat.id AS chat_id,
+            10 * ts_rank(to_tsvector('simple', COALESCE(chat.title, '')), q) AS score
+        FROM chat, to_tsquery('simple', :query) AS q
+        WHERE chat.user_id = :user_id
+            AND to_tsvector('simple', COALESCE(chat.title, '')) @@ q
+    ) AS matches
+    GROUP BY chat_id
+"""
+
+POSTGRES_SNIPPET_SQL = """
+    SELECT DISTINCT ON (chat_message.chat_id) chat_message.chat_id AS chat_id,
+        ts_headline('simple', chat_message.content, q,
+            'StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8') AS snippet
+    FROM chat_message, to_tsquery('simple', :query) AS q
+    WHERE chat_message.chat_id IN :chat_ids
+        AND to_tsvector('simple', COALESCE(chat_message.content, '')) @@ q
+    ORDER BY chat_message.chat_id,
+        ts_rank(to_tsvector('simple', COALESCE(chat_message.content, '')), q) DESC
+"""
+
+
+def get_search_terms(search_text: str) -> list[str]:
+    """
+    Words of a search to match as prefixes through the full-text index. None
+    are returned when the search has other characters, e.g. "c++" or "a.b",
+    as the index can't represent them; such searches match as substrings.
+    """
+    words = search_text.lower().split()
+    if not all(re.fullmatch(r"\w+", word) for word in words):
+        return []
+    return words
+
+
 class ChatTable:
+    _has_sqlite_search_index: Optional[bool] = None
+
+    def _get_search_query(self, dialect_name: str, user_id: str, terms: list[str]):
+        """Full-text query matching chats with every term as a word prefix."""
+        if dialect_name == "sqlite":
+            prefixes = " ".join(f'"{term}"*' for term in terms)
+            user_id = user_id.replace('"', '""')
+            return f'user_id : "{user_id}" AND {{title content}} : ({prefixes})'
+        return " & ".join(f"{term}:*" for term in terms)
+
+    def _has_search_index(self, db) -> bool:
+        if db.bind.dialect.name == "postgresql":
+            return True
+
+        if self._has_sqlite_search_index is None:
+            # The index is skipped by the migration when FTS5 is unavailable
+            ChatTable._has_sqlite_search_index = (
+                db.execute(
+                    text(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chat_fts'"
+                    )
+                ).first()
+                is not None
+            )
+        return self._has_sqlite_search_index
+
+    def _get_search_snippets(
+        self, db, query: str, chat_ids: list[str]
+    ) -> dict[str, str]:
+        if not chat_ids:
+            return {}
+
+        sql = (
+            SQLITE_SNIPPET_SQL
+            if db.bind.dialect.name == "sqlite"
+            else POSTGRES_SNIPPET_SQL
+        )
+        snippets = {}
+        for chat_id, snippet in db.execute(
+            text(sql).bindparams(bindparam("chat_ids", expanding=True)),
+            {"query": query, "chat_ids": chat_ids},
+        ):
+            snippets.setdefault(chat_id, snippet)
+        return snippets
+
+    def _get_history_messages(self, chat: dict) -> dict:
+        messages = (chat.get("history") or {}).get("messages") or {}
+        return messages if isinstance(messages, dict) else {}
+
+    def _merge_chat_messages(
+        self, chat: ChatModel, messages: Optional[dict]
+    ) -> ChatModel:
+        """
+        Reassemble `chat.history` from the per-message rows. Rows take precedence
+        over the (possibly stale) copy in the chat blob, and a message upserted
+        after the last full save becomes the current message.
+        """
+        chat_data = {**chat.chat, "title": chat.title}
+
+        if messages:
+            history = {**(chat_data.get("history") or {})}
+            history["messages"] = {**self._get_history_messages(chat_data), **messages}
+            if chat.current_message_id in history["messages"]:
+                history["currentId"] = chat.current_message_id
+
+            chat_data["history"] = history
+
+        return chat.model_copy(update={"chat": chat_data})
+
+    def _to_chat_model(self, chat: Chat) -> ChatModel:
+        return self._merge_chat_messages(
+            ChatModel.model_validate(chat),
+            ChatMessages.get_messages_by_chat_id(chat.id),
+        )
+
+    def _to_chat_models(self, chats: list[Chat]) -> list[ChatModel]:
+        chats = [ChatModel.model_validate(chat) for chat in chats]
+        messages_by_chat_id = ChatMessages.get_messages_by_chat_ids(
+            [chat.id for chat in chats]
+        )
+        return [
+            self._merge_chat_messages(chat, messages_by_chat_id.get(chat.id))
+            for chat in chats
+        ]
+
+    def _get_title_id_query(self, db, before: Optional[tuple[int, str]] = None):
+        """
+        Query only the columns of `ChatTitleIdResponse`, so that listing chats
+        never reads their histories. `before` is the `(updated_at, id)` of the
+        last chat of the previous page, newest first: the next page seeks past
+        it through the index instead of skipping all the chats before it.
+        """
+        query = db.query(Chat.id, Chat.title, Chat.updated_at, Chat.created_at)
+        if before is not None:
+            updated_at, id = before
+            query = query.filter(
+                or_(
+                    Chat.updated_at < updated_at,
+                    and_(Chat.updated_at == updated_at, Chat.id < id),
+                )
+            )
+        return query
+
+    def _to_title_id_responses(self, rows) -> list[ChatTitleIdResponse]:
+        return [ChatTitleIdResponse.model_validate(row) for row in rows]
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -144,6 +337,10 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            db.flush()
+            ChatMessages.sync_messages(
+                db, id, self._get_history_messages(form_data.chat)
+            )
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
@@ -151,39 +348,86 @@ class ChatTable:
     def import_chat(
         self, user_id: str, form_data: ChatImportForm
     ) -> Optional[ChatModel]:
+        chats = self.import_chats(user_id, [form_data])
+        return chats[0] if chats else None
+
+    def import_chats(
+        self, user_id: str, forms: list[ChatImportForm]
+    ) -> list[ChatModel]:
+        """
+        Insert a batch of imported chats and their messages in one transaction.
+        """
         with get_db() as db:
-            id = str(uuid.uuid4())
-            chat = ChatModel(
-                **{
-                    "id": id,
-                    "user_id": user_id,
-                    "title": (
-                        form_data.chat["title"]
-                        if "title" in form_data.chat
-                        else "New Chat"
-                    ),
-                    "chat": form_data.chat,
-                    "meta": form_data.meta,
-                    "pinned": form_data.pinned,
-                    "folder_id": form_data.folder_id,
-                    "created_at": (
-                        form_data.created_at
-                        if form_data.created_at
-                        else int(time.time())
-                    ),
-                    "updated_at": (
-                        form_data.updated_at
-                        if form_data.updated_at
-                        else int(time.time())
-                    ),
-                }
-            )
+            now = int(time.time())
+            chats = []
+            messages = []
+            for form_data in forms:
+                chat = ChatModel(
+                    **{
+                        "id": str(uuid.uuid4()),
+                        "user_id": user_id,
+                        "title": (
+                            form_data.chat["title"]
+                            if "title" in form_data.chat
+                            else "New Chat"
+                        ),
+                        "chat": form_data.chat,
+                        "meta": form_data.meta or {},
+                        "pinned": form_data.pinned,
+                        "folder_id": form_data.folder_id,
+                        "created_at": (
+                            form_data.created_at if form_data.created_at else now
+                        ),
+                        "updated_at": (
+                            form_data.updated_at if form_data.updated_at else now
+                        ),
+                    }
+                )
+                chats.append(chat)
+                messages.extend(
+                    ChatMessage(
+                        chat_id=chat.id,
+                        id=id,
+                        **message_to_columns(message),
+                        created_at=now,
+                        updated_at=now,
+                    )
+                    for id, message in self._get_history_messages(
+                        form_data.chat
+                    ).items()
+                    if isinstance(message, dict)
+                )
 
-            result = Chat(**chat.model_dump())
-            db.add(result)
+            # The chats are written first, as the search index triggers on
+            # messages read the user of their chat
+            db.add_all([Chat(**chat.model_dump()) for chat in chats])
+            db.flush()
+            db.add_all(messages)
             db.commit()
-            db.refresh(result)
-            return ChatModel.model_validate(result) if result else None
+            return chats
+
+    def iter_chats(
+        self,
+        user_id: Optional[str] = None,
+        archived: Optional[bool] = None,
+        batch_size: int = CHAT_NDJSON_BATCH_SIZE,
+    ) -> Iterator[list[ChatModel]]:
+        """
+        Yield the chats, of `user_id` or of all users, newest first, in batches
+        read through a server-side cursor, so that exporting any number of chats
+        only holds one batch in memory.
+        """
+        with get_db() as db:
+            query = select(Chat)
+            if user_id is not None:
+                query = query.where(Chat.user_id == user_id)
+            if archived is not None:
+                query = query.where(Chat.archived == archived)
+            query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+
+            result = db.execute(query.execution_options(yield_per=batch_size))
+            for chats in result.scalars().partitions():
+                yield self._to_chat_models(chats)
 
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
         try:
@@ -192,22 +436,33 @@ class ChatTable:
                 chat_item.chat = chat
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
                 chat_item.updated_at = int(time.time())
+                # The blob holds the whole history again
+                chat_item.current_message_id = None
+
+                # Written in the same transaction, so that the rows never
+                # diverge from the blob
+                ChatMessages.sync_messages(db, id, self._get_history_messages(chat))
                 db.commit()
                 db.refresh(chat_item)
-
                 return ChatModel.model_validate(chat_item)
-        except Exception:
+        except Exception as e:
+            log.exception(f"Error updating chat {id}: {e}")
             return None
 
     def update_chat_title_by_id(self, id: str, title: str) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
+        # Only the title column is written, the read path overlays it onto the blob.
+        try:
+            with get_db() as db:
+                result = (
+                    db.query(Chat)
+                    .filter_by(id=id)
+                    .update({"title": title, "updated_at": int(time.time())})
+                )
+                db.commit()
+        except Exception:
             return None
 
-        chat = chat.chat
-        chat["title"] = title
-
-        return self.update_chat_by_id(id, chat)
+        return self.get_chat_by_id(id) if result else None
 
     def update_chat_tags_by_id(
         self, id: str, tags: list[str], user
@@ -230,11 +485,12 @@ class ChatTable:
         return self.get_chat_by_id(id)
 
     def get_chat_title_by_id(self, id: str) -> Optional[str]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat = db.query(Chat.title).filter_by(id=id).first()
+            if chat is None:
+                return None
 
-        return chat.chat.get("title", "New Chat")
+            return chat.title or "New Chat"
 
     def get_messages_by_chat_id(self, id: str) -> Optional[dict]:
         chat = self.get_chat_by_id(id)
@@ -246,61 +502,71 @@ class ChatTable:
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
+        message = ChatMessages.get_message_by_chat_id_and_id(id, message_id)
+        if message is not None:
+            return message
+
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
 
         return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
 
+    def touch_chat_by_id(self, id: str) -> bool:
+        try:
+            with get_db() as db:
+                result = (
+                    db.query(Chat)
+                    .filter_by(id=id)
+                    .update({"updated_at": int(time.time())})
+                )
+                db.commit()
+                return bool(result)
+        except Exception:
+            return False
+
     def upsert_message_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
+    ) -> Optional[ChatMessageModel]:
+        try:
+            with get_db() as db:
+                result = (
+                    db.query(Chat)
+                    .filter_by(id=id)
+                    .update(
+                        {
+                            "updated_at": int(time.time()),
+                            "current_message_id": message_id,
+                        }
+                    )
+                )
+                db.commit()
+        except Exception:
             return None
 
-        # Sanitize message content for null characters before upserting
-        if isinstance(message.get("content"), str):
-            message["content"] = message["content"].replace("\x00", "")
-
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
+        if not result:
+            return None
 
-        history["currentId"] = message_id
+        base = None
+        if ChatMessages.get_message_by_chat_id_and_id(id, message_id) is None:
+            # Chats that have not been normalized yet (e.g. shared copies) still
+            # carry the message in the blob only.
+            base = self.get_message_by_id_and_message_id(id, message_id)
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return ChatMessages.upsert_message(id, message_id, message, base=base)
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
+    ) -> Optional[ChatMessageModel]:
+        if not self.touch_chat_by_id(id):
             return None
 
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
-
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return ChatMessages.add_message_status(id, message_id, status)
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
             # Get the existing chat to share
-            chat = db.get(Chat, chat_id)
+            chat = self._to_chat_model(db.get(Chat, chat_id))
             # Check if the chat is already shared
             if chat.share_id:
                 return self.get_chat_by_id_and_user_id(chat.share_id, "shared")
@@ -335,7 +601,7 @@ class ChatTable:
     def update_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
-                chat = db.get(Chat, chat_id)
+                chat = self._to_chat_model(db.get(Chat, chat_id))
                 shared_chat = (
                     db.query(Chat).filter_by(user_id=f"shared-{chat_id}").first()
                 )
@@ -375,7 +641,7 @@ class ChatTable:
                 chat.share_id = share_id
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -387,7 +653,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -399,7 +665,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -418,10 +684,12 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
+    ) -> list[ChatTitleIdResponse]:
 
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id, archived=True)
+            query = self._get_title_id_query(db).filter(
+                Chat.user_id == user_id, Chat.archived == True
+            )
 
             if filter:
                 query_key = filter.get("query")
@@ -446,8 +714,7 @@ class ChatTable:
             if limit:
                 query = query.limit(limit)
 
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_title_id_responses(query.all())
 
     def get_chat_list_by_user_id(
         self,
@@ -456,11 +723,12 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
+        before: Optional[tuple[int, str]] = None,
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
+            query = self._get_title_id_query(db, before).filter(Chat.user_id == user_id)
             if not include_archived:
-                query = query.filter_by(archived=False)
+                query = query.filter(Chat.archived == False)
 
             if filter:
                 query_key = filter.get("query")
@@ -471,22 +739,24 @@ class ChatTable:
                 direction = filter.get("direction")
 
                 if order_by and direction and getattr(Chat, order_by):
+                    if before is not None:
+                        raise ValueError("Cursors only apply to the default order")
+
                     if direction.lower() == "asc":
                         query = query.order_by(getattr(Chat, order_by).asc())
                     elif direction.lower() == "desc":
                         query = query.order_by(getattr(Chat, order_by).desc())
                     else:
                         raise ValueError("Invalid direction for ordering")
-            else:
-                query = query.order_by(Chat.updated_at.desc())
+
+            query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
 
             if skip:
                 query = query.offset(skip)
             if limit:
                 query = query.limit(limit)
 
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_title_id_responses(query.all())
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -494,56 +764,48 @@ class ChatTable:
         include_archived: bool = False,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        before: Optional[tuple[int, str]] = None,
     ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id).filter_by(folder_id=None)
+            query = self._get_title_id_query(db, before).filter(
+                Chat.user_id == user_id, Chat.folder_id == None
+            )
             query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
 
             if not include_archived:
-                query = query.filter_by(archived=False)
+                query = query.filter(Chat.archived == False)
 
-            query = query.order_by(Chat.updated_at.desc()).with_entities(
-                Chat.id, Chat.title, Chat.updated_at, Chat.created_at
-            )
+            query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
 
             if skip:
                 query = query.offset(skip)
             if limit:
                 query = query.limit(limit)
 
-            all_chats = query.all()
-
-            # result has to be destructured from sqlalchemy `row` and mapped to a dict since the `ChatModel`is not the returned dataclass.
-            return [
-                ChatTitleIdResponse.model_validate(
-                    {
-                        "id": chat[0],
-                        "title": chat[1],
-                        "updated_at": chat[2],
-                        "created_at": chat[3],
-                    }
-                )
-                for chat in all_chats
-            ]
+            return self._to_title_id_responses(query.all())
 
     def get_chat_list_by_chat_ids(
         self, chat_ids: list[str], skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            all_chats = (
-                db.query(Chat)
-                .filter(Chat.id.in_(chat_ids))
-                .filter_by(archived=False)
-                .order_by(Chat.updated_at.desc())
-                .all()
+            query = (
+                self._get_title_id_query(db)
+                .filter(Chat.id.in_(chat_ids), Chat.archived == False)
+                .order_by(Chat.updated_at.desc(), Chat.id.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+
+            if skip:
+                query = query.offset(skip)
+            if limit:
+                query = query.limit(limit)
+
+            return self._to_title_id_responses(query.all())
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -565,7 +827,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -576,7 +838,7 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats.all())
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -585,16 +847,20 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats.all())
 
-    def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
+    def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            all_chats = (
-                db.query(Chat)
-                .filter_by(user_id=user_id, pinned=True, archived=False)
-                .order_by(Chat.updated_at.desc())
+            query = (
+                self._get_title_id_query(db)
+                .filter(
+                    Chat.user_id == user_id,
+                    Chat.pinned == True,
+                    Chat.archived == False,
+                )
+                .order_by(Chat.updated_at.desc(), Chat.id.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_title_id_responses(query.all())
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -603,7 +869,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats.all())
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -612,9 +878,13 @@ class ChatTable:
         include_archived: bool = False,
         skip: int = 0,
         limit: int = 60,
-    ) -> list[ChatModel]:
+    ) -> list[ChatSearchResultModel | ChatTitleIdResponse]:
         """
-        Filters chats based on a search query using Python, allowing pagination using skip and limit.
+        Filters chats based on a search query, allowing pagination using skip and limit.
+        Words match titles and message contents as prefixes through the full-text
+        index, best matches first, with an excerpt of the best matching message.
+        Other text, or any text without the index, matches as a substring.
+        Without a query, only the titles and ids of the latest chats are listed.
         """
         search_text = search_text.replace("\u0000", "").lower().strip()
 
@@ -695,26 +965,50 @@ class ChatTable:
             if folder_ids:
                 query = query.filter(Chat.folder_id.in_(folder_ids))
 
-            query = query.order_by(Chat.updated_at.desc())
-
             # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
-            if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
-                sqlite_content_sql = (
-                    "EXISTS ("
-                    "    SELECT 1 "
-                    "    FROM json_each(Chat.chat, '$.messages') AS message "
-                    "    WHERE LOWER(message.value->>'content') LIKE '%' || :content_key || '%'"
-                    ")"
+
+            search_query = None
+            terms = get_search_terms(search_text)
+            if (
+                terms
+                and dialect_name in ("sqlite", "postgresql")
+                and self._has_search_index(db)
+            ):
+                search_query = self._get_search_query(dialect_name, user_id, terms)
+                ranked = (
+                    text(
+                        SQLITE_SEARCH_SQL
+                        if dialect_name == "sqlite"
+                        else POSTGRES_SEARCH_SQL
+                    )
+                    .bindparams(
+                        query=search_query,
+                        **({"user_id": user_id} if dialect_name != "sqlite" else {}),
+                    )
+                    .columns(chat_id=String, score=Float)
+                    .subquery("ranked")
                 )
-                sqlite_content_clause = text(sqlite_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")), sqlite_content_clause
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
+                query = query.join(ranked, ranked.c.chat_id == Chat.id).order_by(
+                    ranked.c.score.desc(), Chat.updated_at.desc()
                 )
+            else:
+                query = query.order_by(Chat.updated_at.desc())
 
+                if search_text:
+                    query = query.filter(
+                        or_(
+                            Chat.title.ilike(f"%{search_text}%"),
+                            exists().where(
+                                ChatMessage.chat_id == Chat.id,
+                                func.lower(ChatMessage.content).like(
+                                    f"%{search_text}%"
+                                ),
+                            ),
+                        )
+                    )
+
+            if dialect_name == "sqlite":
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
                     query = query.filter(
@@ -746,22 +1040,6 @@ class ChatTable:
                     )
 
             elif dialect_name == "postgresql":
-                # PostgreSQL relies on proper JSON query for search
-                postgres_content_sql = (
-                    "EXISTS ("
-                    "    SELECT 1 "
-                    "    FROM json_array_elements(Chat.chat->'messages') AS message "
-                    "    WHERE LOWER(message->>'content') LIKE '%' || :content_key || '%'"
-                    ")"
-                )
-                postgres_content_clause = text(postgres_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")),
-                        postgres_content_clause,
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
-                )
-
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
                     query = query.filter(
@@ -801,8 +1079,21 @@ class ChatTable:
 
             log.info(f"The number of chats: {len(all_chats)}")
 
+            snippets = (
+                self._get_search_snippets(
+                    db, search_query, [chat.id for chat in all_chats]
+                )
+                if search_query
+                else {}
+            )
+
             # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [
+                ChatSearchResultModel.model_validate(chat).model_copy(
+                    update={"snippet": snippets.get(chat.id)}
+                )
+                for chat in all_chats
+            ]
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
@@ -815,7 +1106,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -830,7 +1121,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -843,7 +1134,7 @@ class ChatTable:
                 chat.pinned = False
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -855,9 +1146,9 @@ class ChatTable:
 
     def get_chat_list_by_user_id_and_tag_name(
         self, user_id: str, tag_name: str, skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
+            query = self._get_title_id_query(db).filter(Chat.user_id == user_id)
             tag_id = tag_name.replace(" ", "_").lower()
 
             log.info(f"DB dialect name: {db.bind.dialect.name}")
@@ -882,7 +1173,7 @@ class ChatTable:
 
             all_chats = query.all()
             log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_title_id_responses(all_chats)
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -903,7 +1194,7 @@ class ChatTable:
 
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -980,6 +1271,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 db.query(Chat).filter_by(id=id).delete()
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -989,7 +1281,9 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                result = db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                if result:
+                    db.query(ChatMessage).filter_by(chat_id=id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -1001,6 +1295,11 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(Chat.user_id == user_id)
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
@@ -1013,6 +1312,13 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(
+                            Chat.user_id == user_id, Chat.folder_id == folder_id
+                        )
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
@@ -5,7 +5,7 @@ from typing import Optional
 from open_webui.internal.db import Base, JSONField, get_db
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, func
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -143,6 +143,24 @@ class FilesTable:
             except Exception:
                 return None
 
+    def get_file_status_by_id(self, id: str) -> Optional[dict]:
+        """Read the processing status without loading the extracted content."""
+        with get_db() as db:
+            try:
+                row = (
+                    db.query(
+                        File.data["status"].as_string(),
+                        File.data["error"].as_string(),
+                    )
+                    .filter_by(id=id)
+                    .first()
+                )
+                if row is None:
+                    return None
+                return {"status": row[0], "error": row[1]}
+            except Exception:
+                return None
+
     def get_files(self) -> list[FileModel]:
         with get_db() as db:
             return [FileModel.model_validate(file) for file in db.query(File).all()]
@@ -179,6 +197,71 @@ class FilesTable:
                 for file in db.query(File).filter_by(user_id=user_id).all()
             ]
 
+    def get_file_list(
+        self,
+        user_id: Optional[str] = None,
+        filename: Optional[str] = None,
+        content: bool = True,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> list[FileModel]:
+        """
+        List files, optionally only those of `user_id` and those whose name
+        matches the case-insensitive wildcard pattern `filename` (`*` and `?`).
+        Without `content`, `data` only holds the processing status and error,
+        and the extracted content is never read from the database.
+        """
+        with get_db() as db:
+            if content:
+                query = db.query(File)
+            else:
+                query = db.query(
+                    *[
+                        column
+                        for column in File.__table__.columns
+                        if column.name != "data"
+                    ],
+                    File.data["status"].as_string().label("status"),
+                    File.data["error"].as_string().label("error"),
+                )
+
+            if user_id:
+                query = query.filter(File.user_id == user_id)
+
+            if filename:
+                pattern = (
+                    filename.lower()
+                    .replace("\\", "\\\\")
+                    .replace("%", "\\%")
+                    .replace("_", "\\_")
+                    .replace("*", "%")
+                    .replace("?", "_")
+                )
+                query = query.filter(
+                    func.lower(File.filename).like(pattern, escape="\\")
+                )
+
+            query = query.order_by(File.created_at, File.id)
+            if skip:
+                query = query.offset(skip)
+            if limit:
+                query = query.limit(limit)
+
+            if content:
+                return [FileModel.model_validate(file) for file in query.all()]
+
+            files = []
+            for row in query.all():
+                file = row._asdict()
+                status, error = file.pop("status"), file.pop("error")
+                file["data"] = {
+                    key: value
+                    for key, value in (("status", status), ("error", error))
+                    if value is not None
+                }
+                files.append(FileModel.model_validate(file))
+            return files
+
     def update_file_hash_by_id(self, id: str, hash: str) -> Optional[FileModel]:
         with get_db() as db:
             try:
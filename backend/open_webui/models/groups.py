@@ -11,7 +11,7 @@ from open_webui.models.files import FileMetadataResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func
+from sqlalchemy import BigInteger, Column, Text, JSON, Index, PrimaryKeyConstraint
 
 
 log = logging.getLogger(__name__)
@@ -41,6 +41,22 @@ class Group(Base):
     updated_at = Column(BigInteger)
 
 
+class GroupMember(Base):
+    # Indexed copy of `group.user_ids` for membership lookups by user, kept in
+    # sync by every GroupTable method that writes `user_ids`.
+    __tablename__ = "group_member"
+
+    group_id = Column(Text, nullable=False)
+    user_id = Column(Text, nullable=False)
+
+    created_at = Column(BigInteger)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("group_id", "user_id"),
+        Index("group_member_user_id_idx", "user_id"),
+    )
+
+
 class GroupModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -91,6 +107,30 @@ class GroupUpdateForm(GroupForm, UserIdsForm):
     pass
 
 
+def set_group_member_ids(db, group_id: str, user_ids: Optional[list[str]]):
+    """Bring the `group_member` rows of a group in line with its `user_ids`."""
+    user_ids = set(user_ids or [])
+    existing_user_ids = {
+        user_id
+        for (user_id,) in db.query(GroupMember.user_id)
+        .filter_by(group_id=group_id)
+        .all()
+    }
+
+    removed_user_ids = existing_user_ids - user_ids
+    if removed_user_ids:
+        db.query(GroupMember).filter(
+            GroupMember.group_id == group_id,
+            GroupMember.user_id.in_(removed_user_ids),
+        ).delete(synchronize_session=False)
+
+    now = int(time.time())
+    db.add_all(
+        GroupMember(group_id=group_id, user_id=user_id, created_at=now)
+        for user_id in user_ids - existing_user_ids
+    )
+
+
 class GroupTable:
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
@@ -109,6 +149,7 @@ class GroupTable:
             try:
                 result = Group(**group.model_dump())
                 db.add(result)
+                set_group_member_ids(db, result.id, result.user_ids)
                 db.commit()
                 db.refresh(result)
                 if result:
@@ -131,16 +172,21 @@ class GroupTable:
             return [
                 GroupModel.model_validate(group)
                 for group in db.query(Group)
-                .filter(
-                    func.json_array_length(Group.user_ids) > 0
-                )  # Ensure array exists
-                .filter(
-                    Group.user_ids.cast(String).like(f'%"{user_id}"%')
-                )  # String-based check
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .filter(GroupMember.user_id == user_id)
                 .order_by(Group.updated_at.desc())
                 .all()
             ]
 
+    def get_group_ids_by_member_id(self, user_id: str) -> set[str]:
+        with get_db() as db:
+            return {
+                group_id
+                for (group_id,) in db.query(GroupMember.group_id)
+                .filter(GroupMember.user_id == user_id)
+                .all()
+            }
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -167,6 +213,8 @@ class GroupTable:
                         "updated_at": int(time.time()),
                     }
                 )
+                if form_data.user_ids is not None:
+                    set_group_member_ids(db, id, form_data.user_ids)
                 db.commit()
                 return self.get_group_by_id(id=id)
         except Exception as e:
@@ -177,6 +225,7 @@ class GroupTable:
         try:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
+                db.query(GroupMember).filter_by(group_id=id).delete()
                 db.commit()
                 return True
         except Exception:
@@ -186,6 +235,7 @@ class GroupTable:
         with get_db() as db:
             try:
                 db.query(Group).delete()
+                db.query(GroupMember).delete()
                 db.commit()
 
                 return True
@@ -205,7 +255,8 @@ class GroupTable:
                             "updated_at": int(time.time()),
                         }
                     )
-                    db.commit()
+                db.query(GroupMember).filter_by(user_id=user_id).delete()
+                db.commit()
 
                 return True
             except Exception:
@@ -261,17 +312,21 @@ class GroupTable:
                                 "updated_at": int(time.time()),
                             }
                         )
+                        db.query(GroupMember).filter_by(
+                            group_id=group.id, user_id=user_id
+                        ).delete()
 
                 # Add user to new groups
                 for group in groups:
-                    if user_id not in group.user_ids:
-                        group.user_ids.append(user_id)
+                    if user_id not in (group.user_ids or []):
+                        user_ids = [*(group.user_ids or []), user_id]
                         db.query(Group).filter_by(id=group.id).update(
                             {
-                                "user_ids": group.user_ids,
+                                "user_ids": user_ids,
                                 "updated_at": int(time.time()),
                             }
                         )
+                        set_group_member_ids(db, group.id, user_ids)
 
                 db.commit()
                 return True
@@ -300,6 +355,7 @@ class GroupTable:
 
                 group.user_ids = group_user_ids
                 group.updated_at = int(time.time())
+                set_group_member_ids(db, id, group_user_ids)
                 db.commit()
                 db.refresh(group)
                 return GroupModel.model_validate(group)
@@ -329,6 +385,7 @@ class GroupTable:
 
                 group.user_ids = group_user_ids
                 group.updated_at = int(time.time())
+                set_group_member_ids(db, id, group_user_ids)
 
                 db.commit()
                 db.refresh(group)
@@ -0,0 +1,239 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import JSON, BigInteger, Column, Index, Integer, Text, and_, func, or_
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# Ingestion Job DB Schema
+####################
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_job"
+
+    id = Column(Text, primary_key=True)
+    file_id = Column(Text, nullable=False)
+    user_id = Column(Text, nullable=False)
+
+    # queued, running, failed or cancelled; completed jobs are deleted
+    status = Column(Text, nullable=False)
+    priority = Column(Integer, nullable=False, default=0)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=1)
+
+    payload = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # A running job belongs to `worker_id` until `locked_until`, after which
+    # another worker may claim it again, e.g. when its instance was restarted
+    worker_id = Column(Text, nullable=True)
+    run_after = Column(BigInteger, nullable=False)
+    locked_until = Column(BigInteger, nullable=True)
+
+    created_at = Column(BigInteger, nullable=False)
+    updated_at = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index("ingestion_job_status_priority_idx", "status", "priority", "created_at"),
+        Index("ingestion_job_file_id_idx", "file_id"),
+    )
+
+
+class IngestionJobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    file_id: str
+    user_id: str
+
+    status: str
+    priority: int
+
+    attempts: int
+    max_attempts: int
+
+    payload: Optional[dict] = None
+    error: Optional[str] = None
+
+    worker_id: Optional[str] = None
+    run_after: int  # timestamp in epoch
+    locked_until: Optional[int] = None  # timestamp in epoch
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+def claimable(now: int):
+    return or_(
+        and_(IngestionJob.status == "queued", IngestionJob.run_after <= now),
+        and_(IngestionJob.status == "running", IngestionJob.locked_until < now),
+    )
+
+
+class IngestionJobTable:
+    def insert_new_job(
+        self,
+        file_id: str,
+        user_id: str,
+        priority: int = 0,
+        max_attempts: int = 1,
+        payload: Optional[dict] = None,
+    ) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            now = int(time.time())
+            job = IngestionJob(
+                id=str(uuid.uuid4()),
+                file_id=file_id,
+                user_id=user_id,
+                status="queued",
+                priority=priority,
+                attempts=0,
+                max_attempts=max(max_attempts, 1),
+                payload=payload,
+                run_after=now,
+                created_at=now,
+                updated_at=now,
+            )
+            try:
+                db.add(job)
+                db.commit()
+                db.refresh(job)
+                return IngestionJobModel.model_validate(job)
+            except Exception as e:
+                log.exception(f"Error inserting a new ingestion job: {e}")
+                return None
+
+    def claim_next_job(
+        self, worker_id: str, lease_timeout: int
+    ) -> Optional[IngestionJobModel]:
+        """
+        Claim the queued job with the highest priority, oldest first. The
+        claim is a conditional update, so concurrent workers, also on other
+        instances, never run the same job.
+        """
+        with get_db() as db:
+            for _ in range(3):
+                now = int(time.time())
+                candidate = (
+                    db.query(IngestionJob.id)
+                    .filter(claimable(now))
+                    .order_by(IngestionJob.priority.desc(), IngestionJob.created_at)
+                    .first()
+                )
+                if candidate is None:
+                    return None
+
+                claimed = (
+                    db.query(IngestionJob)
+                    .filter(IngestionJob.id == candidate.id, claimable(now))
+                    .update(
+                        {
+                            "status": "running",
+                            "worker_id": worker_id,
+                            "locked_until": now + lease_timeout,
+                            "attempts": IngestionJob.attempts + 1,
+                            "updated_at": now,
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+
+                if claimed:
+                    job = db.get(IngestionJob, candidate.id)
+                    db.refresh(job)
+                    return IngestionJobModel.model_validate(job)
+            return None
+
+    def renew_lease(self, id: str, worker_id: str, lease_timeout: int) -> bool:
+        with get_db() as db:
+            now = int(time.time())
+            renewed = (
+                db.query(IngestionJob)
+                .filter_by(id=id, worker_id=worker_id, status="running")
+                .update(
+                    {"locked_until": now + lease_timeout, "updated_at": now},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return bool(renewed)
+
+    def complete_job(self, id: str) -> bool:
+        with get_db() as db:
+            db.query(IngestionJob).filter_by(id=id).delete()
+            db.commit()
+            return True
+
+    def fail_job(
+        self, id: str, error: str, retry_delay: int, retry: bool = True
+    ) -> Optional[IngestionJobModel]:
+        """
+        Requeue the job after `retry_delay` seconds, or fail it once out of
+        attempts. With `retry=False` the job fails right away.
+        """
+        with get_db() as db:
+            job = db.get(IngestionJob, id)
+            if job is None:
+                return None
+
+            now = int(time.time())
+            if not retry:
+                job.attempts = max(job.attempts, job.max_attempts)
+
+            if job.attempts < job.max_attempts:
+                job.status = "queued"
+                job.run_after = now + retry_delay * 2 ** max(job.attempts - 1, 0)
+            else:
+                job.status = "failed"
+            job.error = error
+            job.worker_id = None
+            job.locked_until = None
+            job.updated_at = now
+            db.commit()
+            return IngestionJobModel.model_validate(job)
+
+    def cancel_queued_jobs_by_file_id(self, file_id: str) -> int:
+        with get_db() as db:
+            cancelled = (
+                db.query(IngestionJob)
+                .filter_by(file_id=file_id, status="queued")
+                .update(
+                    {"status": "cancelled", "updated_at": int(time.time())},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return cancelled
+
+    def get_job_counts(self) -> dict[str, int]:
+        with get_db() as db:
+            return dict(
+                db.query(IngestionJob.status, func.count(IngestionJob.id))
+                .group_by(IngestionJob.status)
+                .all()
+            )
+
+    def delete_jobs_by_file_id(self, file_id: str) -> bool:
+        with get_db() as db:
+            db.query(IngestionJob).filter_by(file_id=file_id).delete()
+            db.commit()
+            return True
+
+    def delete_all_jobs(self) -> bool:
+        with get_db() as db:
+            db.query(IngestionJob).delete()
+            db.commit()
+            return True
+
+
+IngestionJobs = IngestionJobTable()
@@ -5,11 +5,13 @@ from typing import Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
+from open_webui.models.users import User, UserNameResponse
 
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
 from sqlalchemy import or_, func, select, and_, text
+from sqlalchemy.orm import aliased
 from sqlalchemy.sql import exists
 
 ####################
@@ -94,6 +96,25 @@ class MessageResponse(MessageModel):
     reactions: list[Reactions]
 
 
+class MessageUserResponse(MessageResponse):
+    user: UserNameResponse
+
+
+def group_reactions(all_reactions) -> list[Reactions]:
+    reactions = {}
+    for reaction in all_reactions:
+        if reaction.name not in reactions:
+            reactions[reaction.name] = {
+                "name": reaction.name,
+                "user_ids": [],
+                "count": 0,
+            }
+        reactions[reaction.name]["user_ids"].append(reaction.user_id)
+        reactions[reaction.name]["count"] += 1
+
+    return [Reactions(**reaction) for reaction in reactions.values()]
+
+
 class MessageTable:
     def insert_new_message(
         self, form_data: MessageForm, channel_id: str, user_id: str
@@ -195,6 +216,126 @@ class MessageTable:
 
             return [MessageModel.model_validate(message) for message in all_messages]
 
+    def get_message_responses_by_channel_id(
+        self,
+        channel_id: str,
+        parent_id: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50,
+    ) -> list[MessageUserResponse]:
+        """
+        Page of channel messages (or of a thread's replies, followed by the
+        thread's parent message on its last page) with author, reply count,
+        latest reply timestamp and grouped reactions, in two queries.
+        """
+        with get_db() as db:
+            page_query = db.query(Message)
+            if parent_id is None:
+                page_query = page_query.filter(
+                    Message.channel_id == channel_id, Message.parent_id.is_(None)
+                )
+            else:
+                # The parent is older than all of its replies, so it sorts last
+                page_query = page_query.filter(
+                    or_(
+                        and_(
+                            Message.channel_id == channel_id,
+                            Message.parent_id == parent_id,
+                        ),
+                        Message.id == parent_id,
+                    )
+                )
+            page = (
+                page_query.order_by(Message.created_at.desc())
+                .offset(skip)
+                .limit(limit)
+                .subquery()
+            )
+            page_message = aliased(Message, page)
+
+            replies = (
+                select(
+                    Message.parent_id.label("parent_id"),
+                    func.count(Message.id).label("reply_count"),
+                    func.max(Message.created_at).label("latest_reply_at"),
+                )
+                .where(Message.parent_id.in_(select(page.c.id)))
+                .group_by(Message.parent_id)
+                .subquery()
+            )
+
+            rows = (
+                db.query(
+                    page_message,
+                    User.id,
+                    User.name,
+                    User.role,
+                    User.profile_image_url,
+                    replies.c.reply_count,
+                    replies.c.latest_reply_at,
+                )
+                # Messages of deleted users are kept, with a placeholder author
+                .outerjoin(User, User.id == page_message.user_id)
+                .outerjoin(replies, replies.c.parent_id == page_message.id)
+                .order_by(page_message.created_at.desc())
+                .all()
+            )
+            if not rows:
+                return []
+
+            all_reactions = (
+                db.query(MessageReaction)
+                .filter(MessageReaction.message_id.in_([row[0].id for row in rows]))
+                .order_by(MessageReaction.created_at)
+                .all()
+            )
+            reactions_by_message_id = {}
+            for reaction in all_reactions:
+                reactions_by_message_id.setdefault(reaction.message_id, []).append(
+                    reaction
+                )
+
+            messages = []
+            for (
+                message,
+                user_id,
+                user_name,
+                user_role,
+                user_profile_image_url,
+                reply_count,
+                latest_reply_at,
+            ) in rows:
+                # Thread listings have never reported reply counts
+                if parent_id is not None:
+                    reply_count, latest_reply_at = 0, None
+
+                messages.append(
+                    MessageUserResponse(
+                        **MessageModel.model_validate(message).model_dump(),
+                        reply_count=reply_count or 0,
+                        latest_reply_at=latest_reply_at,
+                        reactions=group_reactions(
+                            reactions_by_message_id.get(message.id, [])
+                        ),
+                        user=(
+                            UserNameResponse(
+                                id=user_id,
+                                name=user_name,
+                                role=user_role,
+                                profile_image_url=user_profile_image_url,
+                            )
+                            if user_id is not None
+                            else UserNameResponse(
+                                id=message.user_id,
+                                name="Deleted User",
+                                role="user",
+                                profile_image_url="/user.png",
+                            )
+                        ),
+                    )
+                )
+            return messages
+
     def update_message_by_id(
         self, id: str, form_data: MessageForm
     ) -> Optional[MessageModel]:
@@ -229,19 +370,7 @@ class MessageTable:
     def get_reactions_by_message_id(self, id: str) -> list[Reactions]:
         with get_db() as db:
             all_reactions = db.query(MessageReaction).filter_by(message_id=id).all()
-
-            reactions = {}
-            for reaction in all_reactions:
-                if reaction.name not in reactions:
-                    reactions[reaction.name] = {
-                        "name": reaction.name,
-                        "user_ids": [],
-                        "count": 0,
-                    }
-                reactions[reaction.name]["user_ids"].append(reaction.user_id)
-                reactions[reaction.name]["count"] += 1
-
-            return [Reactions(**reaction) for reaction in reactions.values()]
+            return group_reactions(all_reactions)
 
     def remove_reaction_by_id_and_user_id_and_name(
         self, id: str, user_id: str, name: str
@@ -69,6 +69,32 @@ class TagTable:
                 log.exception(f"Error inserting a new tag: {e}")
                 return None
 
+    def insert_new_tags(self, names: list[str], user_id: str) -> list[TagModel]:
+        """Insert the tags among `names` that the user does not have yet, at once."""
+        tags = {name.replace(" ", "_").lower(): name for name in names}
+        if not tags:
+            return []
+
+        with get_db() as db:
+            try:
+                existing_ids = {
+                    id
+                    for (id,) in db.query(Tag.id)
+                    .filter(Tag.id.in_(list(tags.keys())), Tag.user_id == user_id)
+                    .all()
+                }
+                results = [
+                    Tag(id=id, name=name, user_id=user_id)
+                    for id, name in tags.items()
+                    if id not in existing_ids
+                ]
+                db.add_all(results)
+                db.commit()
+                return [TagModel.model_validate(result) for result in results]
+            except Exception as e:
+                log.exception(f"Error inserting new tags: {e}")
+                return []
+
     def get_tag_by_name_and_user_id(
         self, name: str, user_id: str
     ) -> Optional[TagModel]:
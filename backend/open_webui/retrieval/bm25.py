@@ -0,0 +1,559 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+from filelock import FileLock
+from scipy import sparse
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from open_webui.config import (
+    RAG_BM25_INDEX_DIR,
+    RAG_BM25_INDEX_CACHE_SIZE,
+    RAG_BM25_INDEX_VALIDATION_TTL,
+)
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def tokenize(text: str) -> list[str]:
+    # Same preprocessing as langchain's BM25Retriever default
+    return text.split()
+
+
+class BM25Index:
+    """
+    Okapi BM25 index over the chunks of one collection, scored exactly like
+    `rank_bm25.BM25Okapi` (which backs langchain's `BM25Retriever`).
+
+    Term frequencies are kept in a sparse documents x terms matrix so that the
+    index can be updated in place and saved to / loaded from a single file.
+    `generation` identifies the saved file, and with it the log of the changes
+    made since (see `BM25IndexManager`).
+    """
+
+    k1 = 1.5
+    b = 0.75
+    epsilon = 0.25
+
+    def __init__(
+        self,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[dict],
+        vocabulary: list[str],
+        matrix: sparse.csr_matrix,
+        generation: str = "",
+    ):
+        self.generation = generation
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.vocabulary = vocabulary
+        self.term_ids = {term: idx for idx, term in enumerate(vocabulary)}
+        self.matrix = matrix
+        self._scoring = None
+
+    @classmethod
+    def from_texts(
+        cls, ids: list[str], texts: list[str], metadatas: list[dict]
+    ) -> "BM25Index":
+        index = cls([], [], [], [], sparse.csr_matrix((0, 0), dtype=np.int32))
+        index.add(ids, texts, metadatas)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def copy(self) -> "BM25Index":
+        # The matrix is never modified in place, only replaced
+        return BM25Index(
+            [*self.ids],
+            [*self.texts],
+            [*self.metadatas],
+            [*self.vocabulary],
+            self.matrix,
+            self.generation,
+        )
+
+    def add(self, ids: list[str], texts: list[str], metadatas: list[dict]):
+        """Add chunks, replacing any chunks that already have the same id."""
+        if not ids:
+            return
+        self.delete(ids=ids)
+
+        data, indices, indptr = [], [], [0]
+        for text in texts:
+            for term, count in Counter(tokenize(text)).items():
+                if term not in self.term_ids:
+                    self.term_ids[term] = len(self.vocabulary)
+                    self.vocabulary.append(term)
+                indices.append(self.term_ids[term])
+                data.append(count)
+            indptr.append(len(indices))
+
+        rows = sparse.csr_matrix(
+            (
+                np.array(data, dtype=np.int32),
+                np.array(indices, dtype=np.int32),
+                np.array(indptr, dtype=np.int64),
+            ),
+            shape=(len(texts), len(self.vocabulary)),
+        )
+        matrix = sparse.csr_matrix(
+            (self.matrix.data, self.matrix.indices, self.matrix.indptr),
+            shape=(self.matrix.shape[0], len(self.vocabulary)),
+        )
+        self.matrix = sparse.vstack([matrix, rows], format="csr")
+
+        self.ids.extend(ids)
+        self.texts.extend(texts)
+        self.metadatas.extend(metadatas)
+        self._scoring = None
+
+    def delete(self, ids: Optional[list[str]] = None, filter: Optional[dict] = None):
+        """Remove the chunks with the given ids or whose metadata matches `filter`."""
+        ids = set(ids or [])
+        keep = [
+            idx
+            for idx, (id, metadata) in enumerate(zip(self.ids, self.metadatas))
+            if not (
+                id in ids
+                or (
+                    filter
+                    and all((metadata or {}).get(k) == v for k, v in filter.items())
+                )
+            )
+        ]
+        if len(keep) == len(self.ids):
+            return
+
+        matrix = self.matrix[keep]
+
+        # Drop the terms that no longer occur in any chunk
+        used_terms = np.flatnonzero(np.diff(matrix.tocsc().indptr))
+        self.vocabulary = [self.vocabulary[idx] for idx in used_terms]
+        self.term_ids = {term: idx for idx, term in enumerate(self.vocabulary)}
+        self.matrix = matrix[:, used_terms].tocsr()
+
+        self.ids = [self.ids[idx] for idx in keep]
+        self.texts = [self.texts[idx] for idx in keep]
+        self.metadatas = [self.metadatas[idx] for idx in keep]
+        self._scoring = None
+
+    def apply(self, change: dict):
+        """Replay a change recorded by `BM25IndexManager` in the log."""
+        if change["op"] == "add":
+            self.add(change["ids"], change["texts"], change["metadatas"])
+        elif change["op"] == "delete":
+            self.delete(ids=change.get("ids"), filter=change.get("filter"))
+
+    def _get_scoring(self):
+        if self._scoring is None:
+            corpus_size = len(self.ids)
+            postings = self.matrix.tocsc()
+            postings.sort_indices()
+
+            doc_lengths = np.asarray(self.matrix.sum(axis=1), dtype=np.float64).ravel()
+            avgdl = doc_lengths.sum() / corpus_size or 1.0
+
+            doc_freqs = np.diff(postings.indptr)
+            idf = np.log(corpus_size - doc_freqs + 0.5) - np.log(doc_freqs + 0.5)
+            if len(idf):
+                idf[idf < 0] = self.epsilon * idf.mean()
+
+            self._scoring = (
+                postings,
+                idf,
+                self.k1 * (1 - self.b + self.b * doc_lengths / avgdl),
+            )
+        return self._scoring
+
+    def get_scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.ids))
+        if not self.ids:
+            return scores
+
+        postings, idf, length_norms = self._get_scoring()
+        for term in tokenize(query):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+
+            start, end = postings.indptr[term_id], postings.indptr[term_id + 1]
+            rows = postings.indices[start:end]
+            freqs = postings.data[start:end]
+            scores[rows] += idf[term_id] * (
+                freqs * (self.k1 + 1) / (freqs + length_norms[rows])
+            )
+        return scores
+
+    def search(self, query: str, k: int) -> list[Document]:
+        if not self.ids:
+            return []
+
+        scores = self.get_scores(query)
+        return [
+            Document(
+                page_content=self.texts[idx],
+                metadata={**(self.metadatas[idx] or {})},
+            )
+            for idx in np.argsort(scores)[::-1][:k]
+        ]
+
+    def save(self, path: str):
+        docs = json.dumps(
+            {
+                "ids": self.ids,
+                "texts": self.texts,
+                "metadatas": self.metadatas,
+                "vocabulary": self.vocabulary,
+                "generation": self.generation,
+            },
+            ensure_ascii=False,
+            default=str,
+        ).encode("utf-8")
+
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            data=self.matrix.data,
+            indices=self.matrix.indices,
+            indptr=self.matrix.indptr,
+            shape=np.array(self.matrix.shape),
+            docs=np.frombuffer(docs, dtype=np.uint8),
+        )
+
+        # Write to a temporary file and swap it in so readers never see a
+        # partially written index
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getbuffer())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as npz:
+            matrix = sparse.csr_matrix(
+                (npz["data"], npz["indices"], npz["indptr"]),
+                shape=tuple(npz["shape"]),
+            )
+            docs = json.loads(npz["docs"].tobytes().decode("utf-8"))
+
+        return cls(
+            docs["ids"],
+            docs["texts"],
+            docs["metadatas"],
+            docs["vocabulary"],
+            matrix,
+            docs.get("generation", ""),
+        )
+
+
+class BM25IndexRetriever(BaseRetriever):
+    index: Any
+    k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        return self.index.search(query, self.k)
+
+
+class BM25IndexManager:
+    """
+    Keeps the BM25 index of each collection in `directory` and the most
+    recently used indexes loaded in memory.
+
+    Indexes are built from the vector DB the first time a collection is
+    searched and are then kept up to date by mirroring the writes made to the
+    collection. Each index is stored as a snapshot file, `{name}.npz`, plus an
+    append-only log of the changes made since, `{name}.{generation}.log`, so
+    that a write appends one line instead of rewriting the whole index. Once
+    the log outgrows the snapshot, the two are compacted into a snapshot of a
+    new generation.
+
+    Writes are serialized with a file lock. A loaded index is keyed on the
+    identity of its snapshot file and on how much of the log it has applied,
+    so that the changes written by other workers are replayed onto it, and it
+    is reloaded once another worker compacted the index.
+
+    Instances that do not share `directory` do not see each other's writes, so
+    an index is checked against the vector DB once it was last checked more
+    than `validation_ttl` seconds ago, and rebuilt if they differ. A negative
+    `validation_ttl` turns the check off.
+    """
+
+    def __init__(self, directory: str, cache_size: int, validation_ttl: float = 300):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.validation_ttl = validation_ttl
+
+        # collection_name -> (index, snapshot file key, log offset applied)
+        self.cache: OrderedDict[str, tuple[BM25Index, tuple, int]] = OrderedDict()
+        # collection_name -> when its index was last checked against the vector DB
+        self.validated_at: dict[str, float] = {}
+        self.lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _get_name(self, collection_name: str) -> str:
+        return hashlib.sha256(collection_name.encode()).hexdigest()
+
+    def _get_path(self, collection_name: str) -> str:
+        return os.path.join(self.directory, f"{self._get_name(collection_name)}.npz")
+
+    def _get_log_path(self, collection_name: str, generation: str) -> str:
+        return os.path.join(
+            self.directory, f"{self._get_name(collection_name)}.{generation}.log"
+        )
+
+    def _get_file_lock(self, collection_name: str) -> FileLock:
+        return FileLock(f"{self._get_path(collection_name)}.lock")
+
+    def _get_file_key(self, collection_name: str) -> Optional[tuple]:
+        # A new snapshot is swapped in with os.replace, so it has a new inode
+        # even if its mtime falls within the same tick as the previous one
+        try:
+            stat = os.stat(self._get_path(collection_name))
+            return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return None
+
+    def _cache_put(
+        self, collection_name: str, index: BM25Index, file_key: tuple, offset: int
+    ):
+        with self.lock:
+            self.cache[collection_name] = (index, file_key, offset)
+            self.cache.move_to_end(collection_name)
+            while len(self.cache) > max(self.cache_size, 0):
+                evicted, _ = self.cache.popitem(last=False)
+                self.validated_at.pop(evicted, None)
+
+    def _cache_pop(self, collection_name: str):
+        with self.lock:
+            self.cache.pop(collection_name, None)
+            self.validated_at.pop(collection_name, None)
+
+    def _is_validated(self, collection_name: str) -> bool:
+        if self.validation_ttl < 0:
+            return True
+        with self.lock:
+            validated_at = self.validated_at.get(collection_name)
+        return (
+            validated_at is not None
+            and time.monotonic() - validated_at < self.validation_ttl
+        )
+
+    def _replay_log(self, collection_name: str, index: BM25Index, offset: int) -> int:
+        """Apply the changes logged after `offset` to `index`, return the new offset."""
+        try:
+            with open(self._get_log_path(collection_name, index.generation), "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return offset
+
+        # A line that is still being appended is left for the next read
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            index.apply(json.loads(line))
+        return offset + end
+
+    def _load(self, collection_name: str) -> Optional[BM25Index]:
+        """The current index of a collection, or None if it has not been built."""
+        file_key = self._get_file_key(collection_name)
+        if file_key is None:
+            self._cache_pop(collection_name)
+            return None
+
+        with self.lock:
+            cached = self.cache.get(collection_name)
+
+        if cached and cached[1] == file_key:
+            index, _, offset = cached
+            try:
+                log_size = os.path.getsize(
+                    self._get_log_path(collection_name, index.generation)
+                )
+            except FileNotFoundError:
+                log_size = 0
+
+            if log_size <= offset:
+                with self.lock:
+                    if collection_name in self.cache:
+                        self.cache.move_to_end(collection_name)
+                return index
+
+            # Searches may be running on the loaded index, update a copy
+            index = index.copy()
+        else:
+            index = BM25Index.load(self._get_path(collection_name))
+            offset = 0
+
+        offset = self._replay_log(collection_name, index, offset)
+        self._cache_put(collection_name, index, file_key, offset)
+        return index
+
+    def _save(self, collection_name: str, index: BM25Index):
+        """Write a snapshot of `index` and drop the logs of former snapshots."""
+        index.generation = uuid.uuid4().hex
+        index.save(self._get_path(collection_name))
+
+        prefix = f"{self._get_name(collection_name)}."
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(".log"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+        self._cache_put(collection_name, index, self._get_file_key(collection_name), 0)
+
+    def _append(self, collection_name: str, index: BM25Index, change: dict):
+        """Log a change already applied to `index`, compacting an oversized log."""
+        line = json.dumps(change, ensure_ascii=False, default=str).encode("utf-8")
+        with open(self._get_log_path(collection_name, index.generation), "ab") as f:
+            f.write(line + b"\n")
+            offset = f.tell()
+
+        if offset > os.path.getsize(self._get_path(collection_name)):
+            self._save(collection_name, index)
+        else:
+            self._cache_put(
+                collection_name, index, self._get_file_key(collection_name), offset
+            )
+
+    def get(self, collection_name: str) -> BM25Index:
+        try:
+            index = self._load(collection_name)
+            if index is not None and self._is_validated(collection_name):
+                return index
+        except Exception as e:
+            log.warning(f"Discarding unreadable BM25 index of {collection_name}: {e}")
+            self.delete_collection(collection_name)
+
+        with self._get_file_lock(collection_name):
+            index = self._load(collection_name)
+            if index is not None and self._is_validated(collection_name):
+                return index
+
+            result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+            ids = result.ids[0] if result and result.ids else []
+            texts = result.documents[0] if result and result.documents else []
+            metadatas = result.metadatas[0] if result and result.metadatas else []
+
+            if index is None or dict(zip(index.ids, index.texts)) != dict(
+                zip(ids, texts)
+            ):
+                if index is None:
+                    log.info(f"Building BM25 index for collection {collection_name}")
+                else:
+                    log.info(
+                        f"Rebuilding BM25 index for collection {collection_name}, "
+                        "it differs from the vector DB"
+                    )
+                index = BM25Index.from_texts(ids, texts, metadatas)
+                self._save(collection_name, index)
+
+            with self.lock:
+                self.validated_at[collection_name] = time.monotonic()
+            return index
+
+    def create(self, collection_name: str, items: list[dict]):
+        """Build the index of a collection that was just created from `items`."""
+        with self._get_file_lock(collection_name):
+            index = BM25Index.from_texts(
+                [item["id"] for item in items],
+                [item["text"] for item in items],
+                [item["metadata"] for item in items],
+            )
+            self._save(collection_name, index)
+
+        with self.lock:
+            self.validated_at[collection_name] = time.monotonic()
+
+    def add(self, collection_name: str, items: list[dict]):
+        """Mirror an insert or upsert into the collection's index, if it has one."""
+        with self._get_file_lock(collection_name):
+            index = self._load(collection_name)
+            if index is None:
+                return
+
+            change = {
+                "op": "add",
+                "ids": [item["id"] for item in items],
+                "texts": [item["text"] for item in items],
+                "metadatas": [item["metadata"] for item in items],
+            }
+
+            # Searches may be running on the loaded index, update a copy
+            index = index.copy()
+            index.apply(change)
+            self._append(collection_name, index, change)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        """Mirror a delete from the collection's index, if it has one."""
+        if not ids and not filter:
+            return self.delete_collection(collection_name)
+
+        with self._get_file_lock(collection_name):
+            index = self._load(collection_name)
+            if index is None:
+                return
+
+            change = {"op": "delete", "ids": ids, "filter": filter}
+
+            index = index.copy()
+            size = len(index)
+            index.apply(change)
+            if len(index) < size:
+                self._append(collection_name, index, change)
+
+    def delete_collection(self, collection_name: str):
+        with self._get_file_lock(collection_name):
+            prefix = f"{self._get_name(collection_name)}."
+            for name in os.listdir(self.directory):
+                if name.startswith(prefix) and name.endswith((".npz", ".log")):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass
+            self._cache_pop(collection_name)
+
+    def reset(self):
+        with self.lock:
+            self.cache.clear()
+
+        for name in os.listdir(self.directory):
+            if name.endswith((".npz", ".log")):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+
+BM25_INDEXES = BM25IndexManager(
+    RAG_BM25_INDEX_DIR, RAG_BM25_INDEX_CACHE_SIZE, RAG_BM25_INDEX_VALIDATION_TTL
+)
@@ -1,10 +1,10 @@
-import requests
 import logging, os
 from typing import Iterator, List, Union
 
 from langchain_core.document_loaders import BaseLoader
 from langchain_core.documents import Document
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.http_pool import HTTP_SESSION_POOL
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -46,7 +46,9 @@ class ExternalDocumentLoader(BaseLoader):
             url = url[:-1]
 
         try:
-            response = requests.put(f"{url}/process", data=data, headers=headers)
+            response = HTTP_SESSION_POOL.get_sync_session(url).put(
+                f"{url}/process", data=data, headers=headers
+            )
         except Exception as e:
             log.error(f"Error connecting to endpoint: {e}")
             raise Exception(f"Error connecting to endpoint: {e}")
@@ -1,10 +1,10 @@
-import requests
 import logging
 from typing import Iterator, List, Union
 
 from langchain_core.document_loaders import BaseLoader
 from langchain_core.documents import Document
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.http_pool import HTTP_SESSION_POOL
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -29,7 +29,7 @@ class ExternalWebLoader(BaseLoader):
         for i in range(0, len(self.urls), batch_size):
             urls = self.urls[i : i + batch_size]
             try:
-                response = requests.post(
+                response = HTTP_SESSION_POOL.get_sync_session(self.external_url).post(
                     self.external_url,
                     headers={
                         "User-Agent": "Open WebUI (https://github.com/open-webui/open-webui) External Web Loader",
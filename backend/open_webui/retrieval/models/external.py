@@ -1,11 +1,11 @@
 import logging
-import requests
 from typing import Optional, List, Tuple
 from urllib.parse import quote
 
 
 from open_webui.env import ENABLE_FORWARD_USER_INFO_HEADERS, SRC_LOG_LEVELS
 from open_webui.retrieval.models.base_reranker import BaseReranker
+from open_webui.utils.http_pool import HTTP_SESSION_POOL
 
 
 log = logging.getLogger(__name__)
@@ -40,7 +40,7 @@ class ExternalReranker(BaseReranker):
             log.info(f"ExternalReranker:predict:model {self.model}")
             log.info(f"ExternalReranker:predict:query {query}")
 
-            r = requests.post(
+            r = HTTP_SESSION_POOL.get_sync_session(self.url).post(
                 f"{self.url}",
                 headers={
                     "Content-Type": "application/json",
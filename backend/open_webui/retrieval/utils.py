@@ -2,7 +2,7 @@ import logging
 import os
 from typing import Optional, Union
 
-import requests
+import numpy as np
 import hashlib
 from concurrent.futures import ThreadPoolExecutor
 import time
@@ -10,11 +10,11 @@ import time
 from urllib.parse import quote
 from huggingface_hub import snapshot_download
 from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEXES, BM25IndexRetriever
 
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
@@ -23,6 +23,7 @@ from open_webui.models.notes import Notes
 
 from open_webui.retrieval.vector.main import GetResult
 from open_webui.utils.access_control import has_access
+from open_webui.utils.http_pool import HTTP_SESSION_POOL
 
 
 from open_webui.env import (
@@ -51,22 +52,39 @@ class VectorSearchRetriever(BaseRetriever):
     embedding_function: Any
     top_k: int
 
+    # Precomputed query embedding, and a map from page content to the stored
+    # vector of each result that is filled for `RerankCompressor` to reuse
+    # (typed Any so that pydantic keeps the shared dict instead of a copy)
+    query_embedding: Optional[list] = None
+    document_vectors: Any = None
+
     def _get_relevant_documents(
         self,
         query: str,
         *,
         run_manager: CallbackManagerForRetrieverRun,
     ) -> list[Document]:
+        query_embedding = self.query_embedding
+        if query_embedding is None:
+            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
+
         result = VECTOR_DB_CLIENT.search(
             collection_name=self.collection_name,
-            vectors=[self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)],
+            vectors=[query_embedding],
             limit=self.top_k,
+            include_vectors=self.document_vectors is not None,
         )
 
         ids = result.ids[0]
         metadatas = result.metadatas[0]
         documents = result.documents[0]
 
+        if self.document_vectors is not None and result.vectors:
+            for document, vector in zip(documents, result.vectors[0]):
+                vector = fit_vector_length(vector, len(query_embedding))
+                if vector is not None:
+                    self.document_vectors[document] = vector
+
         results = []
         for idx in range(len(ids)):
             results.append(
@@ -78,6 +96,29 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+def fit_vector_length(vector: Optional[list], length: int) -> Optional[list]:
+    """
+    Strip the zero padding some vector DBs add to stored vectors. Returns None
+    for vectors that cannot be compared with a `length` dimensional embedding.
+    """
+    if not vector or len(vector) < length:
+        return None
+    if len(vector) > length and any(vector[length:]):
+        return None
+    return vector[:length]
+
+
+def get_cosine_similarities(query_vector: list, vectors: list[list]) -> np.ndarray:
+    if not len(vectors):
+        return np.zeros(0)
+
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    vectors = np.asarray(vectors, dtype=np.float32)
+
+    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector)
+    return (vectors @ query_vector) / np.maximum(norms, 1e-12)
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -114,7 +155,6 @@ def get_doc(collection_name: str, user: UserModel = None):
 
 def query_doc_with_hybrid_search(
     collection_name: str,
-    collection_result: GetResult,
     query: str,
     embedding_function,
     k: int,
@@ -124,23 +164,30 @@ def query_doc_with_hybrid_search(
     hybrid_bm25_weight: float,
 ) -> dict:
     try:
-        if not collection_result.documents[0]:
-            log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
-            return {"documents": [], "metadatas": [], "distances": []}
+        # Embed the query once for the vector search and for rescoring, and
+        # keep the stored vectors of the vector search results so that they
+        # are not embedded again by the compressor
+        query_embedding = None
+        if hybrid_bm25_weight < 1 or reranking_function is None:
+            query_embedding = embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
+        document_vectors = {} if reranking_function is None else None
 
         # BM_25 required only if weight is greater than 0
         if hybrid_bm25_weight > 0:
             log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
-            bm25_retriever = BM25Retriever.from_texts(
-                texts=collection_result.documents[0],
-                metadatas=collection_result.metadatas[0],
-            )
-            bm25_retriever.k = k
+            bm25_index = BM25_INDEXES.get(collection_name)
+            if len(bm25_index) == 0:
+                log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
+                return {"documents": [], "metadatas": [], "distances": []}
+
+            bm25_retriever = BM25IndexRetriever(index=bm25_index, k=k)
 
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
             embedding_function=embedding_function,
             top_k=k,
+            query_embedding=query_embedding,
+            document_vectors=document_vectors,
         )
 
         if hybrid_bm25_weight <= 0:
@@ -162,6 +209,8 @@ def query_doc_with_hybrid_search(
             top_n=k_reranker,
             reranking_function=reranking_function,
             r_score=r,
+            query_embedding=query_embedding,
+            document_vectors=document_vectors,
         )
 
         compression_retriever = ContextualCompressionRetriever(
@@ -340,25 +389,6 @@ def query_collection_with_hybrid_search(
 ) -> dict:
     results = []
     error = False
-    # Fetch collection data once per collection sequentially
-    # Avoid fetching the same data multiple times later
-    collection_results = {}
-    # Only retrieve entire collection if bm_25 calculation is required
-    if hybrid_bm25_weight > 0:
-        for collection_name in collection_names:
-            try:
-                log.debug(
-                    f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
-                )
-                collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                    collection_name=collection_name
-                )
-            except Exception as e:
-                log.exception(f"Failed to fetch collection {collection_name}: {e}")
-                collection_results[collection_name] = None
-    else:
-        for collection_name in collection_names:
-            collection_results[collection_name] = []
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
     )
@@ -367,7 +397,6 @@ def query_collection_with_hybrid_search(
         try:
             result = query_doc_with_hybrid_search(
                 collection_name=collection_name,
-                collection_result=collection_results[collection_name],
                 query=query,
                 embedding_function=embedding_function,
                 k=k,
@@ -381,14 +410,9 @@ def query_collection_with_hybrid_search(
             log.exception(f"Error when querying the collection with hybrid_search: {e}")
             return None, e
 
-    # Prepare tasks for all collections and queries
-    # Avoid running any tasks for collections that failed to fetch data (have assigned None)
-    tasks = [
-        (cn, q)
-        for cn in collection_names
-        if collection_results[cn] is not None
-        for q in queries
-    ]
+    # Prepare tasks for all collections and queries. BM25 indexes are loaded (or
+    # built once) on first use and shared between the queries of a collection.
+    tasks = [(cn, q) for cn in collection_names for q in queries]
 
     with ThreadPoolExecutor() as executor:
         future_results = [executor.submit(process_query, cn, q) for cn, q in tasks]
@@ -754,7 +778,7 @@ def generate_openai_batch_embeddings(
         if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
             json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
 
-        r = requests.post(
+        r = HTTP_SESSION_POOL.get_sync_session(url).post(
             f"{url}/embeddings",
             headers={
                 "Content-Type": "application/json",
@@ -803,7 +827,7 @@ def generate_azure_openai_batch_embeddings(
         url = f"{url}/openai/deployments/{model}/embeddings?api-version={version}"
 
         for _ in range(5):
-            r = requests.post(
+            r = HTTP_SESSION_POOL.get_sync_session(url).post(
                 url,
                 headers={
                     "Content-Type": "application/json",
@@ -853,7 +877,7 @@ def generate_ollama_batch_embeddings(
         if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
             json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
 
-        r = requests.post(
+        r = HTTP_SESSION_POOL.get_sync_session(url).post(
             f"{url}/api/embed",
             headers={
                 "Content-Type": "application/json",
@@ -944,6 +968,11 @@ class RerankCompressor(BaseDocumentCompressor):
     reranking_function: Any
     r_score: float
 
+    # Without a reranking function, documents are scored by cosine similarity
+    # using these vectors where available instead of embedding them again
+    query_embedding: Optional[list] = None
+    document_vectors: Any = None
+
     class Config:
         extra = "forbid"
         arbitrary_types_allowed = True
@@ -962,13 +991,30 @@ class RerankCompressor(BaseDocumentCompressor):
                 [(query, doc.page_content) for doc in documents]
             )
         else:
-            from sentence_transformers import util
+            query_embedding = self.query_embedding
+            if query_embedding is None:
+                query_embedding = self.embedding_function(
+                    query, RAG_EMBEDDING_QUERY_PREFIX
+                )
 
-            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
+            document_vectors = {**(self.document_vectors or {})}
+            missing = list(
+                dict.fromkeys(
+                    doc.page_content
+                    for doc in documents
+                    if doc.page_content not in document_vectors
+                )
+            )
+            if missing:
+                embeddings = self.embedding_function(
+                    missing, RAG_EMBEDDING_CONTENT_PREFIX
+                )
+                document_vectors.update(zip(missing, embeddings))
+
+            scores = get_cosine_similarities(
+                query_embedding,
+                [document_vectors[doc.page_content] for doc in documents],
             )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
 
         if scores is not None:
             docs_with_scores = list(
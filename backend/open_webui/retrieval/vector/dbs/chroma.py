@@ -71,15 +71,24 @@ class ChromaClient(VectorDBBase):
         return self.client.delete_collection(name=collection_name)
 
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
         try:
             collection = self.client.get_collection(name=collection_name)
             if collection:
+                include = ["metadatas", "documents", "distances"]
+                if include_vectors:
+                    include.append("embeddings")
+
                 result = collection.query(
                     query_embeddings=vectors,
                     n_results=limit,
+                    include=include,
                 )
 
                 # chromadb has cosine distance, 2 (worst) -> 0 (best). Re-odering to 0 -> 1
@@ -94,6 +103,14 @@ class ChromaClient(VectorDBBase):
                         "distances": distances,
                         "documents": result["documents"],
                         "metadatas": result["metadatas"],
+                        "vectors": (
+                            [
+                                [list(map(float, vector)) for vector in embeddings]
+                                for embeddings in result["embeddings"]
+                            ]
+                            if include_vectors and result.get("embeddings") is not None
+                            else None
+                        ),
                     }
                 )
             return None
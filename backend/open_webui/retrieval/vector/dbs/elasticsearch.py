@@ -85,18 +85,21 @@ class ElasticsearchClient(VectorDBBase):
         distances = []
         documents = []
         metadatas = []
+        vectors = []
 
         for hit in result["hits"]["hits"]:
             ids.append(hit["_id"])
             distances.append(hit["_score"])
             documents.append(hit["_source"].get("text"))
             metadatas.append(hit["_source"].get("metadata"))
+            vectors.append(hit["_source"].get("vector"))
 
         return SearchResult(
             ids=[ids],
             distances=[distances],
             documents=[documents],
             metadatas=[metadatas],
+            vectors=[vectors] if any(v is not None for v in vectors) else None,
         )
 
     # Status: works
@@ -153,11 +156,15 @@ class ElasticsearchClient(VectorDBBase):
 
     # Status: works
     def search(
-        self, collection_name: str, vectors: list[list[float]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         query = {
             "size": limit,
-            "_source": ["text", "metadata"],
+            "_source": ["text", "metadata"] + (["vector"] if include_vectors else []),
             "query": {
                 "script_score": {
                     "query": {
@@ -65,11 +65,13 @@ class MilvusClient(VectorDBBase):
         distances = []
         documents = []
         metadatas = []
+        vectors = []
         for match in result:
             _ids = []
             _distances = []
             _documents = []
             _metadatas = []
+            _vectors = []
             for item in match:
                 _ids.append(item.get("id"))
                 # normalize milvus score from [-1, 1] to [0, 1] range
@@ -78,16 +80,24 @@ class MilvusClient(VectorDBBase):
                 _distances.append(_dist)
                 _documents.append(item.get("entity", {}).get("data", {}).get("text"))
                 _metadatas.append(item.get("entity", {}).get("metadata"))
+                _vector = item.get("entity", {}).get("vector")
+                _vectors.append(list(map(float, _vector)) if _vector else None)
             ids.append(_ids)
             distances.append(_distances)
             documents.append(_documents)
             metadatas.append(_metadatas)
+            vectors.append(_vectors)
         return SearchResult(
             **{
                 "ids": ids,
                 "distances": distances,
                 "documents": documents,
                 "metadatas": metadatas,
+                "vectors": (
+                    vectors
+                    if any(v is not None for _vectors in vectors for v in _vectors)
+                    else None
+                ),
             }
         )
 
@@ -173,18 +183,26 @@ class MilvusClient(VectorDBBase):
         )
 
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
         collection_name = collection_name.replace("-", "_")
         # For some index types like IVF_FLAT, search params like nprobe can be set.
         # Example: search_params = {"nprobe": 10} if using IVF_FLAT
         # For simplicity, not adding configurable search_params here, but could be extended.
+        output_fields = ["data", "metadata"]
+        if include_vectors:
+            output_fields.append("vector")
+
         result = self.client.search(
             collection_name=f"{self.collection_prefix}_{collection_name}",
             data=vectors,
             limit=limit,
-            output_fields=["data", "metadata"],
+            output_fields=output_fields,
             # search_params=search_params # Potentially add later if needed
         )
         return self._result_to_search_result(result)
@@ -54,18 +54,21 @@ class OpenSearchClient(VectorDBBase):
         distances = []
         documents = []
         metadatas = []
+        vectors = []
 
         for hit in result["hits"]["hits"]:
             ids.append(hit["_id"])
             distances.append(hit["_score"])
             documents.append(hit["_source"].get("text"))
             metadatas.append(hit["_source"].get("metadata"))
+            vectors.append(hit["_source"].get("vector"))
 
         return SearchResult(
             ids=[ids],
             distances=[distances],
             documents=[documents],
             metadatas=[metadatas],
+            vectors=[vectors] if any(v is not None for v in vectors) else None,
         )
 
     def _create_index(self, collection_name: str, dimension: int):
@@ -113,7 +116,11 @@ class OpenSearchClient(VectorDBBase):
         self.client.indices.delete(index=self._get_index_name(collection_name))
 
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         try:
             if not self.has_collection(collection_name):
@@ -121,7 +128,8 @@ class OpenSearchClient(VectorDBBase):
 
             query = {
                 "size": limit,
-                "_source": ["text", "metadata"],
+                "_source": ["text", "metadata"]
+                + (["vector"] if include_vectors else []),
                 "query": {
                     "script_score": {
                         "query": {"match_all": {}},
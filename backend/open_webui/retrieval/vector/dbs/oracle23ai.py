@@ -523,7 +523,11 @@ class Oracle23aiClient(VectorDBBase):
                 raise
 
     def search(
-        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+        self,
+        collection_name: str,
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         """
         Search for similar vectors in the database.
@@ -534,6 +538,7 @@ class Oracle23aiClient(VectorDBBase):
             collection_name (str): Name of the collection to search
             vectors (List[List[Union[float, int]]]): Query vectors to find similar items for
             limit (int): Maximum number of results to return per query
+            include_vectors (bool): Whether to also return the stored vectors
 
         Returns:
             Optional[SearchResult]: Search results containing ids, distances, documents, and metadata
@@ -562,6 +567,7 @@ class Oracle23aiClient(VectorDBBase):
             distances = [[] for _ in range(num_queries)]
             documents = [[] for _ in range(num_queries)]
             metadatas = [[] for _ in range(num_queries)]
+            result_vectors = [[] for _ in range(num_queries)]
 
             with self.get_connection() as connection:
                 with connection.cursor() as cursor:
@@ -569,10 +575,11 @@ class Oracle23aiClient(VectorDBBase):
                         vector_blob = self._vector_to_blob(vector)
 
                         cursor.execute(
-                            """
+                            f"""
                             SELECT dc.id, dc.text, 
                                 JSON_SERIALIZE(dc.vmetadata RETURNING VARCHAR2(4096)) as vmetadata,
                                 VECTOR_DISTANCE(dc.vector, :query_vector, COSINE) as distance
+                                {", dc.vector" if include_vectors else ""}
                             FROM document_chunk dc
                             WHERE dc.collection_name = :collection_name
                             ORDER BY VECTOR_DISTANCE(dc.vector, :query_vector, COSINE)
@@ -602,13 +609,23 @@ class Oracle23aiClient(VectorDBBase):
                             )
                             metadatas[qid].append(self._json_to_metadata(metadata_str))
                             distances[qid].append(float(row[3]))
+                            if include_vectors:
+                                result_vectors[qid].append(
+                                    [float(x) for x in row[4]]
+                                    if row[4] is not None
+                                    else None
+                                )
 
             log.info(
                 f"Search completed. Found {sum(len(ids[i]) for i in range(num_queries))} total results."
             )
 
             return SearchResult(
-                ids=ids, distances=distances, documents=documents, metadatas=metadatas
+                ids=ids,
+                distances=distances,
+                documents=documents,
+                metadatas=metadatas,
+                vectors=result_vectors if include_vectors else None,
             )
 
         except Exception as e:
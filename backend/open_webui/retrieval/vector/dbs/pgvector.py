@@ -348,6 +348,7 @@ class PgvectorClient(VectorDBBase):
         collection_name: str,
         vectors: List[List[float]],
         limit: Optional[int] = None,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         try:
             if not vectors:
@@ -388,6 +389,8 @@ class PgvectorClient(VectorDBBase):
             else:
                 result_fields.append(DocumentChunk.text)
                 result_fields.append(DocumentChunk.vmetadata)
+            if include_vectors:
+                result_fields.append(DocumentChunk.vector)
             result_fields.append(
                 (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
                     "distance"
@@ -414,6 +417,7 @@ class PgvectorClient(VectorDBBase):
                     subq.c.text,
                     subq.c.vmetadata,
                     subq.c.distance,
+                    *([subq.c.vector] if include_vectors else []),
                 )
                 .select_from(query_vectors)
                 .join(subq, true())
@@ -427,6 +431,7 @@ class PgvectorClient(VectorDBBase):
             distances = [[] for _ in range(num_queries)]
             documents = [[] for _ in range(num_queries)]
             metadatas = [[] for _ in range(num_queries)]
+            result_vectors = [[] for _ in range(num_queries)]
 
             if not results:
                 return SearchResult(
@@ -444,10 +449,20 @@ class PgvectorClient(VectorDBBase):
                 distances[qid].append((2.0 - row.distance) / 2.0)
                 documents[qid].append(row.text)
                 metadatas[qid].append(row.vmetadata)
+                if include_vectors:
+                    result_vectors[qid].append(
+                        [float(x) for x in row.vector]
+                        if row.vector is not None
+                        else None
+                    )
 
             self.session.rollback()  # read-only transaction
             return SearchResult(
-                ids=ids, distances=distances, documents=documents, metadatas=metadatas
+                ids=ids,
+                distances=distances,
+                documents=documents,
+                metadatas=metadatas,
+                vectors=result_vectors if include_vectors else None,
             )
         except Exception as e:
             self.session.rollback()
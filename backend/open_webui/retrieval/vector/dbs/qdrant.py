@@ -147,7 +147,11 @@ class QdrantClient(VectorDBBase):
         )
 
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
         if limit is None:
@@ -157,6 +161,7 @@ class QdrantClient(VectorDBBase):
             collection_name=f"{self.collection_prefix}_{collection_name}",
             query=vectors[0],
             limit=limit,
+            with_vectors=include_vectors,
         )
         get_result = self._result_to_get_result(query_response.points)
         return SearchResult(
@@ -165,6 +170,16 @@ class QdrantClient(VectorDBBase):
             metadatas=get_result.metadatas,
             # qdrant distance is [-1, 1], normalize to [0, 1]
             distances=[[(point.score + 1.0) / 2.0 for point in query_response.points]],
+            vectors=(
+                [
+                    [
+                        point.vector if isinstance(point.vector, list) else None
+                        for point in query_response.points
+                    ]
+                ]
+                if include_vectors
+                else None
+            ),
         )
 
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
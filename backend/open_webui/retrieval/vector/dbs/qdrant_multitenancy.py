@@ -249,7 +249,11 @@ class QdrantClient(VectorDBBase):
         )
 
     def search(
-        self, collection_name: str, vectors: List[List[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: List[List[float | int]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         """
         Search for the nearest neighbor items based on the vectors with tenant isolation.
@@ -266,6 +270,7 @@ class QdrantClient(VectorDBBase):
             collection_name=mt_collection,
             query=vectors[0],
             limit=limit,
+            with_vectors=include_vectors,
             query_filter=models.Filter(must=[tenant_filter]),
         )
         get_result = self._result_to_get_result(query_response.points)
@@ -274,6 +279,16 @@ class QdrantClient(VectorDBBase):
             documents=get_result.documents,
             metadatas=get_result.metadatas,
             distances=[[(point.score + 1.0) / 2.0 for point in query_response.points]],
+            vectors=(
+                [
+                    [
+                        point.vector if isinstance(point.vector, list) else None
+                        for point in query_response.points
+                    ]
+                ]
+                if include_vectors
+                else None
+            ),
         )
 
     def query(
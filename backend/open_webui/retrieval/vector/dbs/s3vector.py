@@ -296,10 +296,16 @@ class S3VectorClient(VectorDBBase):
             raise
 
     def search(
-        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+        self,
+        collection_name: str,
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         """
         Search for similar vectors in a collection using multiple query vectors.
+        Stored vectors are not returned by the S3 Vectors query API, so
+        `include_vectors` is ignored.
         """
 
         if not self.has_collection(collection_name):
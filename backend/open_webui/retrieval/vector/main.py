@@ -14,6 +14,7 @@ class GetResult(BaseModel):
     ids: Optional[List[List[str]]]
     documents: Optional[List[List[str]]]
     metadatas: Optional[List[List[Any]]]
+    vectors: Optional[List[List[Optional[List[float | int]]]]] = None
 
 
 class SearchResult(GetResult):
@@ -53,9 +54,17 @@ class VectorDBBase(ABC):
 
     @abstractmethod
     def search(
-        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+        self,
+        collection_name: str,
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
-        """Search for similar vectors in a collection."""
+        """
+        Search for similar vectors in a collection. With `include_vectors`, the
+        stored vector of every result is returned in `vectors` where the backend
+        supports it.
+        """
         pass
 
     @abstractmethod
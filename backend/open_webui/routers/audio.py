@@ -2,10 +2,13 @@ import hashlib
 import json
 import logging
 import os
+import shutil
+import subprocess
+import tempfile
 import uuid
+from collections import deque
 from functools import lru_cache
 from pathlib import Path
-from pydub import AudioSegment
 from pydub.silence import split_on_silence
 from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
@@ -29,11 +32,12 @@ from fastapi import (
     APIRouter,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.speech_cache import SPEECH_CACHE
 from open_webui.config import (
     WHISPER_MODEL_AUTO_UPDATE,
     WHISPER_MODEL_DIR,
@@ -45,6 +49,8 @@ from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import (
     AIOHTTP_CLIENT_SESSION_SSL,
     AIOHTTP_CLIENT_TIMEOUT,
+    AUDIO_STT_SEGMENT_CONCURRENCY,
+    AUDIO_STT_SEGMENT_DURATION,
     ENV,
     SRC_LOG_LEVELS,
     DEVICE_TYPE,
@@ -63,9 +69,6 @@ AZURE_MAX_FILE_SIZE = AZURE_MAX_FILE_SIZE_MB * 1024 * 1024  # Convert MB to byte
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["AUDIO"])
 
-SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
-SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-
 
 ##########################################
 #
@@ -73,7 +76,6 @@ SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 #
 ##########################################
 
-from pydub import AudioSegment
 from pydub.utils import mediainfo
 
 
@@ -107,17 +109,85 @@ def is_audio_conversion_required(file_path):
         return False
 
 
-def convert_audio_to_mp3(file_path):
-    """Convert audio file to mp3 format."""
+def stream_audio_segments(
+    file_path,
+    output_dir,
+    max_bytes,
+    segment_duration=AUDIO_STT_SEGMENT_DURATION,
+    bitrate="32k",
+):
+    """
+    Split the audio of a file into mono 16 kHz mp3 segments of at most
+    `segment_duration` seconds and `max_bytes` with a single ffmpeg process,
+    yielding the path of each segment as soon as ffmpeg has written it. The
+    audio is never decoded in Python, so memory use does not grow with the
+    length of the recording.
+    """
+    bits_per_second = int(bitrate.rstrip("k")) * 1000
+    # Leave headroom for frame headers and bitrate variance of the encoder
+    max_duration = int(max_bytes * 8 / bits_per_second * 0.9)
+    segment_time = max(min(segment_duration, max_duration), 1)
+
+    # Errors go to a file rather than a pipe, which ffmpeg could fill and then
+    # block on while segments are still being read from stdout
+    stderr = tempfile.TemporaryFile(mode="w+")
+    process = subprocess.Popen(
+        [
+            "ffmpeg",
+            "-nostdin",
+            "-v",
+            "error",
+            "-i",
+            file_path,
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            "16000",
+            "-b:a",
+            bitrate,
+            "-f",
+            "segment",
+            "-segment_time",
+            str(segment_time),
+            "-reset_timestamps",
+            "1",
+            # ffmpeg prints the name of each segment once it is complete
+            "-segment_list",
+            "pipe:1",
+            "-segment_list_type",
+            "flat",
+            os.path.join(output_dir, "segment_%05d.mp3"),
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=stderr,
+        text=True,
+    )
+
     try:
-        output_path = os.path.splitext(file_path)[0] + ".mp3"
-        audio = AudioSegment.from_file(file_path)
-        audio.export(output_path, format="mp3")
-        log.info(f"Converted {file_path} to {output_path}")
-        return output_path
-    except Exception as e:
-        log.error(f"Error converting audio file: {e}")
-        return None
+        for line in process.stdout:
+            segment_path = os.path.join(output_dir, line.strip())
+            segment_size = os.path.getsize(segment_path)
+
+            if segment_size > max_bytes:
+                raise Exception("Audio chunk cannot be reduced below max file size.")
+
+            # A trailing segment can hold less than a frame of audio
+            if segment_size < 1024:
+                os.remove(segment_path)
+                continue
+
+            yield segment_path
+
+        if process.wait() != 0:
+            stderr.seek(0)
+            raise Exception(f"Error splitting audio: {stderr.read().strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        stderr.close()
 
 
 def set_faster_whisper_model(model: str, auto_update: bool = False):
@@ -314,12 +384,12 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         + str(request.app.state.config.TTS_MODEL).encode("utf-8")
     ).hexdigest()
 
-    file_path = SPEECH_CACHE_DIR.joinpath(f"{name}.mp3")
-    file_body_path = SPEECH_CACHE_DIR.joinpath(f"{name}.json")
+    file_path, file_body_path = SPEECH_CACHE.get_paths(name)
 
     # Check if the file already exists in the cache
-    if file_path.is_file():
-        return FileResponse(file_path)
+    cached_path = await SPEECH_CACHE.get(name)
+    if cached_path:
+        return FileResponse(cached_path)
 
     payload = None
     try:
@@ -365,6 +435,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                 async with aiofiles.open(file_body_path, "w") as f:
                     await f.write(json.dumps(payload))
 
+            await SPEECH_CACHE.put(name)
             return FileResponse(file_path)
 
         except Exception as e:
@@ -425,6 +496,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                     async with aiofiles.open(file_body_path, "w") as f:
                         await f.write(json.dumps(payload))
 
+            await SPEECH_CACHE.put(name)
             return FileResponse(file_path)
 
         except Exception as e:
@@ -484,6 +556,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                     async with aiofiles.open(file_body_path, "w") as f:
                         await f.write(json.dumps(payload))
 
+                    await SPEECH_CACHE.put(name)
                     return FileResponse(file_path)
 
         except Exception as e:
@@ -540,6 +613,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         async with aiofiles.open(file_body_path, "w") as f:
             await f.write(json.dumps(payload))
 
+        await SPEECH_CACHE.put(name)
         return FileResponse(file_path)
 
 
@@ -820,119 +894,108 @@ def transcription_handler(request, file_path, metadata):
             )
 
 
-def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None):
-    log.info(f"transcribe: {file_path} {metadata}")
-
-    if is_audio_conversion_required(file_path):
-        file_path = convert_audio_to_mp3(file_path)
-
-    try:
-        file_path = compress_audio(file_path)
-    except Exception as e:
-        log.exception(e)
-
-    # Always produce a list of chunk paths (could be one entry if small)
+def transcribe_segment(request, segment_path, metadata):
     try:
-        chunk_paths = split_audio(file_path, MAX_FILE_SIZE)
-        print(f"Chunk paths: {chunk_paths}")
-    except Exception as e:
-        log.exception(e)
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=ERROR_MESSAGES.DEFAULT(e),
-        )
-
-    results = []
-    try:
-        with ThreadPoolExecutor() as executor:
-            # Submit tasks for each chunk_path
-            futures = [
-                executor.submit(transcription_handler, request, chunk_path, metadata)
-                for chunk_path in chunk_paths
-            ]
-            # Gather results as they complete
-            for future in futures:
-                try:
-                    results.append(future.result())
-                except Exception as transcribe_exc:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail=f"Error transcribing chunk: {transcribe_exc}",
-                    )
+        return transcription_handler(request, segment_path, metadata)
     finally:
-        # Clean up only the temporary chunks, never the original file
-        for chunk_path in chunk_paths:
-            if chunk_path != file_path and os.path.isfile(chunk_path):
-                try:
-                    os.remove(chunk_path)
-                except Exception:
-                    pass
+        os.remove(segment_path)
 
-    return {
-        "text": " ".join([result["text"] for result in results]),
-    }
-
-
-def compress_audio(file_path):
-    if os.path.getsize(file_path) > MAX_FILE_SIZE:
-        id = os.path.splitext(os.path.basename(file_path))[
-            0
-        ]  # Handles names with multiple dots
-        file_dir = os.path.dirname(file_path)
 
-        audio = AudioSegment.from_file(file_path)
-        audio = audio.set_frame_rate(16000).set_channels(1)  # Compress audio
+def transcribe_segments(
+    request: Request, file_path: str, metadata: Optional[dict] = None
+):
+    """
+    Transcribe a file, yielding `{"index", "text"}` for each of its segments
+    in order, as soon as the segment and all the segments before it are
+    transcribed. Files that are too large or in an unsupported format are
+    split and converted with `stream_audio_segments`, and their segments are
+    transcribed while the rest of the file is still being split.
+    """
+    log.info(f"transcribe: {file_path} {metadata}")
 
-        compressed_path = os.path.join(file_dir, f"{id}_compressed.mp3")
-        audio.export(compressed_path, format="mp3", bitrate="32k")
-        # log.debug(f"Compressed audio to {compressed_path}")  # Uncomment if log is defined
+    if os.path.getsize(file_path) <= MAX_FILE_SIZE and not is_audio_conversion_required(
+        file_path
+    ):
+        yield {"index": 0, **transcription_handler(request, file_path, metadata)}
+        return
 
-        return compressed_path
-    else:
-        return file_path
+    id = os.path.splitext(os.path.basename(file_path))[0]
+    segment_dir = tempfile.mkdtemp(
+        prefix=f"{id}_segments_", dir=os.path.dirname(file_path)
+    )
+    executor = ThreadPoolExecutor(max_workers=AUDIO_STT_SEGMENT_CONCURRENCY)
+    futures = deque()
 
+    def result(future):
+        try:
+            return future.result()
+        except Exception as transcribe_exc:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error transcribing chunk: {transcribe_exc}",
+            )
 
-def split_audio(file_path, max_bytes, format="mp3", bitrate="32k"):
-    """
-    Splits audio into chunks not exceeding max_bytes.
-    Returns a list of chunk file paths. If audio fits, returns list with original path.
-    """
-    file_size = os.path.getsize(file_path)
-    if file_size <= max_bytes:
-        return [file_path]  # Nothing to split
+    try:
+        segments = stream_audio_segments(file_path, segment_dir, MAX_FILE_SIZE)
+        index = 0
+        while True:
+            try:
+                segment_path = next(segments, None)
+            except Exception as e:
+                log.exception(e)
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=ERROR_MESSAGES.DEFAULT(e),
+                )
+            if segment_path is None:
+                break
 
-    audio = AudioSegment.from_file(file_path)
-    duration_ms = len(audio)
-    orig_size = file_size
+            futures.append(
+                executor.submit(transcribe_segment, request, segment_path, metadata)
+            )
 
-    approx_chunk_ms = max(int(duration_ms * (max_bytes / orig_size)) - 1000, 1000)
-    chunks = []
-    start = 0
-    i = 0
+            # Hand out the finished prefix; wait once enough segments are in flight
+            while futures and (
+                futures[0].done() or len(futures) > AUDIO_STT_SEGMENT_CONCURRENCY
+            ):
+                yield {"index": index, **result(futures.popleft())}
+                index += 1
 
-    base, _ = os.path.splitext(file_path)
+        while futures:
+            yield {"index": index, **result(futures.popleft())}
+            index += 1
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(segment_dir, ignore_errors=True)
 
-    while start < duration_ms:
-        end = min(start + approx_chunk_ms, duration_ms)
-        chunk = audio[start:end]
-        chunk_path = f"{base}_chunk_{i}.{format}"
-        chunk.export(chunk_path, format=format, bitrate=bitrate)
 
-        # Reduce chunk duration if still too large
-        while os.path.getsize(chunk_path) > max_bytes and (end - start) > 5000:
-            end = start + ((end - start) // 2)
-            chunk = audio[start:end]
-            chunk.export(chunk_path, format=format, bitrate=bitrate)
+def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None):
+    results = list(transcribe_segments(request, file_path, metadata))
 
-        if os.path.getsize(chunk_path) > max_bytes:
-            os.remove(chunk_path)
-            raise Exception("Audio chunk cannot be reduced below max file size.")
+    return {
+        "text": " ".join([result["text"] for result in results]),
+    }
 
-        chunks.append(chunk_path)
-        start = end
-        i += 1
 
-    return chunks
+def transcription_event_stream(request, file_path, metadata):
+    texts = []
+    try:
+        for result in transcribe_segments(request, file_path, metadata):
+            texts.append(result["text"])
+            yield f"data: {json.dumps(result)}\n\n"
+
+        data = {
+            "done": True,
+            "text": " ".join(texts),
+            "filename": os.path.basename(file_path),
+        }
+    except Exception as e:
+        log.exception(e)
+        data = {
+            "done": True,
+            "error": str(e.detail) if hasattr(e, "detail") else str(e),
+        }
+    yield f"data: {json.dumps(data)}\n\n"
 
 
 @router.post("/transcriptions")
@@ -940,6 +1003,7 @@ def transcription(
     request: Request,
     file: UploadFile = File(...),
     language: Optional[str] = Form(None),
+    stream: bool = Form(False),
     user=Depends(get_verified_user),
 ):
     log.info(f"file.content_type: {file.content_type}")
@@ -982,6 +1046,12 @@ def transcription(
             if language:
                 metadata = {"language": language}
 
+            if stream:
+                return StreamingResponse(
+                    transcription_event_stream(request, file_path, metadata),
+                    media_type="text/event-stream",
+                )
+
             result = transcribe(request, file_path, metadata)
 
             return {
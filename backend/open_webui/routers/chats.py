@@ -1,14 +1,19 @@
+import asyncio
 import json
 import logging
-from typing import Optional
+import time
+import zlib
+from typing import AsyncIterator, Iterator, Optional
 
 
 from open_webui.socket.main import get_event_emitter
 from open_webui.models.chats import (
     ChatForm,
     ChatImportForm,
+    ChatModel,
     ChatResponse,
     Chats,
+    ChatSearchResponse,
     ChatTitleIdResponse,
 )
 from open_webui.models.tags import TagModel, Tags
@@ -16,9 +21,15 @@ from open_webui.models.folders import Folders
 
 from open_webui.config import ENABLE_ADMIN_CHAT_ACCESS, ENABLE_ADMIN_EXPORT
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    CHAT_IMPORT_MAX_LINE_SIZE,
+    CHAT_IMPORT_MAX_SIZE,
+    CHAT_NDJSON_BATCH_SIZE,
+    SRC_LOG_LEVELS,
+)
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
@@ -34,13 +45,36 @@ router = APIRouter()
 ############################
 
 
+def parse_chat_list_cursor(cursor: str) -> tuple[int, str]:
+    """
+    Parse a `{updated_at}:{id}` cursor, naming the last chat of the previous
+    page, into the `before` argument of the chat list queries.
+    """
+    try:
+        updated_at, id = cursor.split(":", 1)
+        return int(updated_at), id
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INVALID_CURSOR,
+        )
+
+
 @router.get("/", response_model=list[ChatTitleIdResponse])
 @router.get("/list", response_model=list[ChatTitleIdResponse])
 def get_session_user_chat_list(
-    user=Depends(get_verified_user), page: Optional[int] = None
+    user=Depends(get_verified_user),
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
 ):
+    before = parse_chat_list_cursor(cursor) if cursor else None
+
     try:
-        if page is not None:
+        if before is not None:
+            return Chats.get_chat_title_id_list_by_user_id(
+                user.id, limit=60, before=before
+            )
+        elif page is not None:
             limit = 60
             skip = (page - 1) * limit
 
@@ -85,6 +119,7 @@ async def delete_all_user_chats(request: Request, user=Depends(get_verified_user
 async def get_user_chat_list_by_user_id(
     user_id: str,
     page: Optional[int] = None,
+    cursor: Optional[str] = None,
     query: Optional[str] = None,
     order_by: Optional[str] = None,
     direction: Optional[str] = None,
@@ -96,7 +131,14 @@ async def get_user_chat_list_by_user_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    if page is None:
+    before = parse_chat_list_cursor(cursor) if cursor else None
+    if before is not None and order_by:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INVALID_CURSOR,
+        )
+
+    if page is None or before is not None:
         page = 1
 
     limit = 60
@@ -111,7 +153,12 @@ async def get_user_chat_list_by_user_id(
         filter["direction"] = direction
 
     return Chats.get_chat_list_by_user_id(
-        user_id, include_archived=True, filter=filter, skip=skip, limit=limit
+        user_id,
+        include_archived=True,
+        filter=filter,
+        skip=skip,
+        limit=limit,
+        before=before,
     )
 
 
@@ -137,20 +184,25 @@ async def create_new_chat(form_data: ChatForm, user=Depends(get_verified_user)):
 ############################
 
 
+def insert_imported_chat_tags(user_id: str, chats: list[ChatModel]):
+    tag_names = []
+    for chat in chats:
+        for tag_id in chat.meta.get("tags", []):
+            tag_id = tag_id.replace(" ", "_").lower()
+            if tag_id != "none":
+                tag_names.append(
+                    " ".join([word.capitalize() for word in tag_id.split("_")])
+                )
+
+    Tags.insert_new_tags(tag_names, user_id)
+
+
 @router.post("/import", response_model=Optional[ChatResponse])
 async def import_chat(form_data: ChatImportForm, user=Depends(get_verified_user)):
     try:
         chat = Chats.import_chat(user.id, form_data)
         if chat:
-            tags = chat.meta.get("tags", [])
-            for tag_id in tags:
-                tag_id = tag_id.replace(" ", "_").lower()
-                tag_name = " ".join([word.capitalize() for word in tag_id.split("_")])
-                if (
-                    tag_id != "none"
-                    and Tags.get_tag_by_name_and_user_id(tag_name, user.id) is None
-                ):
-                    Tags.insert_new_tag(tag_name, user.id)
+            insert_imported_chat_tags(user.id, [chat])
 
         return ChatResponse(**chat.model_dump())
     except Exception as e:
@@ -160,12 +212,162 @@ async def import_chat(form_data: ChatImportForm, user=Depends(get_verified_user)
         )
 
 
+############################
+# ImportChatsStream
+############################
+
+
+class ChatImportError(BaseModel):
+    line: int
+    error: str
+
+
+class ChatImportStreamResponse(BaseModel):
+    imported: int
+    errors: list[ChatImportError]
+
+
+async def read_ndjson_lines(request: Request) -> AsyncIterator[tuple[int, bytes]]:
+    """
+    Yield the numbered lines of an NDJSON request body as they arrive, gunzipping
+    it when it is sent as gzip. The body may not exceed `CHAT_IMPORT_MAX_SIZE`
+    bytes once decompressed, nor any line `CHAT_IMPORT_MAX_LINE_SIZE` bytes.
+    """
+    decompressor = None
+    started = False
+    size = 0
+    buffer = b""
+    line_number = 0
+
+    def check_size(size: int, limit: int):
+        if size > limit:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=ERROR_MESSAGES.FILE_TOO_LARGE(size=f"{limit} bytes"),
+            )
+
+    async for chunk in request.stream():
+        if not chunk:
+            continue
+
+        if not started:
+            started = True
+            if (
+                request.headers.get("content-encoding") == "gzip"
+                or request.headers.get("content-type") == "application/gzip"
+                or chunk.startswith(b"\x1f\x8b")
+            ):
+                decompressor = zlib.decompressobj(wbits=31)
+
+        while chunk:
+            if decompressor is not None:
+                # Inflate at most a line's worth at a time, so that a small
+                # body cannot expand all at once
+                data = decompressor.decompress(chunk, CHAT_IMPORT_MAX_LINE_SIZE)
+                chunk = decompressor.unconsumed_tail
+            else:
+                data, chunk = chunk, b""
+
+            size += len(data)
+            check_size(size, CHAT_IMPORT_MAX_SIZE)
+
+            *lines, buffer = (buffer + data).split(b"\n")
+            check_size(len(buffer), CHAT_IMPORT_MAX_LINE_SIZE)
+            for line in lines:
+                line_number += 1
+                if line.strip():
+                    yield line_number, line
+
+    if decompressor is not None:
+        data = decompressor.flush()
+        check_size(size + len(data), CHAT_IMPORT_MAX_SIZE)
+        buffer += data
+    for line in buffer.split(b"\n"):
+        line_number += 1
+        if line.strip():
+            yield line_number, line
+
+
+def import_chat_batch(
+    user_id: str, batch: list[tuple[int, ChatImportForm]]
+) -> tuple[int, list[ChatImportError]]:
+    try:
+        chats = Chats.import_chats(user_id, [form_data for _, form_data in batch])
+        insert_imported_chat_tags(user_id, chats)
+        return len(chats), []
+    except Exception as e:
+        if len(batch) == 1:
+            log.warning(f"Error importing chat on line {batch[0][0]}: {e}")
+            return 0, [
+                ChatImportError(
+                    line=batch[0][0],
+                    error=(
+                        str(e)
+                        if isinstance(e, ValidationError)
+                        else ERROR_MESSAGES.DEFAULT()
+                    ),
+                )
+            ]
+
+    # Retry the chats one by one, so that only the failing lines are reported
+    imported = 0
+    errors = []
+    for item in batch:
+        count, item_errors = import_chat_batch(user_id, [item])
+        imported += count
+        errors.extend(item_errors)
+    return imported, errors
+
+
+@router.post("/import/stream", response_model=ChatImportStreamResponse)
+async def import_chats_stream(request: Request, user=Depends(get_verified_user)):
+    """
+    Import chats from an NDJSON body, one chat per line in the format of
+    `/import` or of `/all/export`, optionally gzipped. The body is read as it
+    arrives and the chats are inserted in batches, so that importing a large
+    export holds only one batch in memory. Lines that fail are reported by
+    line number and do not stop the import.
+    """
+    imported = 0
+    errors = []
+    batch = []
+
+    try:
+        async for line_number, line in read_ndjson_lines(request):
+            try:
+                batch.append((line_number, ChatImportForm.model_validate_json(line)))
+            except ValidationError as e:
+                errors.append(ChatImportError(line=line_number, error=str(e)))
+                continue
+
+            if len(batch) >= CHAT_NDJSON_BATCH_SIZE:
+                count, batch_errors = await asyncio.to_thread(
+                    import_chat_batch, user.id, batch
+                )
+                imported += count
+                errors.extend(batch_errors)
+                batch = []
+    except zlib.error as e:
+        log.warning(f"Error decompressing imported chats: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Invalid gzip data"),
+        )
+
+    if batch:
+        count, batch_errors = await asyncio.to_thread(import_chat_batch, user.id, batch)
+        imported += count
+        errors.extend(batch_errors)
+
+    return ChatImportStreamResponse(imported=imported, errors=errors)
+
+
 ############################
 # GetChats
 ############################
 
 
-@router.get("/search", response_model=list[ChatTitleIdResponse])
+@router.get("/search", response_model=list[ChatSearchResponse])
 async def search_user_chats(
     text: str, page: Optional[int] = None, user=Depends(get_verified_user)
 ):
@@ -176,7 +378,7 @@ async def search_user_chats(
     skip = (page - 1) * limit
 
     chat_list = [
-        ChatTitleIdResponse(**chat.model_dump())
+        ChatSearchResponse(**chat.model_dump())
         for chat in Chats.get_chats_by_user_id_and_search_text(
             user.id, text, skip=skip, limit=limit
         )
@@ -221,10 +423,7 @@ async def get_chats_by_folder_id(folder_id: str, user=Depends(get_verified_user)
 
 @router.get("/pinned", response_model=list[ChatTitleIdResponse])
 async def get_user_pinned_chats(user=Depends(get_verified_user)):
-    return [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_pinned_chats_by_user_id(user.id)
-    ]
+    return Chats.get_pinned_chats_by_user_id(user.id)
 
 
 ############################
@@ -253,6 +452,59 @@ async def get_user_archived_chats(user=Depends(get_verified_user)):
     ]
 
 
+############################
+# ExportChats
+############################
+
+
+def stream_chat_export(
+    batches: Iterator[list[ChatModel]], compress: bool = False
+) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    for chats in batches:
+        data = "".join(
+            ChatResponse(**chat.model_dump()).model_dump_json() + "\n" for chat in chats
+        ).encode("utf-8")
+
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def get_chat_export_response(
+    batches: Iterator[list[ChatModel]], compress: bool = False
+) -> StreamingResponse:
+    """
+    Stream chats as NDJSON, one `ChatResponse` per line, optionally gzipped,
+    serializing one batch of chats at a time.
+    """
+    filename = f"chat-export-{int(time.time())}.jsonl"
+    if compress:
+        filename += ".gz"
+
+    return StreamingResponse(
+        stream_chat_export(batches, compress),
+        media_type="application/gzip" if compress else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/all/export")
+async def export_user_chats(
+    archived: Optional[bool] = None,
+    compress: bool = False,
+    user=Depends(get_verified_user),
+):
+    return get_chat_export_response(
+        Chats.iter_chats(user_id=user.id, archived=archived), compress
+    )
+
+
 ############################
 # GetAllTags
 ############################
@@ -285,6 +537,18 @@ async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
     return [ChatResponse(**chat.model_dump()) for chat in Chats.get_chats()]
 
 
+@router.get("/all/db/export")
+async def export_all_user_chats_in_db(
+    compress: bool = False, user=Depends(get_admin_user)
+):
+    if not ENABLE_ADMIN_EXPORT:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
+        )
+    return get_chat_export_response(Chats.iter_chats(), compress)
+
+
 ############################
 # GetArchivedChats
 ############################
@@ -312,17 +576,12 @@ async def get_archived_session_user_chat_list(
     if direction:
         filter["direction"] = direction
 
-    chat_list = [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_archived_chat_list_by_user_id(
-            user.id,
-            filter=filter,
-            skip=skip,
-            limit=limit,
-        )
-    ]
-
-    return chat_list
+    return Chats.get_archived_chat_list_by_user_id(
+        user.id,
+        filter=filter,
+        skip=skip,
+        limit=limit,
+    )
 
 
 ############################
@@ -452,13 +711,14 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    chat = Chats.upsert_message_to_chat_by_id_and_message_id(
+    Chats.upsert_message_to_chat_by_id_and_message_id(
         id,
         message_id,
         {
             "content": form_data.content,
         },
     )
+    chat = Chats.get_chat_by_id(id)
 
     event_emitter = get_event_emitter(
         {
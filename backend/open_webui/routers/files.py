@@ -23,8 +23,13 @@ from fastapi import (
 
 from fastapi.responses import FileResponse, StreamingResponse
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    ENABLE_INGESTION_QUEUE,
+    FILE_PROCESSING_STATUS_POLL_INTERVAL,
+    SRC_LOG_LEVELS,
+)
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEXES
 
 from open_webui.models.users import Users
 from open_webui.models.files import (
@@ -33,6 +38,7 @@ from open_webui.models.files import (
     FileModelResponse,
     Files,
 )
+from open_webui.models.ingestion_jobs import IngestionJobs
 from open_webui.models.knowledge import Knowledges
 
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
@@ -40,6 +46,8 @@ from open_webui.routers.retrieval import ProcessFileForm, process_file
 from open_webui.routers.audio import transcribe
 from open_webui.storage.provider import Storage
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.file_status import FILE_STATUS_NOTIFIER
+from open_webui.utils.ingestion import INGESTION_QUEUE
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -85,55 +93,90 @@ def has_access_to_file(
 ############################
 
 
-def process_uploaded_file(request, file, file_path, file_item, file_metadata, user):
-    try:
-        if file.content_type:
-            stt_supported_content_types = getattr(
-                request.app.state.config, "STT_SUPPORTED_CONTENT_TYPES", []
-            )
+class StoredFileResponse(FileResponse):
+    """
+    Sends the local copy of a stored file, returned by
+    `Storage.get_file(file_path, pin=True)`, and unpins it once it is sent.
+    """
 
-            if any(
-                fnmatch(file.content_type, content_type)
-                for content_type in (
-                    stt_supported_content_types
-                    if stt_supported_content_types
-                    and any(t.strip() for t in stt_supported_content_types)
-                    else ["audio/*", "video/webm"]
-                )
-            ):
-                file_path = Storage.get_file(file_path)
+    def __init__(self, file_path: str, local_path: str | Path, **kwargs):
+        super().__init__(local_path, **kwargs)
+        self.file_path = file_path
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            Storage.release_file(self.file_path)
+
+
+def process_file_item(request, file_item, file_metadata, user):
+    """Extract, split and embed an uploaded file; raises on failure."""
+    content_type = (file_item.meta or {}).get("content_type")
+    if content_type:
+        stt_supported_content_types = getattr(
+            request.app.state.config, "STT_SUPPORTED_CONTENT_TYPES", []
+        )
+
+        if any(
+            fnmatch(content_type, supported_content_type)
+            for supported_content_type in (
+                stt_supported_content_types
+                if stt_supported_content_types
+                and any(t.strip() for t in stt_supported_content_types)
+                else ["audio/*", "video/webm"]
+            )
+        ):
+            with Storage.pin_file(file_item.path) as file_path:
                 result = transcribe(request, file_path, file_metadata)
 
-                process_file(
-                    request,
-                    ProcessFileForm(
-                        file_id=file_item.id, content=result.get("text", "")
-                    ),
-                    user=user,
-                )
-            elif (not file.content_type.startswith(("image/", "video/"))) or (
-                request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
-            ):
-                process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
-        else:
-            log.info(
-                f"File type {file.content_type} is not provided, but trying to process anyway"
+            process_file(
+                request,
+                ProcessFileForm(file_id=file_item.id, content=result.get("text", "")),
+                user=user,
             )
+        elif (not content_type.startswith(("image/", "video/"))) or (
+            request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
+        ):
             process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
+    else:
+        log.info(
+            f"File type {content_type} is not provided, but trying to process anyway"
+        )
+        process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
+
+
+def process_file_job(request, job):
+    """Ingestion queue handler for jobs enqueued by `upload_file_handler`."""
+    file_item = Files.get_file_by_id(job.file_id)
+    user = Users.get_user_by_id(job.user_id)
+    if not file_item or not user:
+        # Deleted while queued
+        return
+
+    process_file_item(request, file_item, (job.payload or {}).get("metadata", {}), user)
+
+
+def process_uploaded_file(request, file_item, file_metadata, user):
+    try:
+        process_file_item(request, file_item, file_metadata, user)
 
         Files.update_file_data_by_id(
             file_item.id,
             {"status": "completed"},
         )
+        FILE_STATUS_NOTIFIER.publish(file_item.id, "completed")
     except Exception as e:
         log.error(f"Error processing file: {file_item.id}")
+        error = str(e.detail) if hasattr(e, "detail") else str(e)
         Files.update_file_data_by_id(
             file_item.id,
             {
                 "status": "failed",
-                "error": str(e.detail) if hasattr(e, "detail") else str(e),
+                "error": error,
             },
         )
+        FILE_STATUS_NOTIFIER.publish(file_item.id, "failed", error)
 
 
 @router.post("/", response_model=FileModelResponse)
@@ -144,14 +187,20 @@ def upload_file(
     metadata: Optional[dict | str] = Form(None),
     process: bool = Query(True),
     process_in_background: bool = Query(True),
+    priority: int = Query(0, ge=-100, le=100),
     user=Depends(get_verified_user),
 ):
+    if user.role != "admin":
+        # Only admins may move their uploads ahead of the queue
+        priority = min(priority, 0)
+
     return upload_file_handler(
         request,
         file=file,
         metadata=metadata,
         process=process,
         process_in_background=process_in_background,
+        priority=priority,
         user=user,
         background_tasks=background_tasks,
     )
@@ -163,6 +212,7 @@ def upload_file_handler(
     metadata: Optional[dict | str] = Form(None),
     process: bool = Query(True),
     process_in_background: bool = Query(True),
+    priority: int = 0,
     user=Depends(get_verified_user),
     background_tasks: Optional[BackgroundTasks] = None,
 ):
@@ -203,7 +253,7 @@ def upload_file_handler(
         id = str(uuid.uuid4())
         name = filename
         filename = f"{id}_{filename}"
-        contents, file_path = Storage.upload_file(
+        file_path, file_hash, file_size = Storage.upload_file_stream(
             file.file,
             filename,
             {
@@ -227,7 +277,8 @@ def upload_file_handler(
                     "meta": {
                         "name": name,
                         "content_type": file.content_type,
-                        "size": len(contents),
+                        "size": file_size,
+                        "sha256": file_hash,
                         "data": file_metadata,
                     },
                 }
@@ -235,12 +286,19 @@ def upload_file_handler(
         )
 
         if process:
-            if background_tasks and process_in_background:
+            if process_in_background and ENABLE_INGESTION_QUEUE:
+                if not INGESTION_QUEUE.enqueue(
+                    file_item.id,
+                    user.id,
+                    priority=priority,
+                    payload={"metadata": file_metadata},
+                ):
+                    raise Exception("Failed to queue the file for processing")
+                return {"status": True, **file_item.model_dump()}
+            elif background_tasks and process_in_background:
                 background_tasks.add_task(
                     process_uploaded_file,
                     request,
-                    file,
-                    file_path,
                     file_item,
                     file_metadata,
                     user,
@@ -249,8 +307,6 @@ def upload_file_handler(
             else:
                 process_uploaded_file(
                     request,
-                    file,
-                    file_path,
                     file_item,
                     file_metadata,
                     user,
@@ -279,18 +335,18 @@ def upload_file_handler(
 
 
 @router.get("/", response_model=list[FileModelResponse])
-async def list_files(user=Depends(get_verified_user), content: bool = Query(True)):
-    if user.role == "admin":
-        files = Files.get_files()
-    else:
-        files = Files.get_files_by_user_id(user.id)
-
-    if not content:
-        for file in files:
-            if "content" in file.data:
-                del file.data["content"]
-
-    return files
+async def list_files(
+    user=Depends(get_verified_user),
+    content: bool = Query(True),
+    skip: Optional[int] = None,
+    limit: Optional[int] = None,
+):
+    return Files.get_file_list(
+        user_id=None if user.role == "admin" else user.id,
+        content=content,
+        skip=skip,
+        limit=limit,
+    )
 
 
 ############################
@@ -305,21 +361,21 @@ async def search_files(
         description="Filename pattern to search for. Supports wildcards such as '*.txt'",
     ),
     content: bool = Query(True),
+    skip: Optional[int] = None,
+    limit: Optional[int] = None,
     user=Depends(get_verified_user),
 ):
     """
     Search for files by filename with support for wildcard patterns.
     """
-    # Get files according to user role
-    if user.role == "admin":
-        files = Files.get_files()
-    else:
-        files = Files.get_files_by_user_id(user.id)
-
-    # Get matching files
-    matching_files = [
-        file for file in files if fnmatch(file.filename.lower(), filename.lower())
-    ]
+    # Get matching files according to user role
+    matching_files = Files.get_file_list(
+        user_id=None if user.role == "admin" else user.id,
+        filename=filename,
+        content=content,
+        skip=skip,
+        limit=limit,
+    )
 
     if not matching_files:
         raise HTTPException(
@@ -327,11 +383,6 @@ async def search_files(
             detail="No files found matching the pattern.",
         )
 
-    if not content:
-        for file in matching_files:
-            if "content" in file.data:
-                del file.data["content"]
-
     return matching_files
 
 
@@ -345,8 +396,10 @@ async def delete_all_files(user=Depends(get_admin_user)):
     result = Files.delete_all_files()
     if result:
         try:
+            IngestionJobs.delete_all_jobs()
             Storage.delete_all_files()
             VECTOR_DB_CLIENT.reset()
+            BM25_INDEXES.reset()
         except Exception as e:
             log.exception(e)
             log.error("Error deleting files")
@@ -362,6 +415,16 @@ async def delete_all_files(user=Depends(get_admin_user)):
         )
 
 
+############################
+# Get Ingestion Queue Stats
+############################
+
+
+@router.get("/process/queue")
+async def get_ingestion_queue_stats(user=Depends(get_admin_user)):
+    return INGESTION_QUEUE.get_stats()
+
+
 ############################
 # Get File By Id
 ############################
@@ -411,25 +474,36 @@ async def get_file_process_status(
             MAX_FILE_PROCESSING_DURATION = 3600 * 2
 
             async def event_stream(file_item):
-                for _ in range(MAX_FILE_PROCESSING_DURATION):
-                    file_item = Files.get_file_by_id(file_item.id)
-                    if file_item:
-                        data = file_item.model_dump().get("data", {})
-                        status = data.get("status")
-
-                        if status:
-                            event = {"status": status}
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + MAX_FILE_PROCESSING_DURATION
+
+                # Subscribe before reading the current status so that no
+                # transition is missed; the database is only read again when
+                # no event arrives within the poll interval.
+                with FILE_STATUS_NOTIFIER.subscribe(file_item.id) as queue:
+                    event = Files.get_file_status_by_id(file_item.id)
+                    while loop.time() < deadline:
+                        if event:
+                            status = event.get("status")
+                            if not status:
+                                # Legacy
+                                break
+
+                            data = {"status": status}
                             if status == "failed":
-                                event["error"] = data.get("error")
+                                data["error"] = event.get("error")
 
-                            yield f"data: {json.dumps(event)}\n\n"
+                            yield f"data: {json.dumps(data)}\n\n"
                             if status in ("completed", "failed"):
                                 break
-                        else:
-                            # Legacy
-                            break
 
-                    await asyncio.sleep(0.5)
+                        try:
+                            event = await asyncio.wait_for(
+                                queue.get(),
+                                timeout=FILE_PROCESSING_STATUS_POLL_INTERVAL,
+                            )
+                        except asyncio.TimeoutError:
+                            event = Files.get_file_status_by_id(file_item.id)
 
             return StreamingResponse(
                 event_stream(file),
@@ -444,6 +518,35 @@ async def get_file_process_status(
         )
 
 
+@router.post("/{id}/process/cancel")
+async def cancel_file_processing(id: str, user=Depends(get_verified_user)):
+    file = Files.get_file_by_id(id)
+
+    if not file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+    if (
+        file.user_id == user.id
+        or user.role == "admin"
+        or has_access_to_file(id, "write", user)
+    ):
+        if INGESTION_QUEUE.cancel(id):
+            return {"status": True}
+
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("File is not queued for processing"),
+        )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+
 ############################
 # Get File Data Content By Id
 ############################
@@ -539,8 +642,10 @@ async def get_file_content_by_id(
         or user.role == "admin"
         or has_access_to_file(id, "read", user)
     ):
+        pinned = False
         try:
-            file_path = Storage.get_file(file.path)
+            file_path = Storage.get_file(file.path, pin=True)
+            pinned = True
             file_path = Path(file_path)
 
             # Check if the file already exists in the cache
@@ -571,7 +676,9 @@ async def get_file_content_by_id(
                             f"attachment; filename*=UTF-8''{encoded_filename}"
                         )
 
-                return FileResponse(file_path, headers=headers, media_type=content_type)
+                return StoredFileResponse(
+                    file.path, file_path, headers=headers, media_type=content_type
+                )
 
             else:
                 raise HTTPException(
@@ -579,6 +686,8 @@ async def get_file_content_by_id(
                     detail=ERROR_MESSAGES.NOT_FOUND,
                 )
         except Exception as e:
+            if pinned:
+                Storage.release_file(file.path)
             log.exception(e)
             log.error("Error getting file content")
             raise HTTPException(
@@ -614,20 +723,24 @@ async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
         or user.role == "admin"
         or has_access_to_file(id, "read", user)
     ):
+        pinned = False
         try:
-            file_path = Storage.get_file(file.path)
+            file_path = Storage.get_file(file.path, pin=True)
+            pinned = True
             file_path = Path(file_path)
 
             # Check if the file already exists in the cache
             if file_path.is_file():
                 log.info(f"file_path: {file_path}")
-                return FileResponse(file_path)
+                return StoredFileResponse(file.path, file_path)
             else:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=ERROR_MESSAGES.NOT_FOUND,
                 )
         except Exception as e:
+            if pinned:
+                Storage.release_file(file.path)
             log.exception(e)
             log.error("Error getting file content")
             raise HTTPException(
@@ -666,17 +779,22 @@ async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
         }
 
         if file_path:
-            file_path = Storage.get_file(file_path)
-            file_path = Path(file_path)
+            file_path = Path(Storage.get_file(file.path, pin=True))
 
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                return FileResponse(file_path, headers=headers)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=ERROR_MESSAGES.NOT_FOUND,
-                )
+            try:
+                # Check if the file already exists in the cache
+                if file_path.is_file():
+                    return StoredFileResponse(file.path, file_path, headers=headers)
+                else:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=ERROR_MESSAGES.NOT_FOUND,
+                    )
+            except Exception:
+                # The response unpins the file once sent, so only unpin here
+                # when it was never created
+                Storage.release_file(file.path)
+                raise
         else:
             # File path doesn’t exist, return the content as .txt if possible
             file_content = file.content.get("content", "")
@@ -722,8 +840,10 @@ async def delete_file_by_id(id: str, user=Depends(get_verified_user)):
         result = Files.delete_file_by_id(id)
         if result:
             try:
+                IngestionJobs.delete_jobs_by_file_id(id)
                 Storage.delete_file(file.path)
                 VECTOR_DB_CLIENT.delete(collection_name=f"file-{id}")
+                BM25_INDEXES.delete_collection(f"file-{id}")
             except Exception as e:
                 log.exception(e)
                 log.error("Error deleting files")
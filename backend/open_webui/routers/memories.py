@@ -5,6 +5,7 @@ from typing import Optional
 
 from open_webui.models.memories import Memories, MemoryModel
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEXES
 from open_webui.utils.auth import get_verified_user
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -64,6 +65,7 @@ async def add_memory(
             }
         ],
     )
+    BM25_INDEXES.delete_collection(f"user-memory-{user.id}")
 
     return memory
 
@@ -122,6 +124,7 @@ async def reset_memory_from_vector_db(
             for memory in memories
         ],
     )
+    BM25_INDEXES.delete_collection(f"user-memory-{user.id}")
 
     return True
 
@@ -138,6 +141,7 @@ async def delete_memory_by_user_id(user=Depends(get_verified_user)):
     if result:
         try:
             VECTOR_DB_CLIENT.delete_collection(f"user-memory-{user.id}")
+            BM25_INDEXES.delete_collection(f"user-memory-{user.id}")
         except Exception as e:
             log.error(e)
         return True
@@ -180,6 +184,7 @@ async def update_memory_by_id(
                 }
             ],
         )
+        BM25_INDEXES.delete_collection(f"user-memory-{user.id}")
 
     return memory
 
@@ -197,6 +202,7 @@ async def delete_memory_by_id(memory_id: str, user=Depends(get_verified_user)):
         VECTOR_DB_CLIENT.delete(
             collection_name=f"user-memory-{user.id}", ids=[memory_id]
         )
+        BM25_INDEXES.delete(f"user-memory-{user.id}", ids=[memory_id])
         return True
 
     return False
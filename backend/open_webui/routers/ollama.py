@@ -1,7 +1,3 @@
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
 import asyncio
 import json
 import logging
@@ -50,7 +46,9 @@ from open_webui.utils.payload import (
     apply_system_prompt_to_body,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
-from open_webui.utils.access_control import has_access
+from open_webui.utils.http_pool import HTTP_SESSION_POOL
+from open_webui.utils.load_balancer import LOAD_BALANCING_STRATEGIES, LoadBalancer
+from open_webui.utils.access_control import has_access, get_user_group_ids
 
 
 from open_webui.config import (
@@ -70,6 +68,9 @@ from open_webui.constants import ERROR_MESSAGES
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 
+# Tracks in-flight requests and health per Ollama base URL
+OLLAMA_LOAD_BALANCER = LoadBalancer()
+
 
 ##########################################
 #
@@ -81,26 +82,27 @@ log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as response:
-                return await response.json()
+        session = HTTP_SESSION_POOL.get_session(url)
+        async with session.get(
+            url,
+            headers={
+                "Content-Type": "application/json",
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+            timeout=timeout,
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
@@ -108,13 +110,13 @@ async def send_get_request(url, key=None, user: UserModel = None):
 
 
 async def cleanup_response(
-    response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
+    response: Optional[aiohttp.ClientResponse], base_url: Optional[str] = None
 ):
+    # Release rather than close, so that the connection returns to the pool
     if response:
-        response.close()
-    if session:
-        await session.close()
+        response.release()
+    if base_url:
+        OLLAMA_LOAD_BALANCER.release(base_url)
 
 
 async def send_post_request(
@@ -125,14 +127,17 @@ async def send_post_request(
     content_type: Optional[str] = None,
     user: UserModel = None,
     metadata: Optional[dict] = None,
+    base_url: Optional[str] = None,
 ):
+    # Requests with a `base_url` are tracked by the load balancer
+    if base_url:
+        OLLAMA_LOAD_BALANCER.acquire(base_url)
 
     r = None
+    streaming = False
+    start = time.monotonic()
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
-
+        session = HTTP_SESSION_POOL.get_session(url)
         r = await session.post(
             url,
             data=payload,
@@ -156,12 +161,18 @@ async def send_post_request(
                 ),
             },
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
         )
 
+        if base_url:
+            OLLAMA_LOAD_BALANCER.record(
+                base_url, success=r.status < 500, latency=time.monotonic() - start
+            )
+
         if r.ok is False:
             try:
                 res = await r.json()
-                await cleanup_response(r, session)
+                await cleanup_response(r)
                 if "error" in res:
                     raise HTTPException(status_code=r.status, detail=res["error"])
             except HTTPException as e:
@@ -180,12 +191,13 @@ async def send_post_request(
             if content_type:
                 response_headers["Content-Type"] = content_type
 
+            streaming = True
             return StreamingResponse(
                 r.content,
                 status_code=r.status,
                 headers=response_headers,
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    cleanup_response, response=r, base_url=base_url
                 ),
             )
         else:
@@ -195,6 +207,9 @@ async def send_post_request(
     except HTTPException as e:
         raise e  # Re-raise HTTPException to be handled by FastAPI
     except Exception as e:
+        if base_url and r is None:
+            OLLAMA_LOAD_BALANCER.record(base_url, success=False)
+
         detail = f"Ollama: {e}"
 
         raise HTTPException(
@@ -202,8 +217,25 @@ async def send_post_request(
             detail=detail if e else "Open WebUI: Server Connection Error",
         )
     finally:
-        if not stream:
-            await cleanup_response(r, session)
+        if not streaming:
+            await cleanup_response(r, base_url)
+
+
+def select_url_idx(request: Request, url_idxs: list[int]) -> int:
+    base_urls = request.app.state.config.OLLAMA_BASE_URLS
+    configs = request.app.state.config.OLLAMA_API_CONFIGS
+
+    url_idxs = [idx for idx in url_idxs if idx < len(base_urls)]
+    url = OLLAMA_LOAD_BALANCER.select(
+        {
+            base_urls[idx]: configs.get(
+                str(idx), configs.get(base_urls[idx], {})  # Legacy support
+            )
+            for idx in url_idxs
+        },
+        strategy=request.app.state.config.OLLAMA_LOAD_BALANCING_STRATEGY,
+    )
+    return random.choice([idx for idx in url_idxs if base_urls[idx] == url])
 
 
 def get_api_key(idx, url, configs):
@@ -241,47 +273,45 @@ async def verify_connection(
     url = form_data.url
     key = form_data.key
 
-    async with aiohttp.ClientSession(
-        trust_env=True,
-        timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST),
-    ) as session:
-        try:
-            async with session.get(
-                f"{url}/api/version",
-                headers={
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as r:
-                if r.status != 200:
-                    detail = f"HTTP Error: {r.status}"
-                    res = await r.json()
+    session = HTTP_SESSION_POOL.get_session(url)
+    try:
+        async with session.get(
+            f"{url}/api/version",
+            headers={
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST),
+        ) as r:
+            if r.status != 200:
+                detail = f"HTTP Error: {r.status}"
+                res = await r.json()
 
-                    if "error" in res:
-                        detail = f"External Error: {res['error']}"
-                    raise Exception(detail)
+                if "error" in res:
+                    detail = f"External Error: {res['error']}"
+                raise Exception(detail)
 
-                data = await r.json()
-                return data
-        except aiohttp.ClientError as e:
-            log.exception(f"Client error: {str(e)}")
-            raise HTTPException(
-                status_code=500, detail="Open WebUI: Server Connection Error"
-            )
-        except Exception as e:
-            log.exception(f"Unexpected error: {e}")
-            error_detail = f"Unexpected error: {str(e)}"
-            raise HTTPException(status_code=500, detail=error_detail)
+            data = await r.json()
+            return data
+    except aiohttp.ClientError as e:
+        log.exception(f"Client error: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail="Open WebUI: Server Connection Error"
+        )
+    except Exception as e:
+        log.exception(f"Unexpected error: {e}")
+        error_detail = f"Unexpected error: {str(e)}"
+        raise HTTPException(status_code=500, detail=error_detail)
 
 
 @router.get("/config")
@@ -290,6 +320,7 @@ async def get_config(request: Request, user=Depends(get_admin_user)):
         "ENABLE_OLLAMA_API": request.app.state.config.ENABLE_OLLAMA_API,
         "OLLAMA_BASE_URLS": request.app.state.config.OLLAMA_BASE_URLS,
         "OLLAMA_API_CONFIGS": request.app.state.config.OLLAMA_API_CONFIGS,
+        "OLLAMA_LOAD_BALANCING_STRATEGY": request.app.state.config.OLLAMA_LOAD_BALANCING_STRATEGY,
     }
 
 
@@ -297,17 +328,32 @@ class OllamaConfigForm(BaseModel):
     ENABLE_OLLAMA_API: Optional[bool] = None
     OLLAMA_BASE_URLS: list[str]
     OLLAMA_API_CONFIGS: dict
+    OLLAMA_LOAD_BALANCING_STRATEGY: Optional[str] = None
 
 
 @router.post("/config/update")
 async def update_config(
     request: Request, form_data: OllamaConfigForm, user=Depends(get_admin_user)
 ):
+    if (
+        form_data.OLLAMA_LOAD_BALANCING_STRATEGY is not None
+        and form_data.OLLAMA_LOAD_BALANCING_STRATEGY not in LOAD_BALANCING_STRATEGIES
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown load balancing strategy: {form_data.OLLAMA_LOAD_BALANCING_STRATEGY}",
+        )
+
     request.app.state.config.ENABLE_OLLAMA_API = form_data.ENABLE_OLLAMA_API
 
     request.app.state.config.OLLAMA_BASE_URLS = form_data.OLLAMA_BASE_URLS
     request.app.state.config.OLLAMA_API_CONFIGS = form_data.OLLAMA_API_CONFIGS
 
+    if form_data.OLLAMA_LOAD_BALANCING_STRATEGY is not None:
+        request.app.state.config.OLLAMA_LOAD_BALANCING_STRATEGY = (
+            form_data.OLLAMA_LOAD_BALANCING_STRATEGY
+        )
+
     # Remove the API configs that are not in the API URLS
     keys = list(map(str, range(len(request.app.state.config.OLLAMA_BASE_URLS))))
     request.app.state.config.OLLAMA_API_CONFIGS = {
@@ -320,9 +366,15 @@ async def update_config(
         "ENABLE_OLLAMA_API": request.app.state.config.ENABLE_OLLAMA_API,
         "OLLAMA_BASE_URLS": request.app.state.config.OLLAMA_BASE_URLS,
         "OLLAMA_API_CONFIGS": request.app.state.config.OLLAMA_API_CONFIGS,
+        "OLLAMA_LOAD_BALANCING_STRATEGY": request.app.state.config.OLLAMA_LOAD_BALANCING_STRATEGY,
     }
 
 
+@router.get("/load_balancer")
+async def get_load_balancer_stats(user=Depends(get_admin_user)):
+    return OLLAMA_LOAD_BALANCER.get_stats()
+
+
 def merge_ollama_models_lists(model_lists):
     merged_models = {}
 
@@ -440,12 +492,17 @@ async def get_all_models(request: Request, user: UserModel = None):
 
 async def get_filtered_models(models, user):
     # Filter models based on user access control
+    user_group_ids = get_user_group_ids(user.id)
+
     filtered_models = []
     for model in models.get("models", []):
         model_info = Models.get_model_by_id(model["model"])
         if model_info:
             if user.id == model_info.user_id or has_access(
-                user.id, type="read", access_control=model_info.access_control
+                user.id,
+                type="read",
+                access_control=model_info.access_control,
+                user_group_ids=user_group_ids,
             ):
                 filtered_models.append(model)
     return filtered_models
@@ -964,7 +1021,7 @@ async def show_model_info(
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
         )
 
-    url_idx = random.choice(models[model]["urls"])
+    url_idx = select_url_idx(request, models[model]["urls"])
 
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
@@ -1038,7 +1095,7 @@ async def embed(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1056,44 +1113,50 @@ async def embed(
     if prefix_id:
         form_data.model = form_data.model.replace(f"{prefix_id}.", "")
 
+    r = None
+    detail = None
     try:
-        r = requests.request(
-            method="POST",
-            url=f"{url}/api/embed",
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            data=form_data.model_dump_json(exclude_none=True).encode(),
-        )
-        r.raise_for_status()
+        session = HTTP_SESSION_POOL.get_session(url)
+        with OLLAMA_LOAD_BALANCER.track(url):
+            async with session.post(
+                f"{url}/api/embed",
+                headers={
+                    "Content-Type": "application/json",
+                    **({"Authorization": f"Bearer {key}"} if key else {}),
+                    **(
+                        {
+                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                            "X-OpenWebUI-User-Id": user.id,
+                            "X-OpenWebUI-User-Email": user.email,
+                            "X-OpenWebUI-User-Role": user.role,
+                        }
+                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                        else {}
+                    ),
+                },
+                data=form_data.model_dump_json(exclude_none=True).encode(),
+                ssl=AIOHTTP_CLIENT_SESSION_SSL,
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+            ) as r:
+                if not r.ok:
+                    try:
+                        res = await r.json(content_type=None)
+                        if "error" in res:
+                            detail = f"Ollama: {res['error']}"
+                    except Exception:
+                        pass
+                r.raise_for_status()
 
-        data = r.json()
+                data = await r.json(content_type=None)
         return data
     except Exception as e:
         log.exception(e)
 
-        detail = None
-        if r is not None:
-            try:
-                res = r.json()
-                if "error" in res:
-                    detail = f"Ollama: {res['error']}"
-            except Exception:
-                detail = f"Ollama: {e}"
+        if r is not None and not detail:
+            detail = f"Ollama: {e}"
 
         raise HTTPException(
-            status_code=r.status_code if r else 500,
+            status_code=r.status if r is not None else 500,
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
 
@@ -1125,7 +1188,7 @@ async def embeddings(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1143,44 +1206,50 @@ async def embeddings(
     if prefix_id:
         form_data.model = form_data.model.replace(f"{prefix_id}.", "")
 
+    r = None
+    detail = None
     try:
-        r = requests.request(
-            method="POST",
-            url=f"{url}/api/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            data=form_data.model_dump_json(exclude_none=True).encode(),
-        )
-        r.raise_for_status()
+        session = HTTP_SESSION_POOL.get_session(url)
+        with OLLAMA_LOAD_BALANCER.track(url):
+            async with session.post(
+                f"{url}/api/embeddings",
+                headers={
+                    "Content-Type": "application/json",
+                    **({"Authorization": f"Bearer {key}"} if key else {}),
+                    **(
+                        {
+                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                            "X-OpenWebUI-User-Id": user.id,
+                            "X-OpenWebUI-User-Email": user.email,
+                            "X-OpenWebUI-User-Role": user.role,
+                        }
+                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                        else {}
+                    ),
+                },
+                data=form_data.model_dump_json(exclude_none=True).encode(),
+                ssl=AIOHTTP_CLIENT_SESSION_SSL,
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+            ) as r:
+                if not r.ok:
+                    try:
+                        res = await r.json(content_type=None)
+                        if "error" in res:
+                            detail = f"Ollama: {res['error']}"
+                    except Exception:
+                        pass
+                r.raise_for_status()
 
-        data = r.json()
+                data = await r.json(content_type=None)
         return data
     except Exception as e:
         log.exception(e)
 
-        detail = None
-        if r is not None:
-            try:
-                res = r.json()
-                if "error" in res:
-                    detail = f"Ollama: {res['error']}"
-            except Exception:
-                detail = f"Ollama: {e}"
+        if r is not None and not detail:
+            detail = f"Ollama: {e}"
 
         raise HTTPException(
-            status_code=r.status_code if r else 500,
+            status_code=r.status if r is not None else 500,
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
 
@@ -1218,7 +1287,7 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1240,6 +1309,7 @@ async def generate_completion(
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        base_url=url,
     )
 
 
@@ -1285,7 +1355,7 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idx = select_url_idx(request, models[model].get("urls", []))
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -1373,6 +1443,7 @@ async def generate_chat_completion(
         content_type="application/x-ndjson",
         user=user,
         metadata=metadata,
+        base_url=url,
     )
 
 
@@ -1479,6 +1550,7 @@ async def generate_openai_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        base_url=url,
     )
 
 
@@ -1561,6 +1633,7 @@ async def generate_openai_chat_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        base_url=url,
     )
 
 
@@ -1620,12 +1693,17 @@ async def get_openai_models(
 
     if user.role == "user" and not BYPASS_MODEL_ACCESS_CONTROL:
         # Filter models based on user access control
+        user_group_ids = get_user_group_ids(user.id)
+
         filtered_models = []
         for model in models:
             model_info = Models.get_model_by_id(model["id"])
             if model_info:
                 if user.id == model_info.user_id or has_access(
-                    user.id, type="read", access_control=model_info.access_control
+                    user.id,
+                    type="read",
+                    access_control=model_info.access_control,
+                    user_group_ids=user_group_ids,
                 ):
                     filtered_models.append(model)
         models = filtered_models
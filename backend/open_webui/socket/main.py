@@ -7,11 +7,9 @@ import sys
 import time
 from typing import Dict, Set
 from redis import asyncio as aioredis
-import pycrdt as Y
 
 from open_webui.models.users import Users, UserNameResponse
 from open_webui.models.channels import Channels
-from open_webui.models.chats import Chats
 from open_webui.models.notes import Notes, NoteUpdateForm
 from open_webui.utils.redis import (
     get_sentinels_from_env,
@@ -26,11 +24,21 @@ from open_webui.env import (
     WEBSOCKET_REDIS_LOCK_TIMEOUT,
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
+    WEBSOCKET_USER_POOL_CACHE_TTL,
+    WEBSOCKET_EVENT_BATCH_INTERVAL,
+    YDOC_CLEANUP_INTERVAL,
     REDIS_KEY_PREFIX,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock, YdocManager
+from open_webui.socket.utils import (
+    AsyncLocalDict,
+    AsyncRedisDict,
+    EventBatcher,
+    RedisLock,
+    YdocManager,
+)
 from open_webui.tasks import create_task, stop_item_tasks
+from open_webui.utils.message_buffer import MESSAGE_WRITE_BUFFER
 from open_webui.utils.redis import get_redis_connection
 from open_webui.utils.access_control import has_access, get_users_with_access
 
@@ -94,19 +102,20 @@ if WEBSOCKET_MANAGER == "redis":
     redis_sentinels = get_sentinels_from_env(
         WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
     )
-    SESSION_POOL = RedisDict(
+    SESSION_POOL = AsyncRedisDict(
         f"{REDIS_KEY_PREFIX}:session_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
     )
-    USER_POOL = RedisDict(
+    USER_POOL = AsyncRedisDict(
         f"{REDIS_KEY_PREFIX}:user_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
+        near_cache_ttl=WEBSOCKET_USER_POOL_CACHE_TTL,
     )
-    USAGE_POOL = RedisDict(
+    USAGE_POOL = AsyncRedisDict(
         f"{REDIS_KEY_PREFIX}:usage_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
@@ -124,16 +133,53 @@ if WEBSOCKET_MANAGER == "redis":
     renew_func = clean_up_lock.renew_lock
     release_func = clean_up_lock.release_lock
 else:
-    SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
+    SESSION_POOL = AsyncLocalDict()
+    USER_POOL = AsyncLocalDict()
+    USAGE_POOL = AsyncLocalDict()
+
+    async def aquire_func():
+        return True
+
+    renew_func = release_func = aquire_func
+
+
+async def emit_chat_events(session_id, chat_id, message_id, events):
+    if len(events) == 1:
+        await sio.emit(
+            "chat-events",
+            {"chat_id": chat_id, "message_id": message_id, "data": events[0]},
+            to=session_id,
+        )
+    else:
+        await sio.emit(
+            "chat-events:batch",
+            {"chat_id": chat_id, "message_id": message_id, "events": events},
+            to=session_id,
+        )
+
 
-    aquire_func = release_func = renew_func = lambda: True
+CHAT_EVENT_BATCHER = EventBatcher(
+    emit_chat_events, interval=WEBSOCKET_EVENT_BATCH_INTERVAL
+)
 
 
 YDOC_MANAGER = YdocManager(
     redis=REDIS,
+    redis_binary=(
+        get_redis_connection(
+            redis_url=WEBSOCKET_REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
+            ),
+            redis_cluster=WEBSOCKET_REDIS_CLUSTER,
+            async_mode=True,
+            decode_responses=False,
+        )
+        if REDIS
+        else None
+    ),
     redis_key_prefix=f"{REDIS_KEY_PREFIX}:ydoc:documents",
+    redis_session_key_prefix=f"{REDIS_KEY_PREFIX}:ydoc:sessions",
 )
 
 
@@ -143,7 +189,7 @@ async def periodic_usage_pool_cleanup():
         WEBSOCKET_REDIS_LOCK_TIMEOUT / 2, WEBSOCKET_REDIS_LOCK_TIMEOUT
     )
     for attempt in range(max_retries + 1):
-        if aquire_func():
+        if await aquire_func():
             break
         else:
             if attempt < max_retries:
@@ -160,33 +206,67 @@ async def periodic_usage_pool_cleanup():
     log.debug("Running periodic_cleanup")
     try:
         while True:
-            if not renew_func():
+            if not await renew_func():
                 log.error(f"Unable to renew cleanup lock. Exiting usage pool cleanup.")
                 raise Exception("Unable to renew usage pool cleanup lock.")
 
             now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
+            updated = {}
+            expired_models = []
+            for model_id, connections in await USAGE_POOL.items():
                 # Creating a list of sids to remove if they have timed out
                 expired_sids = [
                     sid
                     for sid, details in connections.items()
                     if now - details["updated_at"] > TIMEOUT_DURATION
                 ]
+                if not expired_sids:
+                    continue
 
                 for sid in expired_sids:
                     del connections[sid]
 
                 if not connections:
                     log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
+                    expired_models.append(model_id)
                 else:
-                    USAGE_POOL[model_id] = connections
+                    updated[model_id] = connections
 
-                send_usage = True
+            # One round trip for all the models instead of one per model
+            await USAGE_POOL.update(updated)
+            await USAGE_POOL.delete_many(expired_models)
             await asyncio.sleep(TIMEOUT_DURATION)
     finally:
-        release_func()
+        await release_func()
+
+
+async def get_active_session_ids(session_ids: list[str]) -> set[str]:
+    users = await SESSION_POOL.get_many(session_ids)
+    return {
+        session_id for session_id, user in zip(session_ids, users) if user is not None
+    }
+
+
+async def periodic_ydoc_cleanup():
+    if YDOC_CLEANUP_INTERVAL <= 0:
+        return
+
+    while True:
+        await asyncio.sleep(YDOC_CLEANUP_INTERVAL)
+
+        # A single instance cleans up per interval
+        if REDIS and not await REDIS.set(
+            f"{REDIS_KEY_PREFIX}:ydoc:cleanup_lock",
+            1,
+            nx=True,
+            ex=YDOC_CLEANUP_INTERVAL,
+        ):
+            continue
+
+        try:
+            await YDOC_MANAGER.cleanup(get_active_session_ids)
+        except Exception as e:
+            log.exception(f"Error cleaning up collaborative documents: {e}")
 
 
 app = socketio.ASGIApp(
@@ -195,24 +275,29 @@ app = socketio.ASGIApp(
 )
 
 
-def get_models_in_use():
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
+    models_in_use = await USAGE_POOL.keys()
     return models_in_use
 
 
-def get_active_user_ids():
+async def get_active_user_ids():
     """Get the list of active user IDs."""
-    return list(USER_POOL.keys())
+    return await USER_POOL.keys()
 
 
-def get_user_active_status(user_id):
+def get_active_user_count():
+    """Count the active users without the event loop, e.g. from metric callbacks."""
+    return USER_POOL.len_sync()
+
+
+async def get_user_active_status(user_id):
     """Check if a user is currently active."""
-    return user_id in USER_POOL
+    return await USER_POOL.contains(user_id)
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await SESSION_POOL.get(sid)
     if user:
         return user["id"]
     return None
@@ -227,33 +312,40 @@ def get_session_ids_from_room(room):
     return [session_id[0] for session_id in active_session_ids]
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = get_session_ids_from_room(room)
 
     active_user_ids = list(
-        set([SESSION_POOL.get(session_id)["id"] for session_id in active_session_ids])
+        set(
+            [
+                user["id"]
+                for user in await SESSION_POOL.get_many(active_session_ids)
+                if user
+            ]
+        )
     )
     return active_user_ids
 
 
-def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
-        return True
-    return False
+async def get_active_status_by_user_id(user_id):
+    return await USER_POOL.contains(user_id)
 
 
 @sio.on("usage")
 async def usage(sid, data):
-    if sid in SESSION_POOL:
+    if await SESSION_POOL.contains(sid):
         model_id = data["model"]
         # Record the timestamp for the last update
         current_time = int(time.time())
 
         # Store the new usage data and task
-        USAGE_POOL[model_id] = {
-            **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-            sid: {"updated_at": current_time},
-        }
+        await USAGE_POOL.set(
+            model_id,
+            {
+                **await USAGE_POOL.get(model_id, {}),
+                sid: {"updated_at": current_time},
+            },
+        )
 
 
 @sio.event
@@ -266,13 +358,12 @@ async def connect(sid, environ, auth):
             user = Users.get_user_by_id(data["id"])
 
         if user:
-            SESSION_POOL[sid] = user.model_dump(
-                exclude=["date_of_birth", "bio", "gender"]
+            await SESSION_POOL.set(
+                sid, user.model_dump(exclude=["date_of_birth", "bio", "gender"])
+            )
+            await USER_POOL.set(
+                user.id, await USER_POOL.get(user.id, [], cached=False) + [sid]
             )
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
 
 
 @sio.on("user-join")
@@ -290,11 +381,10 @@ async def user_join(sid, data):
     if not user:
         return
 
-    SESSION_POOL[sid] = user.model_dump(exclude=["date_of_birth", "bio", "gender"])
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    await SESSION_POOL.set(
+        sid, user.model_dump(exclude=["date_of_birth", "bio", "gender"])
+    )
+    await USER_POOL.set(user.id, await USER_POOL.get(user.id, [], cached=False) + [sid])
 
     # Join all the channels
     channels = Channels.get_channels_by_user_id(user.id)
@@ -378,7 +468,7 @@ async def channel_events(sid, data):
                 "channel_id": data["channel_id"],
                 "message_id": data.get("message_id", None),
                 "data": event_data,
-                "user": UserNameResponse(**SESSION_POOL[sid]).model_dump(),
+                "user": UserNameResponse(**await SESSION_POOL.get(sid)).model_dump(),
             },
             room=room,
         )
@@ -387,7 +477,7 @@ async def channel_events(sid, data):
 @sio.on("ydoc:document:join")
 async def ydoc_document_join(sid, data):
     """Handle user joining a document"""
-    user = SESSION_POOL.get(sid)
+    user = await SESSION_POOL.get(sid)
 
     try:
         document_id = data["document_id"]
@@ -423,14 +513,8 @@ async def ydoc_document_join(sid, data):
 
         active_session_ids = get_session_ids_from_room(f"doc_{document_id}")
 
-        # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
-
-        # Encode the entire document state as an update
-        state_update = ydoc.get_update()
+        # Get the entire Yjs document state encoded as an update
+        state_update = await YDOC_MANAGER.get_state(document_id)
         await sio.emit(
             "ydoc:document:state",
             {
@@ -499,14 +583,8 @@ async def yjs_document_state(sid, data):
             log.warning(f"Document {document_id} not found")
             return
 
-        # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
-
-        # Encode the entire document state as an update
-        state_update = ydoc.get_update()
+        # Get the entire Yjs document state encoded as an update
+        state_update = await YDOC_MANAGER.get_state(document_id)
 
         await sio.emit(
             "ydoc:document:state",
@@ -557,7 +635,7 @@ async def yjs_document_update(sid, data):
         async def debounced_save():
             await asyncio.sleep(0.5)
             await document_save_handler(
-                document_id, data.get("data", {}), SESSION_POOL.get(sid)
+                document_id, data.get("data", {}), await SESSION_POOL.get(sid)
             )
 
         if data.get("data"):
@@ -622,15 +700,21 @@ async def yjs_awareness_update(sid, data):
 
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
+    user = await SESSION_POOL.get(sid)
+    if user:
+        await SESSION_POOL.delete(sid)
 
         user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
+        session_ids = [
+            _sid
+            for _sid in await USER_POOL.get(user_id, [], cached=False)
+            if _sid != sid
+        ]
 
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
+        if session_ids:
+            await USER_POOL.set(user_id, session_ids)
+        else:
+            await USER_POOL.delete(user_id)
 
         await YDOC_MANAGER.remove_user_from_all_documents(sid)
     else:
@@ -644,7 +728,7 @@ def get_event_emitter(request_info, update_db=True):
 
         session_ids = list(
             set(
-                USER_POOL.get(user_id, [])
+                await USER_POOL.get(user_id, [])
                 + (
                     [request_info.get("session_id")]
                     if request_info.get("session_id")
@@ -653,99 +737,64 @@ def get_event_emitter(request_info, update_db=True):
             )
         )
 
-        emit_tasks = [
-            sio.emit(
-                "chat-events",
-                {
-                    "chat_id": request_info.get("chat_id", None),
-                    "message_id": request_info.get("message_id", None),
-                    "data": event_data,
-                },
-                to=session_id,
-            )
-            for session_id in session_ids
-        ]
-
-        await asyncio.gather(*emit_tasks)
+        await asyncio.gather(
+            *[
+                CHAT_EVENT_BATCHER.add(
+                    session_id,
+                    request_info.get("chat_id", None),
+                    request_info.get("message_id", None),
+                    event_data,
+                )
+                for session_id in session_ids
+            ]
+        )
 
         if update_db:
+            chat_id = request_info.get("chat_id")
+            message_id = request_info.get("message_id")
+
             if "type" in event_data and event_data["type"] == "status":
-                Chats.add_message_status_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    event_data.get("data", {}),
+                MESSAGE_WRITE_BUFFER.add_status(
+                    chat_id, message_id, event_data.get("data", {})
                 )
 
             if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
+                MESSAGE_WRITE_BUFFER.append_content(
+                    chat_id,
+                    message_id,
+                    event_data.get("data", {}).get("content", ""),
                 )
 
-                if message:
-                    content = message.get("content", "")
-                    content += event_data.get("data", {}).get("content", "")
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "content": content,
-                        },
-                    )
-
             if "type" in event_data and event_data["type"] == "replace":
                 content = event_data.get("data", {}).get("content", "")
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
+                MESSAGE_WRITE_BUFFER.update_message(
+                    chat_id,
+                    message_id,
                     {
                         "content": content,
                     },
                 )
 
             if "type" in event_data and event_data["type"] == "files":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
-
-                files = event_data.get("data", {}).get("files", [])
-                files.extend(message.get("files", []))
-
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "files": files,
-                    },
+                MESSAGE_WRITE_BUFFER.add_files(
+                    chat_id, message_id, event_data.get("data", {}).get("files", [])
                 )
 
             if event_data.get("type") in ["source", "citation"]:
                 data = event_data.get("data", {})
                 if data.get("type") == None:
-                    message = Chats.get_message_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                    )
-
-                    sources = message.get("sources", [])
-                    sources.append(data)
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "sources": sources,
-                        },
-                    )
+                    MESSAGE_WRITE_BUFFER.add_source(chat_id, message_id, data)
 
     return __event_emitter__
 
 
 def get_event_call(request_info):
     async def __event_caller__(event_data):
+        # Deliver the events emitted so far before the call itself
+        await CHAT_EVENT_BATCHER.flush_message(
+            request_info.get("chat_id", None), request_info.get("message_id", None)
+        )
         response = await sio.call(
             "chat-events",
             {
@@ -1,10 +1,22 @@
+import asyncio
+import copy
 import json
+import logging
+import time
 import uuid
 from open_webui.utils.redis import get_redis_connection
-from open_webui.env import REDIS_KEY_PREFIX
-from typing import Optional, List, Tuple
+from open_webui.env import (
+    REDIS_KEY_PREFIX,
+    SRC_LOG_LEVELS,
+    WEBSOCKET_REDIS_LOCK_TIMEOUT,
+    YDOC_COMPACTION_THRESHOLD,
+)
+from typing import Awaitable, Callable, Optional, List, Tuple
 import pycrdt as Y
 
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
+
 
 class RedisLock:
     def __init__(
@@ -24,26 +36,27 @@ class RedisLock:
             redis_url,
             redis_sentinels,
             redis_cluster=redis_cluster,
+            async_mode=True,
             decode_responses=True,
         )
 
-    def aquire_lock(self):
+    async def aquire_lock(self):
         # nx=True will only set this key if it _hasn't_ already been set
-        self.lock_obtained = self.redis.set(
+        self.lock_obtained = await self.redis.set(
             self.lock_name, self.lock_id, nx=True, ex=self.timeout_secs
         )
         return self.lock_obtained
 
-    def renew_lock(self):
+    async def renew_lock(self):
         # xx=True will only set this key if it _has_ already been set
-        return self.redis.set(
+        return await self.redis.set(
             self.lock_name, self.lock_id, xx=True, ex=self.timeout_secs
         )
 
-    def release_lock(self):
-        lock_value = self.redis.get(self.lock_name)
+    async def release_lock(self):
+        lock_value = await self.redis.get(self.lock_name)
         if lock_value and lock_value == self.lock_id:
-            self.redis.delete(self.lock_name)
+            await self.redis.delete(self.lock_name)
 
 
 class RedisDict:
@@ -108,45 +121,444 @@ class RedisDict:
         return self[key]
 
 
+class AsyncLocalDict:
+    """In-memory counterpart of `AsyncRedisDict` for single-instance setups."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key, default=None, cached=True):
+        return self.data.get(key, default)
+
+    async def get_many(self, keys) -> list:
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value):
+        self.data[key] = value
+
+    async def update(self, mapping: dict):
+        self.data.update(mapping)
+
+    async def delete(self, key) -> bool:
+        return self.data.pop(key, None) is not None
+
+    async def delete_many(self, keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def contains(self, key, cached=True) -> bool:
+        return key in self.data
+
+    async def keys(self) -> list:
+        return list(self.data.keys())
+
+    async def items(self) -> list:
+        return list(self.data.items())
+
+    async def len(self) -> int:
+        return len(self.data)
+
+    def len_sync(self) -> int:
+        return len(self.data)
+
+
+class AsyncRedisDict:
+    """
+    Redis hash of JSON values, accessed with the asyncio client so that socket
+    handlers never block the event loop on Redis. Operations on several keys
+    are single commands (HMGET, HSET with a mapping, HDEL with several keys).
+
+    With `near_cache_ttl`, values read with `get` or `contains` are kept in a
+    per-process cache for that many seconds; writes through this instance
+    update it, writes by other instances show up once it expires. Reads that
+    are modified and written back must pass `cached=False`.
+    """
+
+    def __init__(
+        self,
+        name,
+        redis_url,
+        redis_sentinels=[],
+        redis_cluster=False,
+        near_cache_ttl: float = 0,
+    ):
+        self.name = name
+        self.redis = get_redis_connection(
+            redis_url,
+            redis_sentinels,
+            redis_cluster=redis_cluster,
+            async_mode=True,
+            decode_responses=True,
+        )
+        # Blocking view of the same hash for callers outside the event loop
+        self.sync_redis = get_redis_connection(
+            redis_url,
+            redis_sentinels,
+            redis_cluster=redis_cluster,
+            decode_responses=True,
+        )
+
+        self.near_cache_ttl = near_cache_ttl
+        self.near_cache: dict[str, Tuple[float, object]] = {}
+
+    def _cache_get(self, key):
+        entry = self.near_cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry
+        return None
+
+    def _cache_set(self, key, value):
+        if self.near_cache_ttl > 0:
+            self.near_cache[key] = (time.monotonic() + self.near_cache_ttl, value)
+
+    async def get(self, key, default=None, cached=True):
+        if cached:
+            entry = self._cache_get(key)
+            if entry is not None:
+                value = entry[1]
+                return default if value is None else copy.deepcopy(value)
+
+        value = await self.redis.hget(self.name, key)
+        value = json.loads(value) if value is not None else None
+        self._cache_set(key, value)
+        return default if value is None else copy.deepcopy(value)
+
+    async def get_many(self, keys) -> list:
+        keys = list(keys)
+        if not keys:
+            return []
+        values = await self.redis.hmget(self.name, keys)
+        return [json.loads(value) if value is not None else None for value in values]
+
+    async def set(self, key, value):
+        await self.redis.hset(self.name, key, json.dumps(value))
+        self._cache_set(key, copy.deepcopy(value))
+
+    async def update(self, mapping: dict):
+        if not mapping:
+            return
+        await self.redis.hset(
+            self.name,
+            mapping={key: json.dumps(value) for key, value in mapping.items()},
+        )
+        for key, value in mapping.items():
+            self._cache_set(key, copy.deepcopy(value))
+
+    async def delete(self, key) -> bool:
+        self.near_cache.pop(key, None)
+        return await self.redis.hdel(self.name, key) > 0
+
+    async def delete_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        for key in keys:
+            self.near_cache.pop(key, None)
+        await self.redis.hdel(self.name, *keys)
+
+    async def contains(self, key, cached=True) -> bool:
+        return await self.get(key, cached=cached) is not None
+
+    async def keys(self) -> list:
+        return await self.redis.hkeys(self.name)
+
+    async def items(self) -> list:
+        return [
+            (key, json.loads(value))
+            for key, value in (await self.redis.hgetall(self.name)).items()
+        ]
+
+    async def len(self) -> int:
+        return await self.redis.hlen(self.name)
+
+    def len_sync(self) -> int:
+        return self.sync_redis.hlen(self.name)
+
+
+def is_terminal_event(event_data: dict) -> bool:
+    """Whether the event ends or aborts the message, so it must not be delayed."""
+    event_type = event_data.get("type")
+    data = event_data.get("data")
+    if event_type in ("chat:message:error", "task-cancelled"):
+        return True
+    if isinstance(data, dict):
+        if event_type == "chat:completion" and data.get("done"):
+            return True
+        if data.get("error"):
+            return True
+    return False
+
+
+class EventBatch:
+    def __init__(self):
+        self.events: list[dict] = []
+        self.lock = asyncio.Lock()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class EventBatcher:
+    """
+    Coalesces the events sent to one (session, chat, message) within
+    `interval` seconds into a single emit, so streaming a response costs one
+    emit, and with the Redis manager one publish, per interval instead of one
+    per token.
+
+    `emit(session_id, chat_id, message_id, events)` sends the events in order.
+    Terminal events (see `is_terminal_event`) flush the batch immediately, as
+    does reaching `max_size` events. An `interval` of 0 disables batching.
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[str, Optional[str], Optional[str], list[dict]], Awaitable],
+        interval: float,
+        max_size: int = 256,
+    ):
+        self.emit = emit
+        self.interval = interval
+        self.max_size = max_size
+        self.batches: dict[tuple, EventBatch] = {}
+
+    async def add(
+        self,
+        session_id: str,
+        chat_id: Optional[str],
+        message_id: Optional[str],
+        event_data: dict,
+    ):
+        key = (session_id, chat_id, message_id)
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = self.batches[key] = EventBatch()
+        batch.events.append(event_data)
+
+        if (
+            self.interval <= 0
+            or len(batch.events) >= self.max_size
+            or is_terminal_event(event_data)
+        ):
+            await self.flush(key)
+        elif batch.timer is None:
+            batch.timer = asyncio.get_running_loop().call_later(
+                self.interval, lambda: asyncio.create_task(self._flush_later(key))
+            )
+
+    async def _flush_later(self, key: tuple):
+        try:
+            await self.flush(key)
+        except Exception as e:
+            log.warning(f"Error emitting batched events: {e}")
+
+    async def flush(self, key: tuple):
+        batch = self.batches.get(key)
+        if batch is None:
+            return
+
+        # The lock keeps batches of the same key in order while one is emitted
+        async with batch.lock:
+            if batch.timer is not None:
+                batch.timer.cancel()
+                batch.timer = None
+
+            events, batch.events = batch.events, []
+            if events:
+                await self.emit(*key, events)
+
+            # Events added while emitting stay in this batch for its timer
+            if not batch.events and self.batches.get(key) is batch:
+                del self.batches[key]
+
+    async def flush_message(self, chat_id: Optional[str], message_id: Optional[str]):
+        """Flush the pending events of a message for every session."""
+        for key in [key for key in self.batches if key[1:] == (chat_id, message_id)]:
+            await self.flush(key)
+
+
+def merge_ydoc_updates(updates: List[bytes]) -> bytes:
+    """Merge Yjs updates into a single update encoding the whole document."""
+    ydoc = Y.Doc()
+    for update in updates:
+        ydoc.apply_update(update)
+    return ydoc.get_update()
+
+
+def decode_ydoc_update(update: bytes) -> bytes:
+    # Updates used to be stored as JSON arrays of byte values
+    if update.startswith(b"[") and update.endswith(b"]"):
+        try:
+            return bytes(json.loads(update))
+        except ValueError:
+            pass
+    return update
+
+
 class YdocManager:
+    """
+    Stores the Yjs updates of collaborative documents, in memory or in Redis.
+
+    Updates are appended as binary to a log. Once the log holds `compaction_threshold`
+    updates, they are merged in the background into the snapshot of the document,
+    a single update encoding its whole state, and removed from the log. Joining
+    a document then only merges the snapshot with the updates since, and stores
+    the result as the new snapshot.
+
+    With Redis, `redis_binary` is a client that does not decode responses, used
+    for the updates and snapshots, while the users of a document are kept through
+    `redis`.
+
+    The users of documents are socket sessions. Each session also has an index
+    of the documents it joined, so that its disconnect only touches those.
+    """
+
     def __init__(
         self,
         redis=None,
+        redis_binary=None,
         redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:ydoc:documents",
+        redis_session_key_prefix: str = f"{REDIS_KEY_PREFIX}:ydoc:sessions",
+        compaction_threshold: int = YDOC_COMPACTION_THRESHOLD,
     ):
         self._updates = {}
+        self._snapshots = {}
         self._users = {}
+        # Session id -> ids of the documents it joined
+        self._documents = {}
         self._redis = redis
+        self._redis_binary = redis_binary
         self._redis_key_prefix = redis_key_prefix
+        self._redis_session_key_prefix = redis_session_key_prefix
+        self._compaction_threshold = compaction_threshold
+
+        # Documents being compacted by this process, and their tasks
+        self._compacting = set()
+        self._tasks = set()
+
+    def _get_key(self, document_id: str, name: str) -> str:
+        return f"{self._redis_key_prefix}:{document_id}:{name}"
 
     async def append_to_updates(self, document_id: str, update: bytes):
         document_id = document_id.replace(":", "_")
+        update = bytes(update)
+
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.rpush(redis_key, json.dumps(list(update)))
+            length = await self._redis_binary.rpush(
+                self._get_key(document_id, "updates"), update
+            )
         else:
             if document_id not in self._updates:
                 self._updates[document_id] = []
             self._updates[document_id].append(update)
+            length = len(self._updates[document_id])
+
+        if (
+            self._compaction_threshold > 0
+            and length >= self._compaction_threshold
+            and document_id not in self._compacting
+        ):
+            task = asyncio.create_task(self.compact(document_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _read(self, document_id: str) -> Tuple[Optional[bytes], List[bytes]]:
+        """The snapshot of a document and the updates appended since."""
+        if self._redis:
+            pipe = self._redis_binary.pipeline(transaction=False)
+            pipe.get(self._get_key(document_id, "snapshot"))
+            pipe.lrange(self._get_key(document_id, "updates"), 0, -1)
+            snapshot, updates = await pipe.execute()
+            return snapshot, [decode_ydoc_update(update) for update in updates]
+        else:
+            return self._snapshots.get(document_id), list(
+                self._updates.get(document_id, [])
+            )
 
     async def get_updates(self, document_id: str) -> List[bytes]:
         document_id = document_id.replace(":", "_")
 
-        if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            updates = await self._redis.lrange(redis_key, 0, -1)
-            return [bytes(json.loads(update)) for update in updates]
-        else:
-            return self._updates.get(document_id, [])
+        snapshot, updates = await self._read(document_id)
+        return ([snapshot] if snapshot else []) + updates
+
+    async def get_state(self, document_id: str) -> bytes:
+        """
+        The whole state of a document encoded as a single update. When updates
+        were appended since the snapshot, the merged state becomes the snapshot.
+        """
+        document_id = document_id.replace(":", "_")
+
+        snapshot, updates = await self._read(document_id)
+        if snapshot and not updates:
+            return snapshot
+
+        state = await self.compact(document_id)
+        if state is None:
+            # Another process is compacting the document
+            state = await asyncio.to_thread(
+                merge_ydoc_updates, ([snapshot] if snapshot else []) + updates
+            )
+        return state
+
+    async def compact(self, document_id: str) -> Optional[bytes]:
+        """
+        Merge the snapshot and the updates of a document into a new snapshot, and
+        return it. Updates appended meanwhile are kept. Returns None when the
+        document is already being compacted.
+        """
+        document_id = document_id.replace(":", "_")
+        if document_id in self._compacting:
+            return None
+
+        lock_key = self._get_key(document_id, "compacting")
+        if self._redis and not await self._redis.set(
+            lock_key, 1, nx=True, ex=WEBSOCKET_REDIS_LOCK_TIMEOUT
+        ):
+            return None
+
+        self._compacting.add(document_id)
+        try:
+            snapshot, updates = await self._read(document_id)
+            state = await asyncio.to_thread(
+                merge_ydoc_updates, ([snapshot] if snapshot else []) + updates
+            )
+            if not updates:
+                return state
+
+            if self._redis:
+                # Merged updates are only removed once the snapshot holds them;
+                # if this is interrupted in between, they are applied twice,
+                # which Yjs ignores.
+                await self._redis_binary.set(
+                    self._get_key(document_id, "snapshot"), state
+                )
+                await self._redis_binary.ltrim(
+                    self._get_key(document_id, "updates"), len(updates), -1
+                )
+            elif document_id in self._updates:
+                self._snapshots[document_id] = state
+                self._updates[document_id] = self._updates[document_id][len(updates) :]
+
+            log.debug(
+                f"Compacted {len(updates)} updates of document {document_id} "
+                f"into a snapshot of {len(state)} bytes"
+            )
+            return state
+        finally:
+            self._compacting.discard(document_id)
+            if self._redis:
+                await self._redis.delete(lock_key)
 
     async def document_exists(self, document_id: str) -> bool:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            return await self._redis.exists(redis_key) > 0
+            return (
+                await self._redis_binary.exists(
+                    self._get_key(document_id, "updates"),
+                    self._get_key(document_id, "snapshot"),
+                )
+                > 0
+            )
         else:
-            return document_id in self._updates
+            return document_id in self._updates or document_id in self._snapshots
 
     async def get_users(self, document_id: str) -> List[str]:
         document_id = document_id.replace(":", "_")
@@ -158,57 +570,151 @@ class YdocManager:
         else:
             return self._users.get(document_id, [])
 
+    def _get_session_key(self, user_id: str) -> str:
+        return f"{self._redis_session_key_prefix}:{user_id}:documents"
+
     async def add_user(self, document_id: str, user_id: str):
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.sadd(redis_key, user_id)
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.sadd(self._get_key(document_id, "users"), user_id)
+            pipe.sadd(self._get_session_key(user_id), document_id)
+            await pipe.execute()
         else:
             if document_id not in self._users:
                 self._users[document_id] = set()
             self._users[document_id].add(user_id)
+            self._documents.setdefault(user_id, set()).add(document_id)
 
     async def remove_user(self, document_id: str, user_id: str):
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.srem(redis_key, user_id)
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.srem(self._get_key(document_id, "users"), user_id)
+            pipe.srem(self._get_session_key(user_id), document_id)
+            await pipe.execute()
         else:
             if document_id in self._users and user_id in self._users[document_id]:
                 self._users[document_id].remove(user_id)
+            if user_id in self._documents:
+                self._documents[user_id].discard(document_id)
+                if not self._documents[user_id]:
+                    del self._documents[user_id]
 
     async def remove_user_from_all_documents(self, user_id: str):
+        """
+        Remove a session from the documents it joined, found through its index
+        of documents, and clear the documents it was the last session of.
+        """
         if self._redis:
-            keys = await self._redis.keys(f"{self._redis_key_prefix}:*")
-            for key in keys:
-                if key.endswith(":users"):
-                    await self._redis.srem(key, user_id)
-
-                    document_id = key.split(":")[-2]
-                    if len(await self.get_users(document_id)) == 0:
+            session_key = self._get_session_key(user_id)
+            document_ids = list(await self._redis.smembers(session_key))
+
+            if document_ids:
+                pipe = self._redis.pipeline(transaction=False)
+                for document_id in document_ids:
+                    pipe.srem(self._get_key(document_id, "users"), user_id)
+                    pipe.scard(self._get_key(document_id, "users"))
+                results = await pipe.execute()
+
+                for document_id, count in zip(document_ids, results[1::2]):
+                    if count == 0:
                         await self.clear_document(document_id)
 
+            await self._redis.delete(session_key)
+
         else:
-            for document_id in list(self._users.keys()):
-                if user_id in self._users[document_id]:
+            for document_id in self._documents.pop(user_id, set()):
+                if user_id in self._users.get(document_id, set()):
                     self._users[document_id].remove(user_id)
                     if not self._users[document_id]:
                         del self._users[document_id]
 
                         await self.clear_document(document_id)
 
+    async def _scan(self, match: str, count: int = 100):
+        """Yield the keys matching `match` in batches, without blocking Redis."""
+        batch = []
+        async for key in self._redis.scan_iter(match=match, count=count):
+            batch.append(key)
+            if len(batch) >= count:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def cleanup(self, get_active_user_ids: Callable[[List[str]], Awaitable[set]]):
+        """
+        Remove the sessions that are gone without leaving their documents, e.g.
+        because their worker stopped, and clear the documents left without
+        sessions. `get_active_user_ids` returns which of the given sessions are
+        still connected. With Redis, keys are walked with SCAN.
+        """
+        if not self._redis:
+            user_ids = list(self._documents.keys())
+            active_user_ids = await get_active_user_ids(user_ids) if user_ids else set()
+            for user_id in user_ids:
+                if user_id not in active_user_ids:
+                    await self.remove_user_from_all_documents(user_id)
+
+            for document_id in {*self._updates, *self._snapshots}:
+                if not self._users.get(document_id):
+                    await self.clear_document(document_id)
+            return
+
+        session_prefix = f"{self._redis_session_key_prefix}:"
+        async for keys in self._scan(f"{session_prefix}*:documents"):
+            user_ids = [key[len(session_prefix) : -len(":documents")] for key in keys]
+            active_user_ids = await get_active_user_ids(user_ids)
+            for user_id in user_ids:
+                if user_id not in active_user_ids:
+                    await self.remove_user_from_all_documents(user_id)
+
+        # Documents can also be left over by sessions that joined them before
+        # sessions were indexed, or be written to after they were cleared
+        document_prefix = f"{self._redis_key_prefix}:"
+        async for keys in self._scan(f"{document_prefix}*"):
+            document_ids = {
+                document_id
+                for document_id, _, name in (
+                    key[len(document_prefix) :].rpartition(":") for key in keys
+                )
+                if name in ("updates", "snapshot", "users")
+            }
+            for document_id in document_ids:
+                user_ids = await self.get_users(document_id)
+                active_user_ids = (
+                    await get_active_user_ids(user_ids) if user_ids else set()
+                )
+
+                if not active_user_ids:
+                    log.debug(f"Cleaning up orphaned document {document_id}")
+                    await self.clear_document(document_id)
+                elif len(active_user_ids) < len(user_ids):
+                    await self._redis.srem(
+                        self._get_key(document_id, "users"),
+                        *[
+                            user_id
+                            for user_id in user_ids
+                            if user_id not in active_user_ids
+                        ],
+                    )
+
     async def clear_document(self, document_id: str):
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.delete(redis_key)
-            redis_users_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.delete(redis_users_key)
+            await self._redis.delete(
+                self._get_key(document_id, "updates"),
+                self._get_key(document_id, "snapshot"),
+                self._get_key(document_id, "users"),
+            )
         else:
             if document_id in self._updates:
                 del self._updates[document_id]
+            if document_id in self._snapshots:
+                del self._snapshots[document_id]
             if document_id in self._users:
                 del self._users[document_id]
@@ -0,0 +1,205 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class CacheEntry:
+    def __init__(self, path: str, size: int, version: Optional[str]):
+        self.path = path
+        self.size = size
+        # ETag or generation of the remote object, None until it is known
+        self.version = version
+        self.validated_at = time.monotonic()
+        # Number of callers using the file, which is not evicted meanwhile
+        self.pins = 0
+
+
+class FileCache:
+    """
+    Size-bounded LRU cache of remote objects downloaded to local disk.
+
+    Entries are revalidated against the remote version (ETag or generation)
+    once they are older than `validation_ttl` seconds and downloaded again if
+    it changed. Concurrent misses for the same key share a single download.
+    Cached files live at the local paths chosen by the caller; evicting an
+    entry deletes its file. Entries returned by `get(..., pin=True)` are not
+    evicted until they are `release`d, so the cache may exceed `max_size`
+    while their files are in use.
+    """
+
+    def __init__(self, max_size: int, validation_ttl: float = 60):
+        self.max_size = max_size
+        self.validation_ttl = validation_ttl
+
+        self.entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.key_locks: dict[str, list] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _acquire_key_lock(self, key: str) -> threading.Lock:
+        with self.lock:
+            if key not in self.key_locks:
+                self.key_locks[key] = [threading.Lock(), 0]
+            self.key_locks[key][1] += 1
+            key_lock = self.key_locks[key][0]
+        key_lock.acquire()
+        return key_lock
+
+    def _release_key_lock(self, key: str, key_lock: threading.Lock):
+        key_lock.release()
+        with self.lock:
+            self.key_locks[key][1] -= 1
+            if not self.key_locks[key][1]:
+                del self.key_locks[key]
+
+    def _count(self, name: str):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _remove(self, key: str) -> Optional[CacheEntry]:
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.size -= entry.size
+        return entry
+
+    def _add(self, key: str, entry: CacheEntry):
+        with self.lock:
+            replaced = self._remove(key)
+            if replaced:
+                # Callers still using the former copy release this entry
+                entry.pins += replaced.pins
+            self.entries[key] = entry
+            self.size += entry.size
+
+        self._evict(keep=key)
+
+    def _evict(self, keep: Optional[str] = None):
+        evicted = []
+        with self.lock:
+            for evicted_key, evicted_entry in list(self.entries.items()):
+                if self.size <= self.max_size or evicted_key == keep:
+                    break
+                if evicted_entry.pins:
+                    continue
+                self._remove(evicted_key)
+                self.evictions += 1
+                evicted.append(evicted_entry)
+
+        for evicted_entry in evicted:
+            try:
+                os.remove(evicted_entry.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.warning(f"Failed to evict {evicted_entry.path}: {e}")
+
+    def get(
+        self,
+        key: str,
+        path: str,
+        get_version: Callable[[], Optional[str]],
+        download: Callable[[str], None],
+        pin: bool = False,
+    ) -> str:
+        """
+        Return `path` holding a current copy of the object `key`. `get_version`
+        returns the remote version of the object and `download` writes the
+        object to the given path. With `pin`, the file is kept until `release`
+        is called for `key`.
+        """
+        key_lock = self._acquire_key_lock(key)
+        try:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry:
+                    self.entries.move_to_end(key)
+
+            if entry and entry.path == path and os.path.isfile(path):
+                if (
+                    entry.version is not None
+                    and time.monotonic() - entry.validated_at < self.validation_ttl
+                ):
+                    self._count("hits")
+                    return self._pin(entry) if pin else path
+
+                version = get_version()
+                if entry.version is None or version == entry.version:
+                    entry.version = version
+                    entry.validated_at = time.monotonic()
+                    self._count("hits")
+                    return self._pin(entry) if pin else path
+
+            self._count("misses")
+            version = get_version()
+
+            # Download next to the target and move it in place once complete
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            try:
+                download(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            entry = CacheEntry(path, os.path.getsize(path), version)
+            if pin:
+                # Pinned before it is added, so that it can not be evicted first
+                entry.pins = 1
+            self._add(key, entry)
+            return path
+        finally:
+            self._release_key_lock(key, key_lock)
+
+    def _pin(self, entry: CacheEntry) -> str:
+        with self.lock:
+            entry.pins += 1
+        return entry.path
+
+    def release(self, key: str):
+        """Unpin a file returned by `get(..., pin=True)`."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if not (entry and entry.pins):
+                return
+            entry.pins -= 1
+
+        # Catch up on evictions that were held back while the file was pinned
+        self._evict()
+
+    def put(self, key: str, path: str, version: Optional[str] = None):
+        """Add a local copy that is known to match the remote object, e.g. after an upload."""
+        if os.path.isfile(path):
+            self._add(key, CacheEntry(path, os.path.getsize(path), version))
+
+    def discard(self, key: str):
+        with self.lock:
+            self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "size": self.size,
+                "max_size": self.max_size,
+            }
@@ -1,12 +1,15 @@
 import os
 import shutil
 import json
+import hashlib
 import logging
 import re
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Tuple, Dict
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Tuple, Dict
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from open_webui.config import (
@@ -25,11 +28,15 @@ from open_webui.config import (
     AZURE_STORAGE_CONTAINER_NAME,
     AZURE_STORAGE_KEY,
     STORAGE_PROVIDER,
+    STORAGE_UPLOAD_CHUNK_SIZE,
+    STORAGE_CACHE_MAX_SIZE,
+    STORAGE_CACHE_VALIDATION_TTL,
     UPLOAD_DIR,
 )
 from google.cloud import storage
 from google.cloud.exceptions import GoogleCloudError, NotFound
 from open_webui.constants import ERROR_MESSAGES
+from open_webui.storage.cache import FileCache
 from azure.identity import DefaultAzureCredential
 from azure.storage.blob import BlobServiceClient
 from azure.core.exceptions import ResourceNotFoundError
@@ -39,18 +46,51 @@ from open_webui.env import SRC_LOG_LEVELS
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+# Smallest part size accepted by S3 multipart uploads
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+
+# GCS resumable uploads require chunks in multiples of 256 KiB
+GCS_CHUNK_SIZE_MULTIPLE = 256 * 1024
+
 
 class StorageProvider(ABC):
     @abstractmethod
-    def get_file(self, file_path: str) -> str:
+    def get_file(self, file_path: str, pin: bool = False) -> str:
+        """
+        Local path of the file. With `pin`, a cached copy is kept until
+        `release_file` is called.
+        """
+        pass
+
+    def release_file(self, file_path: str) -> None:
+        """Unpin a file returned by `get_file(..., pin=True)`."""
         pass
 
+    @contextmanager
+    def pin_file(self, file_path: str) -> Iterator[str]:
+        """Local path of the file, which is kept until the block exits."""
+        local_path = self.get_file(file_path, pin=True)
+        try:
+            yield local_path
+        finally:
+            self.release_file(file_path)
+
     @abstractmethod
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
     ) -> Tuple[bytes, str]:
         pass
 
+    @abstractmethod
+    def upload_file_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[str, str, int]:
+        """
+        Copy `file` to storage in chunks without holding it in memory and
+        return its path, SHA-256 hex digest and size.
+        """
+        pass
+
     @abstractmethod
     def delete_all_files(self) -> None:
         pass
@@ -74,7 +114,28 @@ class LocalStorageProvider(StorageProvider):
         return contents, file_path
 
     @staticmethod
-    def get_file(file_path: str) -> str:
+    def upload_file_stream(
+        file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[str, str, int]:
+        file_path = f"{UPLOAD_DIR}/{filename}"
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            with open(file_path, "wb") as f:
+                while chunk := file.read(STORAGE_UPLOAD_CHUNK_SIZE):
+                    sha256.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            if not size:
+                raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+        except BaseException:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        return file_path, sha256.hexdigest(), size
+
+    @staticmethod
+    def get_file(file_path: str, pin: bool = False) -> str:
         """Handles downloading of the file from local storage."""
         return file_path
 
@@ -140,6 +201,12 @@ class S3StorageProvider(StorageProvider):
         self.bucket_name = S3_BUCKET_NAME
         self.key_prefix = S3_KEY_PREFIX if S3_KEY_PREFIX else ""
 
+        part_size = max(STORAGE_UPLOAD_CHUNK_SIZE, S3_MIN_PART_SIZE)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=part_size, multipart_chunksize=part_size
+        )
+        self.cache = FileCache(STORAGE_CACHE_MAX_SIZE, STORAGE_CACHE_VALIDATION_TTL)
+
     @staticmethod
     def sanitize_tag_value(s: str) -> str:
         """Only include S3 allowed characters."""
@@ -153,21 +220,8 @@ class S3StorageProvider(StorageProvider):
         s3_key = os.path.join(self.key_prefix, filename)
         try:
             self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
-            if S3_ENABLE_TAGGING and tags:
-                sanitized_tags = {
-                    self.sanitize_tag_value(k): self.sanitize_tag_value(v)
-                    for k, v in tags.items()
-                }
-                tagging = {
-                    "TagSet": [
-                        {"Key": k, "Value": v} for k, v in sanitized_tags.items()
-                    ]
-                }
-                self.s3_client.put_object_tagging(
-                    Bucket=self.bucket_name,
-                    Key=s3_key,
-                    Tagging=tagging,
-                )
+            self._put_object_tagging(s3_key, tags)
+            self.cache.put(f"s3://{self.bucket_name}/{s3_key}", file_path)
             return (
                 open(file_path, "rb").read(),
                 f"s3://{self.bucket_name}/{s3_key}",
@@ -175,16 +229,62 @@ class S3StorageProvider(StorageProvider):
         except ClientError as e:
             raise RuntimeError(f"Error uploading file to S3: {e}")
 
-    def get_file(self, file_path: str) -> str:
+    def upload_file_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[str, str, int]:
+        """Handles uploading of the file to S3 storage, in parts if it is large."""
+        file_path, file_hash, size = LocalStorageProvider.upload_file_stream(
+            file, filename, tags
+        )
+        s3_key = os.path.join(self.key_prefix, filename)
+        try:
+            self.s3_client.upload_file(
+                file_path, self.bucket_name, s3_key, Config=self.transfer_config
+            )
+            self._put_object_tagging(s3_key, tags)
+            self.cache.put(f"s3://{self.bucket_name}/{s3_key}", file_path)
+            return f"s3://{self.bucket_name}/{s3_key}", file_hash, size
+        except ClientError as e:
+            raise RuntimeError(f"Error uploading file to S3: {e}")
+
+    def _put_object_tagging(self, s3_key: str, tags: Dict[str, str]) -> None:
+        if not (S3_ENABLE_TAGGING and tags):
+            return
+
+        sanitized_tags = {
+            self.sanitize_tag_value(k): self.sanitize_tag_value(v)
+            for k, v in tags.items()
+        }
+        tagging = {
+            "TagSet": [{"Key": k, "Value": v} for k, v in sanitized_tags.items()]
+        }
+        self.s3_client.put_object_tagging(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            Tagging=tagging,
+        )
+
+    def get_file(self, file_path: str, pin: bool = False) -> str:
         """Handles downloading of the file from S3 storage."""
         try:
             s3_key = self._extract_s3_key(file_path)
-            local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
-            return local_file_path
+            return self.cache.get(
+                file_path,
+                self._get_local_file_path(s3_key),
+                get_version=lambda: self.s3_client.head_object(
+                    Bucket=self.bucket_name, Key=s3_key
+                )["ETag"],
+                download=lambda path: self.s3_client.download_file(
+                    self.bucket_name, s3_key, path
+                ),
+                pin=pin,
+            )
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
+    def release_file(self, file_path: str) -> None:
+        self.cache.release(file_path)
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from S3 storage."""
         try:
@@ -194,6 +294,7 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from S3: {e}")
 
         # Always delete from local storage
+        self.cache.discard(file_path)
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -213,6 +314,7 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from S3: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
     # The s3 key is the name assigned to an object. It excludes the bucket name, but includes the internal path and the file name.
@@ -237,6 +339,7 @@ class GCSStorageProvider(StorageProvider):
             # if running on a Compute Engine instance, credentials would be from Google Metadata server
             self.gcs_client = storage.Client()
         self.bucket = self.gcs_client.bucket(GCS_BUCKET_NAME)
+        self.cache = FileCache(STORAGE_CACHE_MAX_SIZE, STORAGE_CACHE_VALIDATION_TTL)
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
@@ -246,22 +349,57 @@ class GCSStorageProvider(StorageProvider):
         try:
             blob = self.bucket.blob(filename)
             blob.upload_from_filename(file_path)
+            self.cache.put("gs://" + self.bucket_name + "/" + filename, file_path)
             return contents, "gs://" + self.bucket_name + "/" + filename
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
 
-    def get_file(self, file_path: str) -> str:
+    def upload_file_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[str, str, int]:
+        """Handles uploading of the file to GCS storage, in chunks if it is large."""
+        file_path, file_hash, size = LocalStorageProvider.upload_file_stream(
+            file, filename, tags
+        )
+        try:
+            chunk_size = (
+                max(STORAGE_UPLOAD_CHUNK_SIZE // GCS_CHUNK_SIZE_MULTIPLE, 1)
+                * GCS_CHUNK_SIZE_MULTIPLE
+            )
+            # Setting a chunk size makes this a resumable upload in chunks
+            blob = self.bucket.blob(filename, chunk_size=chunk_size)
+            blob.upload_from_filename(file_path)
+            self.cache.put("gs://" + self.bucket_name + "/" + filename, file_path)
+            return "gs://" + self.bucket_name + "/" + filename, file_hash, size
+        except GoogleCloudError as e:
+            raise RuntimeError(f"Error uploading file to GCS: {e}")
+
+    def get_file(self, file_path: str, pin: bool = False) -> str:
         """Handles downloading of the file from GCS storage."""
         try:
             filename = file_path.removeprefix("gs://").split("/")[1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
-            blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
 
-            return local_file_path
+            def get_version():
+                blob = self.bucket.get_blob(filename)
+                if blob is None:
+                    raise NotFound(f"{file_path} not found")
+                return str(blob.generation)
+
+            return self.cache.get(
+                file_path,
+                f"{UPLOAD_DIR}/{filename}",
+                get_version=get_version,
+                download=lambda path: self.bucket.blob(filename).download_to_filename(
+                    path
+                ),
+                pin=pin,
+            )
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
+    def release_file(self, file_path: str) -> None:
+        self.cache.release(file_path)
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from GCS storage."""
         try:
@@ -272,6 +410,7 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from GCS: {e}")
 
         # Always delete from local storage
+        self.cache.discard(file_path)
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -286,6 +425,7 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from GCS: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
 
@@ -298,17 +438,24 @@ class AzureStorageProvider(StorageProvider):
         if storage_key:
             # Configure using the Azure Storage Account Endpoint and Key
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=storage_key
+                account_url=self.endpoint,
+                credential=storage_key,
+                max_single_put_size=STORAGE_UPLOAD_CHUNK_SIZE,
+                max_block_size=STORAGE_UPLOAD_CHUNK_SIZE,
             )
         else:
             # Configure using the Azure Storage Account Endpoint and DefaultAzureCredential
             # If the key is not configured, then the DefaultAzureCredential will be used to support Managed Identity authentication
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=DefaultAzureCredential()
+                account_url=self.endpoint,
+                credential=DefaultAzureCredential(),
+                max_single_put_size=STORAGE_UPLOAD_CHUNK_SIZE,
+                max_block_size=STORAGE_UPLOAD_CHUNK_SIZE,
             )
         self.container_client = self.blob_service_client.get_container_client(
             self.container_name
         )
+        self.cache = FileCache(STORAGE_CACHE_MAX_SIZE, STORAGE_CACHE_VALIDATION_TTL)
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
@@ -318,22 +465,58 @@ class AzureStorageProvider(StorageProvider):
         try:
             blob_client = self.container_client.get_blob_client(filename)
             blob_client.upload_blob(contents, overwrite=True)
+            self.cache.put(
+                f"{self.endpoint}/{self.container_name}/{filename}", file_path
+            )
             return contents, f"{self.endpoint}/{self.container_name}/{filename}"
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
 
-    def get_file(self, file_path: str) -> str:
+    def upload_file_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[str, str, int]:
+        """Handles uploading of the file to Azure Blob Storage, in blocks if it is large."""
+        file_path, file_hash, size = LocalStorageProvider.upload_file_stream(
+            file, filename, tags
+        )
+        try:
+            blob_client = self.container_client.get_blob_client(filename)
+            with open(file_path, "rb") as f:
+                blob_client.upload_blob(f, length=size, overwrite=True)
+            self.cache.put(
+                f"{self.endpoint}/{self.container_name}/{filename}", file_path
+            )
+            return (
+                f"{self.endpoint}/{self.container_name}/{filename}",
+                file_hash,
+                size,
+            )
+        except Exception as e:
+            raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
+
+    def get_file(self, file_path: str, pin: bool = False) -> str:
         """Handles downloading of the file from Azure Blob Storage."""
         try:
             filename = file_path.split("/")[-1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            return local_file_path
+
+            def download(path: str):
+                with open(path, "wb") as download_file:
+                    blob_client.download_blob().readinto(download_file)
+
+            return self.cache.get(
+                file_path,
+                f"{UPLOAD_DIR}/{filename}",
+                get_version=lambda: blob_client.get_blob_properties().etag,
+                download=download,
+                pin=pin,
+            )
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
+    def release_file(self, file_path: str) -> None:
+        self.cache.release(file_path)
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from Azure Blob Storage."""
         try:
@@ -344,6 +527,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from Azure Blob Storage: {e}")
 
         # Always delete from local storage
+        self.cache.discard(file_path)
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -356,6 +540,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from Azure Blob Storage: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
 
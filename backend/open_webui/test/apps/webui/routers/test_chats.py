@@ -1,3 +1,4 @@
+import json
 import uuid
 
 from test.util.abstract_integration_test import AbstractPostgresTest
@@ -39,6 +40,21 @@ class TestChats(AbstractPostgresTest):
         assert first_chat["created_at"] is not None
         assert first_chat["updated_at"] is not None
 
+    def test_get_session_user_chat_list_by_cursor(self):
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url("/"))
+            last_chat = response.json()[-1]
+            cursor = f"{last_chat['updated_at']}:{last_chat['id']}"
+            next_response = self.fast_api_client.get(
+                self.create_url(f"/list?cursor={cursor}")
+            )
+            invalid_response = self.fast_api_client.get(
+                self.create_url("/list?cursor=invalid")
+            )
+        assert next_response.status_code == 200
+        assert next_response.json() == []
+        assert invalid_response.status_code == 400
+
     def test_delete_all_user_chats(self):
         with mock_webui_user(id="2"):
             response = self.fast_api_client.delete(self.create_url("/"))
@@ -86,6 +102,98 @@ class TestChats(AbstractPostgresTest):
     def test_get_user_chats(self):
         self.test_get_session_user_chat_list()
 
+    def test_export_and_import_user_chats(self):
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url("/all/export"))
+            assert response.status_code == 200
+            lines = response.content.splitlines()
+            assert len(lines) == 1
+
+            response = self.fast_api_client.post(
+                self.create_url("/import/stream"),
+                content=response.content + b"not json\n",
+            )
+        assert response.status_code == 200
+        assert response.json()["imported"] == 1
+        assert [error["line"] for error in response.json()["errors"]] == [2]
+        assert len(self.chats.get_chats_by_user_id("2")) == 2
+
+    def test_import_chats_stream_reports_failing_lines(self):
+        lines = [{"chat": {"title": f"chat{i}"}} for i in range(3)]
+        lines.insert(1, {"chat": {"title": None}})
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url("/import/stream"),
+                content="\n".join(json.dumps(line) for line in lines).encode(),
+            )
+        assert response.status_code == 200
+        assert response.json()["imported"] == 3
+        assert [error["line"] for error in response.json()["errors"]] == [2]
+
+    def test_search_imported_chat_messages(self):
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url("/import"),
+                json={
+                    "chat": {
+                        "title": "imported",
+                        "history": {
+                            "currentId": "m1",
+                            "messages": {
+                                "m1": {
+                                    "id": "m1",
+                                    "role": "user",
+                                    "content": "zebrafish anatomy in C++",
+                                }
+                            },
+                        },
+                    }
+                },
+            )
+            assert response.status_code == 200
+            chat_id = response.json()["id"]
+
+            response = self.fast_api_client.get(
+                self.create_url("/search?text=zebrafish")
+            )
+            assert response.status_code == 200
+            assert [chat["id"] for chat in response.json()] == [chat_id]
+
+            # Text the full-text index can't represent matches as a substring
+            response = self.fast_api_client.get(self.create_url("/search?text=c%2B%2B"))
+        assert response.status_code == 200
+        assert [chat["id"] for chat in response.json()] == [chat_id]
+
+    def test_upsert_chat_message_sets_current_id(self):
+        chat = self.chats.get_chats()[0]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{chat.id}/messages/m2"),
+                json={"content": "hello"},
+            )
+        assert response.status_code == 200
+        history = response.json()["chat"]["history"]
+        assert history["currentId"] == "m2"
+        assert history["messages"]["m2"]["content"] == "hello"
+
+    def test_pin_and_archive_return_upserted_messages(self):
+        chat = self.chats.get_chats()[0]
+
+        with mock_webui_user(id="2"):
+            self.fast_api_client.post(
+                self.create_url(f"/{chat.id}/messages/m2"),
+                json={"content": "hello"},
+            )
+            for action in ("pin", "archive"):
+                response = self.fast_api_client.post(
+                    self.create_url(f"/{chat.id}/{action}")
+                )
+                assert response.status_code == 200
+                history = response.json()["chat"]["history"]
+                assert history["currentId"] == "m2"
+                assert history["messages"]["m2"]["content"] == "hello"
+
     def test_get_user_archived_chats(self):
         self.chats.archive_all_chats_by_user_id("2")
         from open_webui.internal.db import Session
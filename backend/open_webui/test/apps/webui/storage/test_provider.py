@@ -1,3 +1,4 @@
+import hashlib
 import io
 import os
 import boto3
@@ -74,6 +75,20 @@ class TestLocalStorageProvider:
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
 
+    def test_upload_file_stream(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        monkeypatch.setattr(provider, "STORAGE_UPLOAD_CHUNK_SIZE", 5)
+        file_path, file_hash, size = self.Storage.upload_file_stream(
+            io.BytesIO(self.file_content), self.filename, {}
+        )
+        assert (upload_dir / self.filename).read_bytes() == self.file_content
+        assert file_path == str(upload_dir / self.filename)
+        assert file_hash == hashlib.sha256(self.file_content).hexdigest()
+        assert size == len(self.file_content)
+        with pytest.raises(ValueError):
+            self.Storage.upload_file_stream(io.BytesIO(), self.filename_extra, {})
+        assert not (upload_dir / self.filename_extra).exists()
+
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         file_path = str(upload_dir / self.filename)
@@ -129,6 +144,21 @@ class TestS3StorageProvider:
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
 
+    def test_upload_file_stream(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
+        # Larger than one part, so that it is uploaded in parts
+        file_content = os.urandom(provider.S3_MIN_PART_SIZE + 1024)
+        s3_file_path, file_hash, size = self.Storage.upload_file_stream(
+            io.BytesIO(file_content), self.filename, {}
+        )
+        object = self.s3_client.Object(self.Storage.bucket_name, self.filename)
+        assert file_content == object.get()["Body"].read()
+        assert (upload_dir / self.filename).read_bytes() == file_content
+        assert s3_file_path == "s3://" + self.Storage.bucket_name + "/" + self.filename
+        assert file_hash == hashlib.sha256(file_content).hexdigest()
+        assert size == len(file_content)
+
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
@@ -139,6 +169,54 @@ class TestS3StorageProvider:
         assert file_path == str(upload_dir / self.filename)
         assert (upload_dir / self.filename).exists()
 
+    def test_get_file_cached(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
+        self.s3_client.Object(self.Storage.bucket_name, self.filename).put(
+            Body=self.file_content
+        )
+        s3_file_path = f"s3://{self.Storage.bucket_name}/{self.filename}"
+        download_file = MagicMock(wraps=self.Storage.s3_client.download_file)
+        monkeypatch.setattr(self.Storage.s3_client, "download_file", download_file)
+        monkeypatch.setattr(self.Storage, "cache", provider.FileCache(1024, 0))
+
+        self.Storage.get_file(s3_file_path)
+        self.Storage.get_file(s3_file_path)
+        assert download_file.call_count == 1
+        assert self.Storage.cache.get_stats()["hits"] == 1
+
+        # a changed ETag invalidates the cached copy
+        self.s3_client.Object(self.Storage.bucket_name, self.filename).put(
+            Body=b"changed"
+        )
+        file_path = self.Storage.get_file(s3_file_path)
+        assert download_file.call_count == 2
+        assert (upload_dir / self.filename).read_bytes() == b"changed"
+
+        self.Storage.delete_file(s3_file_path)
+        assert self.Storage.cache.get_stats()["entries"] == 0
+
+    def test_pinned_file_is_not_evicted(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
+        for filename in (self.filename, self.filename_extra):
+            self.s3_client.Object(self.Storage.bucket_name, filename).put(
+                Body=self.file_content
+            )
+        # Room for a single file
+        monkeypatch.setattr(
+            self.Storage, "cache", provider.FileCache(len(self.file_content), 0)
+        )
+
+        bucket = f"s3://{self.Storage.bucket_name}"
+        with self.Storage.pin_file(f"{bucket}/{self.filename}"):
+            self.Storage.get_file(f"{bucket}/{self.filename_extra}")
+            assert (upload_dir / self.filename).exists()
+
+        # Evicted once released, as the least recently used file
+        assert not (upload_dir / self.filename).exists()
+        assert (upload_dir / self.filename_extra).exists()
+
     def test_delete_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
@@ -0,0 +1,158 @@
+"""
+Micro-benchmark for the streaming response handler in `utils/middleware.py`.
+
+Streams a long reasoning response followed by a long answer through
+`process_chat_response` and reports wall time and the number of bytes handed
+to the event emitter, once with the incremental content-block serializer and
+content deltas, and once with full re-serialization and full-content events.
+
+Run from the backend directory:
+
+    python -m open_webui.test.benchmarks.bench_response_handler --tokens 50000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+os.environ.setdefault("STATIC_DIR", tempfile.mkdtemp())
+
+from starlette.responses import StreamingResponse
+
+from open_webui.config import *  # noqa: F401,F403 (runs the database migrations)
+from open_webui.models.chats import Chats, ChatForm
+from open_webui.utils import content_blocks, middleware
+
+
+class FullSerializer:
+    """The pre-incremental behaviour: every block is re-rendered on every call."""
+
+    def serialize(self, blocks):
+        return content_blocks.serialize_content_blocks(blocks)
+
+
+def get_stream(tokens: int):
+    async def body_iterator():
+        reasoning_tokens = tokens // 2
+        for i in range(tokens):
+            field = "reasoning_content" if i < reasoning_tokens else "content"
+            value = f"tok{i % 97} " + ("\n" if i % 20 == 19 else "")
+            chunk = {"choices": [{"delta": {field: value}}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(
+        body_iterator(), headers={"Content-Type": "text/event-stream"}
+    )
+
+
+async def run(tokens: int, incremental: bool) -> dict:
+    chat = Chats.insert_new_chat(
+        "benchmark",
+        ChatForm(
+            chat={
+                "title": "Benchmark",
+                "history": {
+                    "currentId": "assistant",
+                    "messages": {
+                        "assistant": {
+                            "id": "assistant",
+                            "parentId": None,
+                            "role": "assistant",
+                            "content": "",
+                        }
+                    },
+                },
+            }
+        ),
+    )
+
+    stats = {"events": 0, "bytes": 0}
+
+    def get_event_emitter(request_info, update_db=True):
+        async def __event_emitter__(event_data):
+            stats["events"] += 1
+            stats["bytes"] += len(json.dumps(event_data))
+
+        return __event_emitter__
+
+    def get_event_call(request_info):
+        async def __event_caller__(event_data):
+            return None
+
+        return __event_caller__
+
+    originals = (
+        middleware.get_event_emitter,
+        middleware.get_event_call,
+        middleware.ContentBlockSerializer,
+        middleware.get_common_prefix_length,
+    )
+    middleware.get_event_emitter = get_event_emitter
+    middleware.get_event_call = get_event_call
+    if not incremental:
+        middleware.ContentBlockSerializer = FullSerializer
+        # An offset of 0 resends the whole content on every event
+        middleware.get_common_prefix_length = lambda a, b: 0
+
+    request = SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(
+                config=SimpleNamespace(WEBUI_URL=""), WEBUI_NAME="Open WebUI"
+            )
+        )
+    )
+    user = SimpleNamespace(id="benchmark", model_dump=lambda: {})
+    metadata = {
+        "chat_id": chat.id,
+        "message_id": "assistant",
+        "session_id": "benchmark",
+        "user_id": "benchmark",
+    }
+
+    try:
+        start = time.perf_counter()
+        await middleware.process_chat_response(
+            request,
+            get_stream(tokens),
+            {"model": "benchmark", "messages": [{"role": "user", "content": "hi"}]},
+            user,
+            metadata,
+            {"id": "benchmark"},
+            [],
+            {},
+        )
+        stats["seconds"] = time.perf_counter() - start
+    finally:
+        (
+            middleware.get_event_emitter,
+            middleware.get_event_call,
+            middleware.ContentBlockSerializer,
+            middleware.get_common_prefix_length,
+        ) = originals
+        Chats.delete_chat_by_id(chat.id)
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=50000)
+    args = parser.parse_args()
+
+    for incremental in (True, False):
+        stats = asyncio.run(run(args.tokens, incremental))
+        print(
+            f"{'incremental' if incremental else 'full':>11}: "
+            f"{stats['seconds']:.2f}s, {stats['events']} events, "
+            f"{stats['bytes'] / 1024 / 1024:.1f} MiB emitted"
+        )
+
+
+if __name__ == "__main__":
+    main()
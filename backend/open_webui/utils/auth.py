@@ -22,6 +22,8 @@ from typing import Optional, Union, List, Dict
 from opentelemetry import trace
 
 from open_webui.models.users import Users
+from open_webui.utils.last_active import LAST_ACTIVE_BUFFER
+from open_webui.utils.user_cache import USER_CACHE
 
 from open_webui.constants import ERROR_MESSAGES
 
@@ -270,7 +272,9 @@ def get_current_user(
         )
 
     if data is not None and "id" in data:
-        user = Users.get_user_by_id(data["id"])
+        user = USER_CACHE.get_or_load(
+            f"id:{data['id']}", lambda: Users.get_user_by_id(data["id"])
+        )
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -300,10 +304,8 @@ def get_current_user(
                 current_span.set_attribute("client.user.role", user.role)
                 current_span.set_attribute("client.auth.type", "jwt")
 
-            # Refresh the user's last active timestamp asynchronously
-            # to prevent blocking the request
-            if background_tasks:
-                background_tasks.add_task(Users.update_user_last_active_by_id, user.id)
+            # Refresh the user's last active timestamp with the next bulk update
+            LAST_ACTIVE_BUFFER.touch(user.id)
         return user
     else:
         raise HTTPException(
@@ -313,7 +315,9 @@ def get_current_user(
 
 
 def get_current_user_by_api_key(api_key: str):
-    user = Users.get_user_by_api_key(api_key)
+    user = USER_CACHE.get_or_load(
+        f"api_key:{api_key}", lambda: Users.get_user_by_api_key(api_key)
+    )
 
     if user is None:
         raise HTTPException(
@@ -329,7 +333,7 @@ def get_current_user_by_api_key(api_key: str):
             current_span.set_attribute("client.user.role", user.role)
             current_span.set_attribute("client.auth.type", "api_key")
 
-        Users.update_user_last_active_by_id(user.id)
+        LAST_ACTIVE_BUFFER.touch(user.id)
 
     return user
 
@@ -0,0 +1,265 @@
+import html
+import json
+from typing import Optional
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def format_reasoning_content(content: str) -> str:
+    return "\n".join(
+        (f"> {line}" if not line.startswith(">") else line)
+        for line in content.splitlines()
+    )
+
+
+def serialize_content_block(
+    content: str,
+    block: dict,
+    raw: bool = False,
+    reasoning_display_content: Optional[str] = None,
+) -> str:
+    """
+    Render a single content block on top of the already serialized `content`
+    and return the new serialized content. `serialize_content_blocks` is a fold
+    of this function over all blocks.
+    """
+    if block["type"] == "text":
+        block_content = block["content"].strip()
+        if block_content:
+            content = f"{content}{block_content}\n"
+    elif block["type"] == "tool_calls":
+        attributes = block.get("attributes", {})
+
+        tool_calls = block.get("content", [])
+        results = block.get("results", [])
+
+        if content and not content.endswith("\n"):
+            content += "\n"
+
+        if results:
+
+            tool_calls_display_content = ""
+            for tool_call in tool_calls:
+
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_result = None
+                tool_result_files = None
+                for result in results:
+                    if tool_call_id == result.get("tool_call_id", ""):
+                        tool_result = result.get("content", None)
+                        tool_result_files = result.get("files", None)
+                        break
+
+                if tool_result:
+                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result, ensure_ascii=False))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
+                else:
+                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+
+            if not raw:
+                content = f"{content}{tool_calls_display_content}"
+        else:
+            tool_calls_display_content = ""
+
+            for tool_call in tool_calls:
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+
+            if not raw:
+                content = f"{content}{tool_calls_display_content}"
+
+    elif block["type"] == "reasoning":
+        if reasoning_display_content is None:
+            reasoning_display_content = format_reasoning_content(block["content"])
+
+        reasoning_duration = block.get("duration", None)
+
+        start_tag = block.get("start_tag", "")
+        end_tag = block.get("end_tag", "")
+
+        if content and not content.endswith("\n"):
+            content += "\n"
+
+        if reasoning_duration is not None:
+            if raw:
+                content = f'{content}{start_tag}{block["content"]}{end_tag}\n'
+            else:
+                content = f'{content}<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}{start_tag}{block["content"]}{end_tag}\n'
+            else:
+                content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+    elif block["type"] == "code_interpreter":
+        attributes = block.get("attributes", {})
+        output = block.get("output", None)
+        lang = attributes.get("lang", "")
+
+        content_stripped, original_whitespace = split_content_and_whitespace(content)
+        if is_opening_code_block(content_stripped):
+            # Remove trailing backticks that would open a new block
+            content = content_stripped.rstrip("`").rstrip() + original_whitespace
+        else:
+            # Keep content as is - either closing backticks or no backticks
+            content = content_stripped + original_whitespace
+
+        if content and not content.endswith("\n"):
+            content += "\n"
+
+        if output:
+            output = html.escape(json.dumps(output))
+
+            if raw:
+                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+            else:
+                content = f'{content}<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+            else:
+                content = f'{content}<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+    else:
+        block_content = str(block["content"]).strip()
+        if block_content:
+            content = f"{content}{block['type']}: {block_content}\n"
+
+    return content
+
+
+def serialize_content_blocks(content_blocks: list[dict], raw: bool = False) -> str:
+    content = ""
+    for block in content_blocks:
+        content = serialize_content_block(content, block, raw)
+    return content.strip()
+
+
+def get_block_signature(block: dict) -> tuple:
+    content = block.get("content")
+    return (
+        id(block),
+        block.get("type"),
+        len(content) if isinstance(content, (str, list)) else None,
+        block.get("duration"),
+        id(block.get("results")),
+        id(block.get("output")),
+    )
+
+
+class ContentBlockSerializer:
+    """
+    Incremental equivalent of `serialize_content_blocks` for a streaming response.
+
+    While streaming, only the last block of `content_blocks` is ever mutated; the
+    blocks before it are frozen. Their serialized prefix is cached so that each
+    call only renders the tail block, and for a reasoning tail block only the
+    lines added since the previous call are re-quoted.
+    """
+
+    def __init__(self, raw: bool = False):
+        self.raw = raw
+
+        # (block signature, serialized content after that block) per frozen block
+        self.prefixes: list[tuple[tuple, str]] = []
+
+        # id(block) -> (consumed raw content, quoted lines of the consumed content)
+        self.reasoning_cache: dict[int, tuple[str, str]] = {}
+
+    def _get_prefix(self, frozen_blocks: list[dict]) -> str:
+        valid = 0
+        for (signature, _), block in zip(self.prefixes, frozen_blocks):
+            if signature != get_block_signature(block):
+                break
+            valid += 1
+        del self.prefixes[valid:]
+
+        content = self.prefixes[-1][1] if self.prefixes else ""
+        for block in frozen_blocks[valid:]:
+            content = serialize_content_block(content, block, self.raw)
+            self.prefixes.append((get_block_signature(block), content))
+            self.reasoning_cache.pop(id(block), None)
+
+        return content
+
+    def _get_reasoning_display_content(self, block: dict) -> str:
+        text = block["content"]
+        consumed_text, quoted = self.reasoning_cache.get(id(block), ("", ""))
+        if not text.startswith(consumed_text):
+            consumed_text, quoted = "", ""
+        consumed = len(consumed_text)
+
+        # Only lines terminated by "\n" are final, the rest is re-quoted each time
+        boundary = text.rfind("\n", consumed) + 1
+        if boundary > consumed:
+            lines = format_reasoning_content(text[consumed:boundary])
+            quoted = f"{quoted}\n{lines}" if quoted and lines else quoted or lines
+            consumed = boundary
+            self.reasoning_cache[id(block)] = (text[:consumed], quoted)
+
+        tail = format_reasoning_content(text[consumed:])
+        return f"{quoted}\n{tail}" if quoted and tail else quoted or tail
+
+    def serialize(self, content_blocks: list[dict]) -> str:
+        if not content_blocks:
+            self.prefixes = []
+            return ""
+
+        content = self._get_prefix(content_blocks[:-1])
+
+        block = content_blocks[-1]
+        reasoning_display_content = None
+        if block["type"] == "reasoning" and not self.raw:
+            reasoning_display_content = self._get_reasoning_display_content(block)
+
+        return serialize_content_block(
+            content, block, self.raw, reasoning_display_content
+        ).strip()
+
+
+def get_common_prefix_length(a: str, b: str) -> int:
+    """Length of the longest common prefix of two strings."""
+    n = min(len(a), len(b))
+    if len(a) <= len(b) and b.startswith(a):
+        return n
+
+    # Gallop forward in growing chunks, then bisect the first mismatching chunk
+    i, step = 0, 64
+    while i < n:
+        j = min(i + step, n)
+        if not a.startswith(b[i:j], i):
+            break
+        i, step = j, step * 2
+
+    lo, hi = i, min(i + step, n)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a.startswith(b[lo:mid], lo):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def get_utf16_length(content: str) -> int:
+    """Length of a string in UTF-16 code units, i.e. its JavaScript `length`."""
+    if content.isascii():
+        return len(content)
+    return len(content.encode("utf-16-le")) // 2
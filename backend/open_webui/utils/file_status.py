@@ -0,0 +1,98 @@
+import asyncio
+import json
+import logging
+from contextlib import contextmanager
+from typing import Optional
+
+from open_webui.env import REDIS_KEY_PREFIX, SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+REDIS_FILE_STATUS_CHANNEL = f"{REDIS_KEY_PREFIX}:files:status"
+
+
+class FileStatusNotifier:
+    """
+    Notifies subscribers of file processing status transitions, so that status
+    streams wait for an event instead of polling the database.
+
+    Subscribers are asyncio queues on the application's event loop. Statuses
+    may be published from worker threads, since file processing runs
+    synchronously. With Redis configured, statuses are published to a Redis
+    channel and every instance delivers them to its own subscribers, so a
+    stream sees the status of a file processed by another instance.
+    """
+
+    def __init__(self):
+        self.subscribers: dict[str, set[asyncio.Queue]] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.redis = None
+
+    def start(self, redis=None):
+        """Bind to the running event loop; called once at startup."""
+        self.loop = asyncio.get_running_loop()
+        self.redis = redis
+
+    async def listen(self):
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(REDIS_FILE_STATUS_CHANNEL)
+
+        async for message in pubsub.listen():
+            if message["type"] != "message":
+                continue
+            try:
+                event = json.loads(message["data"])
+                self._dispatch(event.pop("file_id"), event)
+            except Exception as e:
+                log.exception(f"Error handling file status event: {e}")
+
+    @contextmanager
+    def subscribe(self, file_id: str):
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(file_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self.subscribers.get(file_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self.subscribers[file_id]
+
+    def _dispatch(self, file_id: str, event: dict):
+        for queue in self.subscribers.get(file_id, ()):
+            queue.put_nowait(event)
+
+    async def _publish(self, file_id: str, event: dict):
+        if self.redis is not None:
+            try:
+                await self.redis.publish(
+                    REDIS_FILE_STATUS_CHANNEL, json.dumps({**event, "file_id": file_id})
+                )
+                return
+            except Exception as e:
+                log.warning(f"Failed to publish file status to Redis: {e}")
+        self._dispatch(file_id, event)
+
+    def publish(self, file_id: str, status: str, error: Optional[str] = None):
+        if self.loop is None or self.loop.is_closed():
+            return
+
+        event = {"status": status}
+        if error is not None:
+            event["error"] = error
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self.loop:
+            self.loop.create_task(self._publish(file_id, event))
+        else:
+            asyncio.run_coroutine_threadsafe(self._publish(file_id, event), self.loop)
+
+
+FILE_STATUS_NOTIFIER = FileStatusNotifier()
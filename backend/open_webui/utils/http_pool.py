@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_POOL_LIMIT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def get_origin(url: str) -> str:
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}".lower()
+
+
+class HTTPSessionPool:
+    """
+    Application-lifetime HTTP sessions, one per upstream origin, so that calls
+    to the same upstream reuse keep-alive connections instead of paying for a
+    new TCP/TLS handshake each time. Sessions are shared between users, so they
+    never store cookies. Responses must be released (not closed) to return
+    their connection to the pool, and the sessions must never be closed by
+    callers; `close` is called once when the application shuts down.
+
+    `get_session` serves async callers with aiohttp sessions, and
+    `get_sync_session` serves blocking callers (embedding, reranking and
+    document loaders) with `requests` sessions.
+    """
+
+    def __init__(
+        self,
+        limit: int = AIOHTTP_CLIENT_POOL_LIMIT,
+        keepalive_timeout: float = AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl: int = AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL,
+    ):
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+
+        self.sessions: dict[str, aiohttp.ClientSession] = {}
+        self.sync_sessions: dict[str, requests.Session] = {}
+        self.lock = threading.Lock()
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        origin = get_origin(url)
+        loop = asyncio.get_running_loop()
+
+        session = self.sessions.get(origin)
+        if session is None or session.closed or session._loop is not loop:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                    use_dns_cache=True,
+                ),
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trust_env=True,
+            )
+            self.sessions[origin] = session
+        return session
+
+    def get_sync_session(self, url: str) -> requests.Session:
+        origin = get_origin(url)
+
+        with self.lock:
+            session = self.sync_sessions.get(origin)
+            if session is None:
+                session = requests.Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+                adapter = HTTPAdapter(pool_maxsize=self.limit or 100)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.sync_sessions[origin] = session
+            return session
+
+    def get_stats(self) -> dict:
+        stats = {"async": {}, "sync": {}}
+
+        for origin, session in list(self.sessions.items()):
+            connector = session.connector
+            if session.closed or connector is None:
+                continue
+
+            stats["async"][origin] = {
+                "limit": connector.limit,
+                "acquired": len(getattr(connector, "_acquired", ())),
+                "idle": sum(
+                    len(connections)
+                    for connections in getattr(connector, "_conns", {}).values()
+                ),
+            }
+
+        with self.lock:
+            sync_sessions = list(self.sync_sessions.items())
+
+        for origin, session in sync_sessions:
+            adapter = session.get_adapter(origin)
+            container = adapter.poolmanager.pools
+            pools = [
+                pool
+                for pool in (container.get(key) for key in container.keys())
+                if pool is not None
+            ]
+            stats["sync"][origin] = {
+                "limit": adapter._pool_maxsize,
+                "connections": sum(pool.num_connections for pool in pools),
+                "requests": sum(pool.num_requests for pool in pools),
+            }
+
+        return stats
+
+    async def close(self):
+        sessions, self.sessions = self.sessions, {}
+        for session in sessions.values():
+            try:
+                await session.close()
+            except Exception as e:
+                log.warning(f"Error closing HTTP session: {e}")
+
+        with self.lock:
+            sync_sessions, self.sync_sessions = self.sync_sessions, {}
+        for session in sync_sessions.values():
+            session.close()
+
+
+HTTP_SESSION_POOL = HTTPSessionPool()
@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import aiohttp
+import requests
+from fastapi import HTTPException, Request
+from starlette.datastructures import Headers
+
+from open_webui.env import (
+    INGESTION_JOB_LEASE_TIMEOUT,
+    INGESTION_JOB_MAX_ATTEMPTS,
+    INGESTION_JOB_RETRY_DELAY,
+    INGESTION_QUEUE_POLL_INTERVAL,
+    INGESTION_QUEUE_WORKERS,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.files import Files
+from open_webui.models.ingestion_jobs import IngestionJobModel, IngestionJobs
+from open_webui.utils.file_status import FILE_STATUS_NOTIFIER
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def is_transient_error(e: BaseException) -> bool:
+    """
+    Whether retrying may succeed: connection errors, timeouts and 5xx
+    responses. Handlers wrap errors in an HTTPException (e.g. 400 from
+    `process_file`), so the whole cause/context chain is checked.
+    """
+    seen = set()
+    while e is not None and id(e) not in seen:
+        seen.add(id(e))
+        if isinstance(
+            e,
+            (
+                ConnectionError,
+                TimeoutError,
+                asyncio.TimeoutError,
+                aiohttp.ClientConnectionError,
+                requests.ConnectionError,
+                requests.Timeout,
+            ),
+        ):
+            return True
+        if isinstance(e, HTTPException) and e.status_code >= 500:
+            return True
+        if (
+            isinstance(e, requests.HTTPError)
+            and e.response is not None
+            and e.response.status_code >= 500
+        ):
+            return True
+        if isinstance(e, aiohttp.ClientResponseError) and e.status >= 500:
+            return True
+        e = e.__cause__ or e.__context__
+    return False
+
+
+class IngestionQueue:
+    """
+    Processes uploaded files from a queue of jobs stored in the database,
+    instead of in request background tasks, so that ingestion runs with
+    bounded concurrency and resumes after a restart.
+
+    Each instance runs `workers` worker tasks that claim jobs by priority and
+    run them on a dedicated thread pool, so ingestion never takes threads from
+    request handling. Jobs that fail with a transient error (see
+    `is_transient_error`) are retried with exponential backoff up to their
+    `max_attempts`; any other error fails the job right away. A running job holds a lease that its worker renews;
+    when an instance dies, its jobs are claimed again once the lease expires.
+    The file's `data.status` follows the job: pending while queued, processing
+    while running, then completed or failed.
+    """
+
+    def __init__(
+        self,
+        workers: int = INGESTION_QUEUE_WORKERS,
+        poll_interval: float = INGESTION_QUEUE_POLL_INTERVAL,
+        max_attempts: int = INGESTION_JOB_MAX_ATTEMPTS,
+        retry_delay: int = INGESTION_JOB_RETRY_DELAY,
+        lease_timeout: int = INGESTION_JOB_LEASE_TIMEOUT,
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease_timeout = lease_timeout
+
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.app = None
+        self.handler: Optional[Callable[[Request, IngestionJobModel], None]] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.tasks: list[asyncio.Task] = []
+
+        # job id -> file id of the jobs running in this instance
+        self.running: dict[str, str] = {}
+
+    def start(self, app, handler: Callable[[Request, IngestionJobModel], None]):
+        """
+        Start the workers on the running event loop. `handler` processes the
+        job's file and raises on failure.
+        """
+        self.app = app
+        self.handler = handler
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+
+        if self.workers > 0:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="ingestion"
+            )
+            self.tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+
+    async def stop(self):
+        tasks, self.tasks = self.tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.executor is not None:
+            # Jobs still running are picked up again once their lease expires
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def enqueue(
+        self,
+        file_id: str,
+        user_id: str,
+        priority: int = 0,
+        payload: Optional[dict] = None,
+    ) -> Optional[IngestionJobModel]:
+        job = IngestionJobs.insert_new_job(
+            file_id,
+            user_id,
+            priority=priority,
+            max_attempts=self.max_attempts,
+            payload=payload,
+        )
+        if job and self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        return job
+
+    def cancel(self, file_id: str) -> bool:
+        """Cancel the queued jobs of a file; running jobs are not interrupted."""
+        if not IngestionJobs.cancel_queued_jobs_by_file_id(file_id):
+            return False
+
+        self._set_status(file_id, "failed", "Processing was cancelled")
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "workers": len(self.tasks),
+            "running": len(self.running),
+            "jobs": IngestionJobs.get_job_counts(),
+        }
+
+    def _set_status(self, file_id: str, status: str, error: Optional[str] = None):
+        Files.update_file_data_by_id(
+            file_id, {"status": status, **({"error": error} if error else {})}
+        )
+        FILE_STATUS_NOTIFIER.publish(file_id, status, error)
+
+    def _get_request(self) -> Request:
+        # Handlers only use the request to reach the application state
+        return Request(
+            {
+                "type": "http",
+                "asgi.version": "3.0",
+                "asgi.spec_version": "2.0",
+                "method": "POST",
+                "path": "/internal/ingestion",
+                "query_string": b"",
+                "headers": Headers({}).raw,
+                "client": ("127.0.0.1", 12345),
+                "server": ("127.0.0.1", 80),
+                "scheme": "http",
+                "app": self.app,
+            }
+        )
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self.loop.run_in_executor(
+                    self.executor,
+                    IngestionJobs.claim_next_job,
+                    self.worker_id,
+                    self.lease_timeout,
+                )
+            except Exception as e:
+                log.exception(f"Error claiming ingestion job: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(
+                        self.wakeup.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                continue
+
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Error running ingestion job {job.id}: {e}")
+
+    async def _renew_lease(self, job: IngestionJobModel):
+        while True:
+            await asyncio.sleep(self.lease_timeout / 3)
+            await self.loop.run_in_executor(
+                None,
+                IngestionJobs.renew_lease,
+                job.id,
+                self.worker_id,
+                self.lease_timeout,
+            )
+
+    async def _run_in_executor(self, func: Callable, *args):
+        # Database calls are kept off the event loop
+        return await self.loop.run_in_executor(self.executor, func, *args)
+
+    async def _update_status(
+        self, file_id: str, status: str, error: Optional[str] = None
+    ):
+        await self._run_in_executor(self._set_status, file_id, status, error)
+
+    async def _run(self, job: IngestionJobModel):
+        if job.attempts > job.max_attempts:
+            # The job's lease expired on every attempt, e.g. because processing
+            # it keeps bringing the instance down
+            await self._run_in_executor(
+                IngestionJobs.fail_job, job.id, "Processing was interrupted", 0
+            )
+            await self._update_status(
+                job.file_id, "failed", "Processing was interrupted"
+            )
+            return
+
+        log.info(
+            f"Processing file {job.file_id} (job {job.id}, attempt {job.attempts}/{job.max_attempts})"
+        )
+        self.running[job.id] = job.file_id
+        lease = asyncio.create_task(self._renew_lease(job))
+        try:
+            await self._update_status(job.file_id, "processing")
+            await self._run_in_executor(self.handler, self._get_request(), job)
+        except Exception as e:
+            error = str(e.detail) if hasattr(e, "detail") else str(e)
+            failed_job = await self._run_in_executor(
+                IngestionJobs.fail_job,
+                job.id,
+                error,
+                self.retry_delay,
+                is_transient_error(e),
+            )
+            if failed_job is None or failed_job.status == "failed":
+                log.error(f"Error processing file {job.file_id}: {error}")
+                await self._update_status(job.file_id, "failed", error)
+            else:
+                log.warning(f"Error processing file {job.file_id}, retrying: {error}")
+                await self._update_status(job.file_id, "pending")
+        else:
+            await self._run_in_executor(IngestionJobs.complete_job, job.id)
+            await self._update_status(job.file_id, "completed")
+        finally:
+            lease.cancel()
+            self.running.pop(job.id, None)
+
+
+INGESTION_QUEUE = IngestionQueue()
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+from open_webui.env import SRC_LOG_LEVELS, USER_LAST_ACTIVE_FLUSH_INTERVAL
+from open_webui.models.users import Users
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class LastActiveBuffer:
+    """
+    Collects the last activity of authenticated users in memory and writes it
+    with one bulk update every `interval` seconds, instead of an update per
+    request. Only the latest timestamp of each user is kept.
+    """
+
+    def __init__(self, interval: float = USER_LAST_ACTIVE_FLUSH_INTERVAL):
+        self.interval = interval
+        self.pending: dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.task: Optional[asyncio.Task] = None
+
+    def touch(self, user_id: str):
+        with self.lock:
+            self.pending[user_id] = int(time.time())
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+
+        if pending and not Users.update_users_last_active(pending):
+            # Keep the timestamps for the next flush unless newer ones arrived
+            with self.lock:
+                for user_id, last_active_at in pending.items():
+                    self.pending.setdefault(user_id, last_active_at)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                log.exception(f"Error writing last active timestamps: {e}")
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.flush()
+
+
+LAST_ACTIVE_BUFFER = LastActiveBuffer()
@@ -0,0 +1,216 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+DEFAULT_WEIGHT = 1.0
+DEFAULT_MAX_FAILURES = 3
+DEFAULT_FAILURE_TIMEOUT = 30.0
+
+# Smoothing factor of the response time moving average
+EWMA_ALPHA = 0.3
+
+
+class BackendState:
+    def __init__(self):
+        self.in_flight = 0
+        self.ewma_latency: Optional[float] = None
+        self.failures = 0
+        self.last_failure_at = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "ewma_latency": self.ewma_latency,
+            "failures": self.failures,
+            "last_failure_at": self.last_failure_at,
+        }
+
+
+def get_weight(config: dict) -> float:
+    try:
+        return max(float(config.get("weight", DEFAULT_WEIGHT)), 0.0)
+    except (TypeError, ValueError):
+        return DEFAULT_WEIGHT
+
+
+LOAD_BALANCING_STRATEGIES: dict[
+    str, Callable[[dict[str, dict], dict[str, BackendState]], str]
+] = {}
+
+
+def register_strategy(name: str):
+    def decorator(func):
+        LOAD_BALANCING_STRATEGIES[name] = func
+        return func
+
+    return decorator
+
+
+def pick_lowest(candidates: dict[str, dict], cost: Callable[[str], float]) -> str:
+    costs = {backend: cost(backend) for backend in candidates}
+    lowest = min(costs.values())
+    return random.choice(
+        [backend for backend, value in costs.items() if value == lowest]
+    )
+
+
+@register_strategy("random")
+def select_random(candidates: dict[str, dict], states: dict[str, BackendState]):
+    return random.choice(list(candidates))
+
+
+@register_strategy("weighted")
+def select_weighted(candidates: dict[str, dict], states: dict[str, BackendState]):
+    backends = list(candidates)
+    weights = [get_weight(candidates[backend]) for backend in backends]
+    if not any(weights):
+        return random.choice(backends)
+    return random.choices(backends, weights=weights)[0]
+
+
+@register_strategy("least_requests")
+def select_least_requests(candidates: dict[str, dict], states: dict[str, BackendState]):
+    def cost(backend: str) -> float:
+        weight = get_weight(candidates[backend]) or 1e-9
+        return (states[backend].in_flight + 1) / weight
+
+    return pick_lowest(candidates, cost)
+
+
+@register_strategy("ewma")
+def select_ewma(candidates: dict[str, dict], states: dict[str, BackendState]):
+    # Backends without a measurement yet are tried first
+    def cost(backend: str) -> float:
+        state = states[backend]
+        if state.ewma_latency is None:
+            return 0.0
+        weight = get_weight(candidates[backend]) or 1e-9
+        return state.ewma_latency * (state.in_flight + 1) / weight
+
+    return pick_lowest(candidates, cost)
+
+
+class LoadBalancer:
+    """
+    Picks one of several backends serving the same model. In-flight requests,
+    an exponentially weighted moving average of the response time and
+    consecutive failures are tracked per backend. A backend that failed
+    `max_failures` times in a row is ejected from selection for
+    `failure_timeout` seconds, after which it is given another try; while all
+    candidates are ejected, all of them are considered.
+
+    Backend configs may set `weight`, `max_failures` and `failure_timeout`.
+    The state is kept per process.
+    """
+
+    def __init__(self, default_strategy: str = "least_requests"):
+        self.default_strategy = default_strategy
+        self.states: dict[str, BackendState] = {}
+        self.lock = threading.Lock()
+
+    def _get_state(self, backend: str) -> BackendState:
+        if backend not in self.states:
+            self.states[backend] = BackendState()
+        return self.states[backend]
+
+    def _is_ejected(self, backend: str, config: dict, now: float) -> bool:
+        state = self._get_state(backend)
+        try:
+            max_failures = int(config.get("max_failures", DEFAULT_MAX_FAILURES))
+            failure_timeout = float(
+                config.get("failure_timeout", DEFAULT_FAILURE_TIMEOUT)
+            )
+        except (TypeError, ValueError):
+            max_failures, failure_timeout = (
+                DEFAULT_MAX_FAILURES,
+                DEFAULT_FAILURE_TIMEOUT,
+            )
+
+        return (
+            max_failures > 0
+            and state.failures >= max_failures
+            and now - state.last_failure_at < failure_timeout
+        )
+
+    def select(
+        self, candidates: dict[str, dict], strategy: Optional[str] = None
+    ) -> str:
+        """Pick a backend from a mapping of backend to its config."""
+        if not candidates:
+            raise ValueError("No backends to select from")
+
+        strategy = strategy or self.default_strategy
+        select_backend = LOAD_BALANCING_STRATEGIES.get(strategy)
+        if select_backend is None:
+            log.warning(f"Unknown load balancing strategy: {strategy}")
+            select_backend = LOAD_BALANCING_STRATEGIES[self.default_strategy]
+
+        with self.lock:
+            now = time.monotonic()
+            healthy = {
+                backend: config or {}
+                for backend, config in candidates.items()
+                if not self._is_ejected(backend, config or {}, now)
+            }
+            if not healthy:
+                healthy = {
+                    backend: config or {} for backend, config in candidates.items()
+                }
+
+            for backend in healthy:
+                self._get_state(backend)
+            return select_backend(healthy, self.states)
+
+    def acquire(self, backend: str):
+        with self.lock:
+            self._get_state(backend).in_flight += 1
+
+    def record(self, backend: str, success: bool, latency: Optional[float] = None):
+        """Record the outcome of a request, once its response has started."""
+        with self.lock:
+            state = self._get_state(backend)
+            if success:
+                state.failures = 0
+                if latency is not None:
+                    state.ewma_latency = (
+                        latency
+                        if state.ewma_latency is None
+                        else EWMA_ALPHA * latency
+                        + (1 - EWMA_ALPHA) * state.ewma_latency
+                    )
+            else:
+                state.failures += 1
+                state.last_failure_at = time.monotonic()
+
+    def release(self, backend: str):
+        with self.lock:
+            state = self._get_state(backend)
+            state.in_flight = max(state.in_flight - 1, 0)
+
+    @contextmanager
+    def track(self, backend: str):
+        """Track a request that completes within the block."""
+        self.acquire(backend)
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.record(backend, success=False)
+            raise
+        else:
+            self.record(backend, success=True, latency=time.monotonic() - start)
+        finally:
+            self.release(backend)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {backend: state.to_dict() for backend, state in self.states.items()}
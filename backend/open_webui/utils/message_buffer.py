@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from open_webui.models.chats import Chats
+from open_webui.env import (
+    CHAT_MESSAGE_WRITE_BUFFER_INTERVAL,
+    CHAT_MESSAGE_WRITE_BUFFER_MAX_SIZE,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class PendingMessageWrite:
+    def __init__(self):
+        self.fields = {}
+
+        # `content` is the absolute content once it has been set during this
+        # window, otherwise appended deltas are kept in `content_append` and
+        # applied on top of the stored content at flush time.
+        self.content: Optional[str] = None
+        self.content_append = ""
+
+        self.status_history = []
+        self.sources = []
+        self.files = []
+
+        self.size = 0
+        self.created_at = time.monotonic()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def is_empty(self) -> bool:
+        return not (
+            self.fields
+            or self.content is not None
+            or self.content_append
+            or self.status_history
+            or self.sources
+            or self.files
+        )
+
+    def merge(self, newer: "PendingMessageWrite"):
+        """Apply the updates of `newer`, buffered after these ones, on top."""
+        self.fields.update(newer.fields)
+
+        if newer.content is not None:
+            self.content = newer.content
+            self.content_append = ""
+        elif self.content is not None:
+            self.content += newer.content_append
+        else:
+            self.content_append += newer.content_append
+
+        self.status_history.extend(newer.status_history)
+        self.sources.extend(newer.sources)
+        self.files = [*newer.files, *self.files]
+        self.size += newer.size
+
+
+class MessageWriteBuffer:
+    """
+    In-process write-behind buffer for chat messages that are updated while a
+    response is streaming. Updates are coalesced per (chat_id, message_id) and
+    written with a single upsert once the buffer is older than `interval`
+    seconds or holds `max_size` updates, and whenever `flush` is called.
+    """
+
+    def __init__(
+        self,
+        interval: float = CHAT_MESSAGE_WRITE_BUFFER_INTERVAL,
+        max_size: int = CHAT_MESSAGE_WRITE_BUFFER_MAX_SIZE,
+    ):
+        self.interval = interval
+        self.max_size = max_size
+        self.pending: dict[tuple[str, str], PendingMessageWrite] = {}
+
+    def _get_pending(self, chat_id: str, message_id: str) -> PendingMessageWrite:
+        key = (chat_id, message_id)
+        if key not in self.pending:
+            self.pending[key] = PendingMessageWrite()
+        return self.pending[key]
+
+    def _schedule(self, chat_id: str, message_id: str, pending: PendingMessageWrite):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        pending.timer = loop.call_later(self.interval, self.flush, chat_id, message_id)
+        return True
+
+    def _restore(self, chat_id: str, message_id: str, pending: PendingMessageWrite):
+        # Keep the updates for the next flush, ahead of any that arrived since
+        key = (chat_id, message_id)
+        newer = self.pending.get(key)
+        if newer is not None:
+            if newer.timer is not None:
+                newer.timer.cancel()
+            pending.merge(newer)
+
+        pending.timer = None
+        self.pending[key] = pending
+        if self.interval > 0:
+            self._schedule(chat_id, message_id, pending)
+
+    def _after_write(self, chat_id: str, message_id: str):
+        key = (chat_id, message_id)
+        pending = self.pending.get(key)
+        if pending is None:
+            return
+
+        pending.size += 1
+        if (
+            self.interval <= 0
+            or pending.size >= self.max_size
+            or time.monotonic() - pending.created_at >= self.interval
+        ):
+            self.flush(chat_id, message_id)
+            return
+
+        if pending.timer is None and not self._schedule(chat_id, message_id, pending):
+            self.flush(chat_id, message_id)
+
+    def update_message(self, chat_id: str, message_id: str, message: dict):
+        pending = self._get_pending(chat_id, message_id)
+
+        message = {**message}
+        if "content" in message:
+            content = message.pop("content")
+            if isinstance(content, str):
+                pending.content = content
+                pending.content_append = ""
+            else:
+                message["content"] = content
+
+        pending.fields.update(message)
+        self._after_write(chat_id, message_id)
+
+    def append_content(self, chat_id: str, message_id: str, content: str):
+        pending = self._get_pending(chat_id, message_id)
+        if pending.content is not None:
+            pending.content += content
+        else:
+            pending.content_append += content
+        self._after_write(chat_id, message_id)
+
+    def add_status(self, chat_id: str, message_id: str, status: dict):
+        self._get_pending(chat_id, message_id).status_history.append(status)
+        self._after_write(chat_id, message_id)
+
+    def add_source(self, chat_id: str, message_id: str, source: dict):
+        self._get_pending(chat_id, message_id).sources.append(source)
+        self._after_write(chat_id, message_id)
+
+    def add_files(self, chat_id: str, message_id: str, files: list):
+        pending = self._get_pending(chat_id, message_id)
+        pending.files = [*files, *pending.files]
+        self._after_write(chat_id, message_id)
+
+    def get_message(self, chat_id: str, message_id: str) -> Optional[dict]:
+        """Read a message including any updates that are still buffered."""
+        self.flush(chat_id, message_id)
+        return Chats.get_message_by_id_and_message_id(chat_id, message_id)
+
+    def flush(self, chat_id: str, message_id: str) -> bool:
+        """
+        Write the buffered updates of a message. If the write fails they are
+        put back into the buffer, to be retried with the next flush.
+        """
+        pending = self.pending.pop((chat_id, message_id), None)
+        if pending is None:
+            return True
+
+        if pending.timer is not None:
+            pending.timer.cancel()
+            pending.timer = None
+
+        if pending.is_empty():
+            return True
+
+        try:
+            message = None
+            if (
+                pending.content is None
+                or pending.status_history
+                or pending.sources
+                or pending.files
+            ):
+                message = Chats.get_message_by_id_and_message_id(chat_id, message_id)
+
+            update = {**pending.fields}
+
+            if pending.content is not None:
+                update["content"] = pending.content
+            elif pending.content_append and message:
+                update["content"] = (
+                    message.get("content", "") or ""
+                ) + pending.content_append
+
+            if message:
+                if pending.status_history:
+                    update["statusHistory"] = [
+                        *message.get("statusHistory", []),
+                        *pending.status_history,
+                    ]
+                if pending.sources:
+                    update["sources"] = [
+                        *message.get("sources", []),
+                        *pending.sources,
+                    ]
+                if pending.files:
+                    update["files"] = [*pending.files, *message.get("files", [])]
+
+            if update and (
+                Chats.upsert_message_to_chat_by_id_and_message_id(
+                    chat_id, message_id, update
+                )
+                is None
+            ):
+                if Chats.get_chat_title_by_id(chat_id) is None:
+                    # The chat was deleted while the response was streaming
+                    return True
+                raise Exception("The message could not be written")
+            return True
+        except Exception as e:
+            log.exception(
+                f"Error flushing buffered writes for message {chat_id}/{message_id}: {e}"
+            )
+            self._restore(chat_id, message_id, pending)
+            return False
+
+    def flush_all(self):
+        for chat_id, message_id in list(self.pending.keys()):
+            self.flush(chat_id, message_id)
+
+
+MESSAGE_WRITE_BUFFER = MessageWriteBuffer()
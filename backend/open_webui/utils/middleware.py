@@ -67,6 +67,13 @@ from open_webui.utils.task import (
     rag_template,
     tools_function_calling_generation_template,
 )
+from open_webui.utils.message_buffer import MESSAGE_WRITE_BUFFER
+from open_webui.utils.content_blocks import (
+    ContentBlockSerializer,
+    serialize_content_blocks,
+    get_common_prefix_length,
+    get_utf16_length,
+)
 from open_webui.utils.misc import (
     deep_update,
     get_message_list,
@@ -98,6 +105,7 @@ from open_webui.env import (
     SRC_LOG_LEVELS,
     GLOBAL_LOG_LEVEL,
     CHAT_RESPONSE_STREAM_DELTA_CHUNK_SIZE,
+    CHAT_RESPONSE_STREAM_FULL_CONTENT_INTERVAL,
     CHAT_RESPONSE_MAX_TOOL_CALL_RETRIES,
     BYPASS_MODEL_ACCESS_CONTROL,
     ENABLE_REALTIME_CHAT_SAVE,
@@ -1073,6 +1081,7 @@ async def process_chat_response(
     request, response, form_data, user, metadata, model, events, tasks
 ):
     async def background_tasks_handler():
+        MESSAGE_WRITE_BUFFER.flush(metadata["chat_id"], metadata["message_id"])
         message_map = Chats.get_messages_by_chat_id(metadata["chat_id"])
         message = message_map.get(metadata["message_id"]) if message_map else None
 
@@ -1348,6 +1357,9 @@ async def process_chat_response(
                         )
 
                         # Save message in the database
+                        MESSAGE_WRITE_BUFFER.flush(
+                            metadata["chat_id"], metadata["message_id"]
+                        )
                         Chats.upsert_message_to_chat_by_id_and_message_id(
                             metadata["chat_id"],
                             metadata["message_id"],
@@ -1358,7 +1370,7 @@ async def process_chat_response(
                         )
 
                         # Send a webhook notification if the user is not active
-                        if not get_active_status_by_user_id(user.id):
+                        if not await get_active_status_by_user_id(user.id):
                             webhook_url = Users.get_user_webhook_url_by_id(user.id)
                             if webhook_url:
                                 await post_webhook(
@@ -1441,154 +1453,8 @@ async def process_chat_response(
         task_id = str(uuid4())  # Create a unique task ID.
         model_id = form_data.get("model", "")
 
-        def split_content_and_whitespace(content):
-            content_stripped = content.rstrip()
-            original_whitespace = (
-                content[len(content_stripped) :]
-                if len(content) > len(content_stripped)
-                else ""
-            )
-            return content_stripped, original_whitespace
-
-        def is_opening_code_block(content):
-            backtick_segments = content.split("```")
-            # Even number of segments means the last backticks are opening a new block
-            return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
-
         # Handle as a background task
         async def response_handler(response, events):
-            def serialize_content_blocks(content_blocks, raw=False):
-                content = ""
-
-                for block in content_blocks:
-                    if block["type"] == "text":
-                        block_content = block["content"].strip()
-                        if block_content:
-                            content = f"{content}{block_content}\n"
-                    elif block["type"] == "tool_calls":
-                        attributes = block.get("attributes", {})
-
-                        tool_calls = block.get("content", [])
-                        results = block.get("results", [])
-
-                        if content and not content.endswith("\n"):
-                            content += "\n"
-
-                        if results:
-
-                            tool_calls_display_content = ""
-                            for tool_call in tool_calls:
-
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_result = None
-                                tool_result_files = None
-                                for result in results:
-                                    if tool_call_id == result.get("tool_call_id", ""):
-                                        tool_result = result.get("content", None)
-                                        tool_result_files = result.get("files", None)
-                                        break
-
-                                if tool_result:
-                                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result, ensure_ascii=False))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
-                                else:
-                                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
-
-                            if not raw:
-                                content = f"{content}{tool_calls_display_content}"
-                        else:
-                            tool_calls_display_content = ""
-
-                            for tool_call in tool_calls:
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
-
-                            if not raw:
-                                content = f"{content}{tool_calls_display_content}"
-
-                    elif block["type"] == "reasoning":
-                        reasoning_display_content = "\n".join(
-                            (f"> {line}" if not line.startswith(">") else line)
-                            for line in block["content"].splitlines()
-                        )
-
-                        reasoning_duration = block.get("duration", None)
-
-                        start_tag = block.get("start_tag", "")
-                        end_tag = block.get("end_tag", "")
-
-                        if content and not content.endswith("\n"):
-                            content += "\n"
-
-                        if reasoning_duration is not None:
-                            if raw:
-                                content = (
-                                    f'{content}{start_tag}{block["content"]}{end_tag}\n'
-                                )
-                            else:
-                                content = f'{content}<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
-                        else:
-                            if raw:
-                                content = (
-                                    f'{content}{start_tag}{block["content"]}{end_tag}\n'
-                                )
-                            else:
-                                content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
-
-                    elif block["type"] == "code_interpreter":
-                        attributes = block.get("attributes", {})
-                        output = block.get("output", None)
-                        lang = attributes.get("lang", "")
-
-                        content_stripped, original_whitespace = (
-                            split_content_and_whitespace(content)
-                        )
-                        if is_opening_code_block(content_stripped):
-                            # Remove trailing backticks that would open a new block
-                            content = (
-                                content_stripped.rstrip("`").rstrip()
-                                + original_whitespace
-                            )
-                        else:
-                            # Keep content as is - either closing backticks or no backticks
-                            content = content_stripped + original_whitespace
-
-                        if content and not content.endswith("\n"):
-                            content += "\n"
-
-                        if output:
-                            output = html.escape(json.dumps(output))
-
-                            if raw:
-                                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
-                            else:
-                                content = f'{content}<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
-                            else:
-                                content = f'{content}<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-
-                    else:
-                        block_content = str(block["content"]).strip()
-                        if block_content:
-                            content = f"{content}{block['type']}: {block_content}\n"
-
-                return content.strip()
-
             def convert_content_blocks_to_messages(content_blocks, raw=False):
                 messages = []
 
@@ -1805,7 +1671,7 @@ async def process_chat_response(
 
                 return content, content_blocks, end_flag
 
-            message = Chats.get_message_by_id_and_message_id(
+            message = MESSAGE_WRITE_BUFFER.get_message(
                 metadata["chat_id"], metadata["message_id"]
             )
 
@@ -1851,6 +1717,67 @@ async def process_chat_response(
                 else:
                     reasoning_tags = DEFAULT_REASONING_TAGS
 
+            # Frozen content blocks are serialized once, only the last block is
+            # re-rendered on every delta
+            content_serializer = ContentBlockSerializer()
+            last_emitted_content = None
+            last_emitted_length = 0
+            content_delta_count = 0
+
+            def get_content_delta_data(data):
+                """
+                Replace the full `content` of an intermediate completion event with a
+                `content_delta` that splices the new content onto what was last sent:
+                content = content[:offset] + delta. The offset and the `length` of the
+                resulting content are in UTF-16 code units so that they can be applied
+                to JavaScript strings directly. A client whose content does not add
+                up to `length` skips deltas until the next full content, which is sent
+                every CHAT_RESPONSE_STREAM_FULL_CONTENT_INTERVAL events.
+                """
+                nonlocal last_emitted_content, last_emitted_length, content_delta_count
+
+                content = data.get("content") if isinstance(data, dict) else None
+                if not isinstance(content, str) or data.get("done"):
+                    return data
+
+                if (
+                    last_emitted_content is None
+                    or content_delta_count >= CHAT_RESPONSE_STREAM_FULL_CONTENT_INTERVAL
+                ):
+                    last_emitted_content = content
+                    last_emitted_length = get_utf16_length(content)
+                    content_delta_count = 0
+                    return data
+
+                # Only the replaced tail and the delta are measured, not the
+                # whole content
+                offset = get_common_prefix_length(last_emitted_content, content)
+                delta = content[offset:]
+                utf16_offset = last_emitted_length - get_utf16_length(
+                    last_emitted_content[offset:]
+                )
+
+                last_emitted_content = content
+                last_emitted_length = utf16_offset + get_utf16_length(delta)
+                content_delta_count += 1
+
+                return {
+                    **{key: value for key, value in data.items() if key != "content"},
+                    "content_delta": {
+                        "offset": utf16_offset,
+                        "content": delta,
+                        "length": last_emitted_length,
+                    },
+                }
+
+            async def emit_completion_data(data):
+                await event_emitter(
+                    {
+                        "type": "chat:completion",
+                        "data": get_content_delta_data(data),
+                    }
+                )
+
             try:
                 for event in events:
                     await event_emitter(
@@ -1861,7 +1788,7 @@ async def process_chat_response(
                     )
 
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    MESSAGE_WRITE_BUFFER.update_message(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1890,12 +1817,7 @@ async def process_chat_response(
                         nonlocal last_delta_data
 
                         if delta_count >= threshold and last_delta_data:
-                            await event_emitter(
-                                {
-                                    "type": "chat:completion",
-                                    "data": last_delta_data,
-                                }
-                            )
+                            await emit_completion_data(last_delta_data)
                             delta_count = 0
                             last_delta_data = None
 
@@ -1931,7 +1853,7 @@ async def process_chat_response(
 
                                 if "selected_model_id" in data:
                                     model_id = data["selected_model_id"]
-                                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                                    MESSAGE_WRITE_BUFFER.update_message(
                                         metadata["chat_id"],
                                         metadata["message_id"],
                                         {
@@ -2059,7 +1981,7 @@ async def process_chat_response(
                                         reasoning_block["content"] += reasoning_content
 
                                         data = {
-                                            "content": serialize_content_blocks(
+                                            "content": content_serializer.serialize(
                                                 content_blocks
                                             )
                                         }
@@ -2134,19 +2056,19 @@ async def process_chat_response(
                                                 break
 
                                         if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
-                                            Chats.upsert_message_to_chat_by_id_and_message_id(
+                                            # Buffer the message, it is flushed to the database periodically
+                                            MESSAGE_WRITE_BUFFER.update_message(
                                                 metadata["chat_id"],
                                                 metadata["message_id"],
                                                 {
-                                                    "content": serialize_content_blocks(
+                                                    "content": content_serializer.serialize(
                                                         content_blocks
                                                     ),
                                                 },
                                             )
                                         else:
                                             data = {
-                                                "content": serialize_content_blocks(
+                                                "content": content_serializer.serialize(
                                                     content_blocks
                                                 ),
                                             }
@@ -2157,12 +2079,7 @@ async def process_chat_response(
                                     if delta_count >= delta_chunk_size:
                                         await flush_pending_delta_data(delta_chunk_size)
                                 else:
-                                    await event_emitter(
-                                        {
-                                            "type": "chat:completion",
-                                            "data": data,
-                                        }
-                                    )
+                                    await emit_completion_data(data)
                         except Exception as e:
                             done = "data: [DONE]" in line
                             if done:
@@ -2225,13 +2142,8 @@ async def process_chat_response(
                         }
                     )
 
-                    await event_emitter(
-                        {
-                            "type": "chat:completion",
-                            "data": {
-                                "content": serialize_content_blocks(content_blocks),
-                            },
-                        }
+                    await emit_completion_data(
+                        {"content": content_serializer.serialize(content_blocks)}
                     )
 
                     tools = metadata.get("tools", {})
@@ -2349,13 +2261,8 @@ async def process_chat_response(
                         }
                     )
 
-                    await event_emitter(
-                        {
-                            "type": "chat:completion",
-                            "data": {
-                                "content": serialize_content_blocks(content_blocks),
-                            },
-                        }
+                    await emit_completion_data(
+                        {"content": content_serializer.serialize(content_blocks)}
                     )
 
                     try:
@@ -2394,13 +2301,8 @@ async def process_chat_response(
                         and retries < MAX_RETRIES
                     ):
 
-                        await event_emitter(
-                            {
-                                "type": "chat:completion",
-                                "data": {
-                                    "content": serialize_content_blocks(content_blocks),
-                                },
-                            }
+                        await emit_completion_data(
+                            {"content": content_serializer.serialize(content_blocks)}
                         )
 
                         retries += 1
@@ -2537,13 +2439,8 @@ async def process_chat_response(
                             }
                         )
 
-                        await event_emitter(
-                            {
-                                "type": "chat:completion",
-                                "data": {
-                                    "content": serialize_content_blocks(content_blocks),
-                                },
-                            }
+                        await emit_completion_data(
+                            {"content": content_serializer.serialize(content_blocks)}
                         )
 
                         try:
@@ -2578,22 +2475,22 @@ async def process_chat_response(
                 title = Chats.get_chat_title_by_id(metadata["chat_id"])
                 data = {
                     "done": True,
-                    "content": serialize_content_blocks(content_blocks),
+                    "content": content_serializer.serialize(content_blocks),
                     "title": title,
                 }
 
-                if not ENABLE_REALTIME_CHAT_SAVE:
-                    # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        metadata["chat_id"],
-                        metadata["message_id"],
-                        {
-                            "content": serialize_content_blocks(content_blocks),
-                        },
-                    )
+                # Save message in the database, along with any buffered updates
+                MESSAGE_WRITE_BUFFER.update_message(
+                    metadata["chat_id"],
+                    metadata["message_id"],
+                    {
+                        "content": content_serializer.serialize(content_blocks),
+                    },
+                )
+                MESSAGE_WRITE_BUFFER.flush(metadata["chat_id"], metadata["message_id"])
 
                 # Send a webhook notification if the user is not active
-                if not get_active_status_by_user_id(user.id):
+                if not await get_active_status_by_user_id(user.id):
                     webhook_url = Users.get_user_webhook_url_by_id(user.id)
                     if webhook_url:
                         await post_webhook(
@@ -2620,15 +2517,17 @@ async def process_chat_response(
                 log.warning("Task was cancelled!")
                 await event_emitter({"type": "task-cancelled"})
 
-                if not ENABLE_REALTIME_CHAT_SAVE:
-                    # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        metadata["chat_id"],
-                        metadata["message_id"],
-                        {
-                            "content": serialize_content_blocks(content_blocks),
-                        },
-                    )
+                # Save message in the database, along with any buffered updates
+                MESSAGE_WRITE_BUFFER.update_message(
+                    metadata["chat_id"],
+                    metadata["message_id"],
+                    {
+                        "content": content_serializer.serialize(content_blocks),
+                    },
+                )
+            finally:
+                # Never leave buffered writes behind, even if the stream failed
+                MESSAGE_WRITE_BUFFER.flush(metadata["chat_id"], metadata["message_id"])
 
             if response.background is not None:
                 await response.background()
@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from open_webui.config import CACHE_DIR
+from open_webui.env import (
+    AUDIO_TTS_CACHE_MAX_SIZE,
+    AUDIO_TTS_CACHE_SHARED,
+    REDIS_KEY_PREFIX,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["AUDIO"])
+
+SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
+SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+REDIS_SPEECH_CACHE_KEY = f"{REDIS_KEY_PREFIX}:speech_cache"
+
+
+class SpeechCache:
+    """
+    Size-bounded cache of synthesized speech on disk.
+
+    Each clip is stored as `{name[:2]}/{name}.mp3`, with the request body that
+    produced it next to it as `{name}.json`, so that no directory holds more
+    than a small share of the clips. An index of the size and last use of
+    every clip evicts the least recently used clips once they take more than
+    `max_size` bytes. `start` indexes the clips already on disk in the
+    background, moving clips of the former flat layout into their shard.
+
+    With `shared`, the index lives in Redis instead of in memory, so replicas
+    sharing the cache directory on a shared volume reuse each other's clips
+    under a single budget. Replicas with a cache directory of their own must
+    keep their own index, since a shared one would evict clips they do not
+    hold. A `max_size` of 0 disables eviction.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_size: int = AUDIO_TTS_CACHE_MAX_SIZE,
+        shared: bool = AUDIO_TTS_CACHE_SHARED,
+    ):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.shared = shared
+
+        self.redis = None
+        self.task: Optional[asyncio.Task] = None
+
+        # name -> size of the clips, least recently used first
+        self.entries: OrderedDict[str, int] = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get_paths(self, name: str) -> tuple[Path, Path]:
+        """Paths of the audio and of the request body of a clip."""
+        shard = self.directory / name[:2]
+        shard.mkdir(exist_ok=True)
+        return shard / f"{name}.mp3", shard / f"{name}.json"
+
+    def _get_size(self, name: str) -> Optional[int]:
+        size = 0
+        for i, path in enumerate(self.get_paths(name)):
+            try:
+                size += path.stat().st_size
+            except FileNotFoundError:
+                if i == 0:
+                    return None
+        return size
+
+    def _delete(self, *names: str):
+        for name in names:
+            for path in self.get_paths(name):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    async def get(self, name: str) -> Optional[Path]:
+        """Path of the cached audio of a clip, or None if it is not cached."""
+        size = self._get_size(name)
+        if size is None:
+            return None
+
+        await self._record(name, size)
+        return self.get_paths(name)[0]
+
+    async def put(self, name: str):
+        """Index a clip once its audio and body are written to `get_paths(name)`."""
+        size = self._get_size(name)
+        if size is None:
+            return
+
+        await self._record(name, size)
+        try:
+            await self._evict(keep=name)
+        except Exception as e:
+            log.warning(f"Error evicting speech cache entries: {e}")
+
+    async def _record(self, name: str, size: int):
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            pipe.zadd(f"{REDIS_SPEECH_CACHE_KEY}:lru", {name: time.time()})
+            pipe.hsetnx(f"{REDIS_SPEECH_CACHE_KEY}:sizes", name, size)
+            _, added = await pipe.execute()
+            if added:
+                await self.redis.incrby(f"{REDIS_SPEECH_CACHE_KEY}:size", size)
+            return
+
+        with self.lock:
+            if name in self.entries:
+                self.entries.move_to_end(name)
+            else:
+                self.entries[name] = size
+                self.size += size
+
+    async def _record_scanned(self, clips: list[tuple[str, int, float]]):
+        """Index clips found on disk, least recently used first, keeping known ones."""
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            pipe.zadd(
+                f"{REDIS_SPEECH_CACHE_KEY}:lru",
+                {name: used_at for name, _, used_at in clips},
+                nx=True,
+            )
+            for name, size, _ in clips:
+                pipe.hsetnx(f"{REDIS_SPEECH_CACHE_KEY}:sizes", name, size)
+            added = await pipe.execute()
+            added_size = sum(size for (_, size, _), new in zip(clips, added[1:]) if new)
+            if added_size:
+                await self.redis.incrby(f"{REDIS_SPEECH_CACHE_KEY}:size", added_size)
+            return
+
+        with self.lock:
+            # Clips found on disk are older than those used since startup
+            for name, size, _ in reversed(clips):
+                if name not in self.entries:
+                    self.entries[name] = size
+                    self.size += size
+                    self.entries.move_to_end(name, last=False)
+
+    async def _evict(self, keep: str):
+        if self.max_size <= 0:
+            return
+
+        if self.redis is not None:
+            await self._evict_redis(keep)
+            return
+
+        evicted = []
+        with self.lock:
+            while self.size > self.max_size and len(self.entries) > 1:
+                name, size = next(iter(self.entries.items()))
+                if name == keep:
+                    break
+                del self.entries[name]
+                self.size -= size
+                evicted.append(name)
+
+        if evicted:
+            await asyncio.to_thread(self._delete, *evicted)
+
+    async def _evict_redis(self, keep: str):
+        while (
+            int(await self.redis.get(f"{REDIS_SPEECH_CACHE_KEY}:size") or 0)
+            > self.max_size
+        ):
+            popped = await self.redis.zpopmin(f"{REDIS_SPEECH_CACHE_KEY}:lru", 64)
+            if not popped:
+                return
+
+            names = [name for name, _ in popped if name != keep]
+            if len(names) < len(popped):
+                await self.redis.zadd(
+                    f"{REDIS_SPEECH_CACHE_KEY}:lru", {keep: time.time()}
+                )
+            if not names:
+                return
+
+            sizes = await self.redis.hmget(f"{REDIS_SPEECH_CACHE_KEY}:sizes", names)
+            pipe = self.redis.pipeline()
+            pipe.hdel(f"{REDIS_SPEECH_CACHE_KEY}:sizes", *names)
+            pipe.decrby(
+                f"{REDIS_SPEECH_CACHE_KEY}:size",
+                sum(int(size) for size in sizes if size is not None),
+            )
+            await pipe.execute()
+
+            await asyncio.to_thread(self._delete, *names)
+
+    def _migrate_flat_files(self):
+        # Clips cached before sharding are moved into their shard
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                name, ext = os.path.splitext(entry.name)
+                if ext in (".mp3", ".json") and entry.is_file():
+                    audio_path, body_path = self.get_paths(name)
+                    os.replace(entry.path, audio_path if ext == ".mp3" else body_path)
+
+    def _scan_shard(self, shard: str) -> list[tuple[str, int, float]]:
+        clips = {}
+        with os.scandir(self.directory / shard) as entries:
+            for entry in entries:
+                name, ext = os.path.splitext(entry.name)
+                stat = entry.stat()
+                size, used_at = clips.get(name, (0, None))
+                clips[name] = (
+                    size + stat.st_size,
+                    stat.st_mtime if ext == ".mp3" else used_at,
+                )
+
+        scanned = []
+        for name, (size, used_at) in clips.items():
+            if used_at is None:
+                # A request body without audio, left by a failed request
+                self._delete(name)
+            else:
+                scanned.append((name, size, used_at))
+        return scanned
+
+    async def scan(self):
+        await asyncio.to_thread(self._migrate_flat_files)
+
+        if self.redis is not None and not await self.redis.set(
+            f"{REDIS_SPEECH_CACHE_KEY}:scanned", 1, nx=True, ex=24 * 60 * 60
+        ):
+            # Another replica indexed the shared directory recently
+            return
+
+        count = 0
+        scanned = []
+        for shard in sorted(os.listdir(self.directory)):
+            if not (self.directory / shard).is_dir():
+                continue
+
+            clips = await asyncio.to_thread(self._scan_shard, shard)
+            count += len(clips)
+            if self.redis is not None:
+                if clips:
+                    await self._record_scanned(clips)
+            else:
+                scanned.extend(clips)
+
+        if scanned:
+            # The in-memory index is ordered, so all shards are sorted together
+            scanned.sort(key=lambda clip: clip[2])
+            await self._record_scanned(scanned)
+
+        log.info(f"Indexed {count} cached speech clips")
+        await self._evict(keep="")
+
+    def start(self, redis=None):
+        self.redis = redis if self.shared else None
+        if self.shared and redis is None:
+            log.warning(
+                "AUDIO_TTS_CACHE_SHARED requires Redis, indexing the speech cache in memory"
+            )
+        self.task = asyncio.create_task(self._run_scan())
+
+    async def _run_scan(self):
+        try:
+            await self.scan()
+        except Exception as e:
+            log.exception(f"Error indexing the speech cache: {e}")
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+SPEECH_CACHE = SpeechCache(SPEECH_CACHE_DIR)
@@ -8,6 +8,8 @@ Metrics collected:
 
 * http.server.requests (counter)
 * http.server.duration (histogram, milliseconds)
+* webui.storage.cache.hits / webui.storage.cache.misses (observable counters)
+* webui.storage.cache.size (gauge, bytes)
 
 Attributes used: http.method, http.route, http.status_code
 
@@ -45,8 +47,9 @@ from open_webui.env import (
     OTEL_METRICS_OTLP_SPAN_EXPORTER,
     OTEL_METRICS_EXPORTER_OTLP_INSECURE,
 )
-from open_webui.socket.main import get_active_user_ids
+from open_webui.socket.main import get_active_user_count
 from open_webui.models.users import Users
+from open_webui.storage.provider import Storage
 
 _EXPORT_INTERVAL_MILLIS = 10_000  # 10 seconds
 
@@ -99,6 +102,15 @@ def _build_meter_provider(resource: Resource) -> MeterProvider:
         View(
             instrument_name="webui.users.active",
         ),
+        View(
+            instrument_name="webui.storage.cache.hits",
+        ),
+        View(
+            instrument_name="webui.storage.cache.misses",
+        ),
+        View(
+            instrument_name="webui.storage.cache.size",
+        ),
     ]
 
     provider = MeterProvider(
@@ -132,7 +144,7 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
     ) -> Sequence[metrics.Observation]:
         return [
             metrics.Observation(
-                value=len(get_active_user_ids()),
+                value=get_active_user_count(),
             )
         ]
 
@@ -159,6 +171,39 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
         callbacks=[observe_active_users],
     )
 
+    # Only remote storage providers have a local read cache
+    def observe_storage_cache(key: str):
+        def callback(
+            options: metrics.CallbackOptions,
+        ) -> Sequence[metrics.Observation]:
+            cache = getattr(Storage, "cache", None)
+            if cache is None:
+                return []
+            return [metrics.Observation(value=cache.get_stats()[key])]
+
+        return callback
+
+    meter.create_observable_counter(
+        name="webui.storage.cache.hits",
+        description="Storage reads served from the local cache",
+        unit="1",
+        callbacks=[observe_storage_cache("hits")],
+    )
+
+    meter.create_observable_counter(
+        name="webui.storage.cache.misses",
+        description="Storage reads downloaded from the remote provider",
+        unit="1",
+        callbacks=[observe_storage_cache("misses")],
+    )
+
+    meter.create_observable_gauge(
+        name="webui.storage.cache.size",
+        description="Size of the files in the local storage cache",
+        unit="By",
+        callbacks=[observe_storage_cache("size")],
+    )
+
     # FastAPI middleware
     @app.middleware("http")
     async def _metrics_middleware(request: Request, call_next):
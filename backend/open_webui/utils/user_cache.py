@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS, USER_CACHE_MAX_SIZE, USER_CACHE_TTL
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class UserCache:
+    """
+    Short-lived per-process cache of users looked up to authenticate requests,
+    keyed by user id (`id:<id>`) and API key (`api_key:<key>`).
+
+    `UsersTable` invalidates a user's entries whenever it writes the user, so
+    changes made through this instance apply immediately; changes made by
+    other instances apply once the entries expire after `ttl` seconds. A `ttl`
+    of 0 disables the cache. Callers get copies and may modify them.
+    """
+
+    def __init__(
+        self, ttl: float = USER_CACHE_TTL, max_size: int = USER_CACHE_MAX_SIZE
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self.entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.keys_by_user_id: dict[str, set[str]] = {}
+        self.lock = threading.Lock()
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+
+        user_id = entry[1].id
+        keys = self.keys_by_user_id.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_user_id[user_id]
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1].model_copy(deep=True)
+
+    def set(self, key: str, user):
+        if self.ttl <= 0:
+            return
+
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = (
+                time.monotonic() + self.ttl,
+                user.model_copy(deep=True),
+            )
+            self.keys_by_user_id.setdefault(user.id, set()).add(key)
+
+            while len(self.entries) > self.max_size:
+                self._remove(next(iter(self.entries)))
+
+    def get_or_load(self, key: str, load: Callable[[], Optional[object]]):
+        user = self.get(key)
+        if user is None:
+            user = load()
+            if user is not None:
+                self.set(key, user)
+        return user
+
+    def invalidate(self, user_id: str):
+        with self.lock:
+            for key in list(self.keys_by_user_id.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_user_id.clear()
+
+
+USER_CACHE = UserCache()
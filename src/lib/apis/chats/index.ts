@@ -77,11 +77,18 @@ export const importChat = async (
 	return res;
 };
 
-export const getChatList = async (token: string = '', page: number | null = null) => {
+export const getChatList = async (
+	token: string = '',
+	page: number | null = null,
+	cursor: string | null = null
+) => {
 	let error = null;
 	const searchParams = new URLSearchParams();
 
-	if (page !== null) {
+	if (cursor !== null) {
+		// `${updated_at}:${id}` of the last loaded chat
+		searchParams.append('cursor', cursor);
+	} else if (page !== null) {
 		searchParams.append('page', `${page}`);
 	}
 
@@ -250,6 +257,65 @@ export const getAllChats = async (token: string) => {
 	return res;
 };
 
+export const getAllChatsExport = async (token: string, compress: boolean = false) => {
+	let error = null;
+
+	const searchParams = new URLSearchParams();
+	searchParams.append('compress', `${compress}`);
+
+	const res = await fetch(`${WEBUI_API_BASE_URL}/chats/all/export?${searchParams.toString()}`, {
+		method: 'GET',
+		headers: {
+			...(token && { authorization: `Bearer ${token}` })
+		}
+	})
+		.then(async (res) => {
+			if (!res.ok) throw await res.json();
+			return res.blob();
+		})
+		.catch((err) => {
+			error = err;
+			console.error(err);
+			return null;
+		});
+
+	if (error) {
+		throw error;
+	}
+
+	return res;
+};
+
+export const importChatsFromFile = async (token: string, file: Blob) => {
+	let error = null;
+
+	// The file is sent as is, one chat per line, and imported while it uploads
+	const res = await fetch(`${WEBUI_API_BASE_URL}/chats/import/stream`, {
+		method: 'POST',
+		headers: {
+			Accept: 'application/json',
+			'Content-Type': 'application/x-ndjson',
+			authorization: `Bearer ${token}`
+		},
+		body: file
+	})
+		.then(async (res) => {
+			if (!res.ok) throw await res.json();
+			return res.json();
+		})
+		.catch((err) => {
+			error = err;
+			console.error(err);
+			return null;
+		});
+
+	if (error) {
+		throw error;
+	}
+
+	return res;
+};
+
 export const getChatListBySearchText = async (token: string, text: string, page: number = 1) => {
 	let error = null;
 